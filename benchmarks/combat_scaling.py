@@ -0,0 +1,456 @@
+"""How the combat classes and CombatManager scale with army size.
+
+Usage::
+
+    poetry run python -m benchmarks.combat_scaling [--own 1,10,50] [--enemies 0,100]
+
+Each scenario runs against synthetic armies from `benchmarks.fakes`, for
+every combination of own and enemy unit counts. Per call it reports the
+median and p95 latency, the peak memory traced while the call runs and the
+number of allocations it leaves behind, counted per trace from tracemalloc
+snapshots. A log-log fit of latency against unit count gives each scenario's
+scaling exponent, scenarios above `SUPERLINEAR_EXPONENT` are flagged.
+
+tracemalloc snapshots only hold live blocks, so allocations freed before the
+call returns don't show up in the count; peak traced memory stands in for
+those temporaries.
+"""
+import argparse
+import json
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Callable, Coroutine, Optional
+
+import numpy as np
+from ares.consts import UnitRole
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId as UnitID
+from sc2.units import Units
+
+from benchmarks.fakes import FakeWorld
+from bot.behaviors.place_predictive_aoe import (
+    PlacePredictiveAoE,
+    PredictiveAoERequest,
+    batch_predict_aoe_targets,
+)
+from bot.combat.medivac_mine_drops import MedivacMineDrops
+from bot.combat.reaper_harass import ReaperHarass
+from bot.combat.worker_defenders import WorkerDefenders
+from bot.combat.worker_scouts import WorkerScouts
+from bot.drop_tracker import DropTracker
+from bot.managers.combat_manager import CombatManager
+from bot.managers.reaper_harass_manager import ReaperHarassManager
+from bot.managers.unit_proximity_manager import UnitProximityManager
+from bot.managers.unit_snapshot_manager import UnitSnapshotManager
+from bot.managers.worker_cluster_manager import WorkerClusterManager
+
+OUTPUT_FILE: Path = (
+    Path(__file__).parent.parent / "data" / "benchmarks" / "combat_scaling.json"
+)
+OWN_COUNTS: tuple[int, ...] = (1, 10, 25, 50, 100, 200)
+ENEMY_COUNTS: tuple[int, ...] = (0, 30, 100, 300)
+REPEATS: int = 15
+# counts below this are dominated by fixed costs and left out of the fit
+MIN_FIT_COUNT: int = 10
+SUPERLINEAR_EXPONENT: float = 1.15
+REAPER_GRENADE_DELAY: int = 34
+
+# (prepare, run), `prepare` resets state between calls and isn't timed
+Call = tuple[Callable[[], Any], Callable[[], Any]]
+
+
+def run_sync(coroutine: Coroutine) -> Any:
+    """Run a coroutine that never suspends, without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as result:
+        return result.value
+    raise RuntimeError("Benchmarked coroutines shouldn't wait on anything")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Something to benchmark and the army it runs with.
+
+    Attributes
+    ----------
+    name : str
+        Name used in the report.
+    own_types : tuple[UnitID, ...]
+        Types of our units, cycled through.
+    build : Callable[[FakeWorld], Call]
+        Set the scenario up in a world, returns what to time.
+    uses_enemies : bool
+        Whether the enemy count matters, if not only one enemy count is run.
+    """
+
+    name: str
+    own_types: tuple[UnitID, ...]
+    build: Callable[[FakeWorld], Call]
+    uses_enemies: bool = True
+
+
+def _reaper_harass(world: FakeWorld) -> Call:
+    reaper_harass: ReaperHarass = ReaperHarass(
+        world.bot, world.bot.config, world.mediator
+    )
+    target = world.bot.enemy_start_locations[0]
+    return world.bot.reset, partial(
+        reaper_harass.execute,
+        world.own,
+        reaper_to_target_tracker={u.tag: target for u in world.own},
+        heal_threshold=ReaperHarassManager.RETREAT_THRESHOLD,
+        unit_snapshot=world.snapshot,
+        neighbour_table=world.all_enemy_table,
+    )
+
+
+def _medivac_mine_drops(world: FakeWorld) -> Call:
+    medivacs: Units = world.own_of_type(UnitID.MEDIVAC)
+    mines: Units = world.own_of_type(UnitID.WIDOWMINE)
+    for i, medivac in enumerate(medivacs):
+        medivac.has_cargo = i % 2 == 1
+    mine_drops: MedivacMineDrops = MedivacMineDrops(
+        world.bot, world.bot.config, world.mediator
+    )
+    kwargs: dict = {"unit_snapshot": world.snapshot}
+    unit_snapshot: UnitSnapshotManager = UnitSnapshotManager(
+        world.bot, world.bot.config, world.mediator
+    )
+    run_sync(unit_snapshot.update(0))
+
+    def prepare() -> None:
+        world.bot.reset()
+        # worker clusters are worked out once per frame, on the first call
+        mine_drops.worker_clusters = WorkerClusterManager(
+            world.bot, world.bot.config, world.mediator, unit_snapshot=unit_snapshot
+        )
+        # mines change role as the drop goes on, every call starts over
+        tracker: DropTracker = DropTracker(world.mediator)
+        for unit in world.own:
+            tracker.on_unit_created(unit)
+        # two mines per medivac, half of them still to be picked up
+        for i, medivac in enumerate(medivacs):
+            tracker.add_drop(
+                medivac.tag,
+                {m.tag for m in mines[2 * i : 2 * i + 2]},
+                world.bot.enemy_start_locations[0],
+            )
+        tracker.assign_role({m.tag for m in mines[1::2]}, UnitRole.DROP_UNITS_ATTACKING)
+        kwargs["drop_tracker"] = tracker
+
+    return prepare, lambda: mine_drops.execute(world.own, **kwargs)
+
+
+def _worker_defenders(world: FakeWorld) -> Call:
+    worker_defenders: WorkerDefenders = WorkerDefenders(
+        world.bot, world.bot.config, world.mediator
+    )
+    return world.bot.reset, partial(
+        worker_defenders.execute,
+        world.own,
+        ground_neighbour_table=world.ground_enemy_table,
+    )
+
+
+def _worker_scouts(world: FakeWorld) -> Call:
+    worker_scouts: WorkerScouts = WorkerScouts(
+        world.bot, world.bot.config, world.mediator
+    )
+
+    def prepare() -> None:
+        world.bot.reset()
+        worker_scouts._queued_worker_scout_commands = False
+
+    return prepare, partial(
+        worker_scouts.execute,
+        world.own,
+        points_to_check=world.bot.expansion_locations_list,
+        ground_neighbour_table=world.ground_enemy_table,
+    )
+
+
+def _grenade_paths(world: FakeWorld) -> list[list]:
+    target = world.bot.enemy_start_locations[0]
+    return [
+        world.mediator.find_raw_path(u.position, target, world.mediator.grid, 1)[:30]
+        for u in world.own
+    ]
+
+
+def _place_predictive_aoe(world: FakeWorld) -> Call:
+    enemy = world.bot.all_enemy_units[0]
+    behaviors: list[PlacePredictiveAoE] = [
+        PlacePredictiveAoE(
+            unit=unit,
+            path=path,
+            enemy_center_unit=enemy,
+            aoe_ability=AbilityId.KD8CHARGE_KD8CHARGE,
+            ability_delay=REAPER_GRENADE_DELAY,
+        )
+        for unit, path in zip(world.own, _grenade_paths(world))
+    ]
+
+    def run() -> None:
+        for behavior in behaviors:
+            behavior.execute(world.bot, world.bot.config, world.mediator)
+
+    return world.bot.reset, run
+
+
+def _batch_predict_aoe_targets(world: FakeWorld) -> Call:
+    enemy = world.bot.all_enemy_units[0]
+    requests: list[PredictiveAoERequest] = [
+        PredictiveAoERequest(
+            unit=unit,
+            path=path,
+            enemy_center_unit=enemy,
+            ability_delay=REAPER_GRENADE_DELAY,
+        )
+        for unit, path in zip(world.own, _grenade_paths(world))
+    ]
+    return world.bot.reset, partial(
+        batch_predict_aoe_targets, requests, world.bot.client.game_step
+    )
+
+
+def _combat_manager(world: FakeWorld) -> Call:
+    world.mediator.roles = {UnitRole.ATTACKING: world.own}
+    unit_snapshot: UnitSnapshotManager = UnitSnapshotManager(
+        world.bot, world.bot.config, world.mediator
+    )
+    run_sync(unit_snapshot.update(0))
+    unit_proximity: UnitProximityManager = UnitProximityManager(
+        world.bot, world.bot.config, world.mediator, unit_snapshot=unit_snapshot
+    )
+    combat_manager: CombatManager = CombatManager(
+        world.bot,
+        world.bot.config,
+        world.mediator,
+        unit_snapshot=unit_snapshot,
+        unit_proximity=unit_proximity,
+    )
+    # skip the rally logic of the opening
+    combat_manager.commenced_a_move = True
+
+    def prepare() -> None:
+        world.bot.reset()
+        # the first manager asking for neighbours each step pays for the table
+        run_sync(unit_proximity.update(0))
+
+    return prepare, lambda: run_sync(combat_manager.update(0))
+
+
+SCENARIOS: tuple[Scenario, ...] = (
+    Scenario("ReaperHarass.execute", (UnitID.REAPER,), _reaper_harass),
+    Scenario(
+        "MedivacMineDrops.execute",
+        (UnitID.MEDIVAC, UnitID.WIDOWMINE, UnitID.WIDOWMINE),
+        _medivac_mine_drops,
+    ),
+    Scenario("WorkerDefenders.execute", (UnitID.SCV,), _worker_defenders),
+    Scenario("WorkerScouts.execute", (UnitID.SCV,), _worker_scouts),
+    Scenario(
+        "PlacePredictiveAoE.execute",
+        (UnitID.REAPER,),
+        _place_predictive_aoe,
+        uses_enemies=False,
+    ),
+    Scenario(
+        "batch_predict_aoe_targets",
+        (UnitID.REAPER,),
+        _batch_predict_aoe_targets,
+        uses_enemies=False,
+    ),
+    Scenario(
+        "CombatManager.update",
+        (UnitID.MARINE,) * 6 + (UnitID.MARAUDER, UnitID.SIEGETANK, UnitID.MEDIVAC),
+        _combat_manager,
+    ),
+)
+
+
+def measure(prepare: Callable[[], Any], run: Callable[[], Any], repeats: int) -> dict:
+    """Time `run` and trace the memory it uses.
+
+    Parameters
+    ----------
+    prepare :
+        Called before every call to `run`, not timed.
+    run :
+        What to measure.
+    repeats :
+        Number of timed calls.
+
+    Returns
+    -------
+    dict :
+        Latency in microseconds and memory use of a single call.
+    """
+    # warm up caches and lazily built state
+    prepare()
+    run()
+
+    timings: np.ndarray = np.empty(repeats)
+    for i in range(repeats):
+        prepare()
+        start: int = perf_counter_ns()
+        run()
+        timings[i] = perf_counter_ns() - start
+
+    prepare()
+    tracemalloc.start()
+    before: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    start_bytes, _ = tracemalloc.get_traced_memory()
+    run()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    after: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # leave out the snapshots themselves
+    own_traces: list[tracemalloc.Filter] = [
+        tracemalloc.Filter(False, tracemalloc.__file__)
+    ]
+    allocations: int = sum(
+        stat.count_diff
+        for stat in after.filter_traces(own_traces).compare_to(
+            before.filter_traces(own_traces), "traceback"
+        )
+        if stat.count_diff > 0
+    )
+
+    return {
+        "median_us": float(np.median(timings)) / 1e3,
+        "p95_us": float(np.percentile(timings, 95)) / 1e3,
+        "peak_kib": (peak_bytes - start_bytes) / 1024,
+        "allocations": allocations,
+    }
+
+
+def scaling_exponent(counts: list[int], latencies: list[float]) -> Optional[float]:
+    """Slope of log(latency) against log(count), 1.0 being linear."""
+    points: list[tuple[int, float]] = [
+        (c, t) for c, t in zip(counts, latencies) if c >= MIN_FIT_COUNT and t > 0
+    ]
+    if len({c for c, _ in points}) < 2:
+        return None
+    x, y = np.log(np.array(points)).T
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def run_scenario(
+    scenario: Scenario, own_counts: list[int], enemy_counts: list[int], repeats: int
+) -> dict:
+    """Run `scenario` over every own and enemy count.
+
+    Returns
+    -------
+    dict :
+        Every measurement, and the scaling exponents against own and enemy
+        counts (taken at the largest count of the other).
+    """
+    if not scenario.uses_enemies:
+        enemy_counts = [1]
+    results: list[dict] = []
+    for num_enemy in enemy_counts:
+        for num_own in own_counts:
+            world: FakeWorld = FakeWorld(scenario.own_types, num_own, num_enemy)
+            prepare, run = scenario.build(world)
+            result: dict = {"own": num_own, "enemies": num_enemy}
+            result.update(measure(prepare, run, repeats))
+            result["commands"] = len(world.bot.actions)
+            result["behaviors"] = len(world.bot.behaviors)
+            results.append(result)
+
+    max_own, max_enemy = max(own_counts), max(enemy_counts)
+    at_max_enemy: list[dict] = [r for r in results if r["enemies"] == max_enemy]
+    at_max_own: list[dict] = [r for r in results if r["own"] == max_own]
+    return {
+        "results": results,
+        "own_exponent": scaling_exponent(
+            [r["own"] for r in at_max_enemy], [r["median_us"] for r in at_max_enemy]
+        ),
+        "enemy_exponent": scaling_exponent(
+            [r["enemies"] for r in at_max_own], [r["median_us"] for r in at_max_own]
+        )
+        if scenario.uses_enemies
+        else None,
+    }
+
+
+def print_report(name: str, report: dict) -> None:
+    def exponent(value: Optional[float]) -> str:
+        if value is None:
+            return "-"
+        return f"{value:.2f}{' SUPERLINEAR' if value > SUPERLINEAR_EXPONENT else ''}"
+
+    print(
+        f"\n{name}  own exponent {exponent(report['own_exponent'])}, "
+        f"enemy exponent {exponent(report['enemy_exponent'])}"
+    )
+    print(
+        f"{'own':>5} {'enemies':>7} {'median us':>10} {'p95 us':>10} "
+        f"{'peak KiB':>9} {'allocs':>8} {'commands':>8} {'behaviors':>9}"
+    )
+    for r in report["results"]:
+        print(
+            f"{r['own']:>5} {r['enemies']:>7} {r['median_us']:>10.1f} "
+            f"{r['p95_us']:>10.1f} {r['peak_kib']:>9.1f} {r['allocations']:>8} "
+            f"{r['commands']:>8} {r['behaviors']:>9}"
+        )
+
+
+def parse_counts(value: str) -> list[int]:
+    return sorted({int(v) for v in value.split(",")})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--own", type=parse_counts, default=list(OWN_COUNTS), help="Own unit counts"
+    )
+    parser.add_argument(
+        "--enemies",
+        type=parse_counts,
+        default=list(ENEMY_COUNTS),
+        help="Enemy unit counts",
+    )
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[s.name for s in SCENARIOS],
+        help="Only run these scenarios",
+    )
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    reports: dict[str, dict] = dict()
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        reports[scenario.name] = run_scenario(
+            scenario, args.own, args.enemies, args.repeats
+        )
+        print_report(scenario.name, reports[scenario.name])
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "repeats": args.repeats,
+                "scenarios": reports,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
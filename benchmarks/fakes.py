@@ -0,0 +1,503 @@
+"""Lightweight stand ins for python-sc2 units, the bot and the ares mediator.
+
+Only what the phobos combat classes, `CombatManager` and the behaviors they
+build read is implemented. Commands are stored on the bot instead of being
+sent anywhere, and behaviors passed to `register_behavior` are kept rather
+than executed, so benchmarks measure phobos code and not ares internals.
+"""
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Iterable, Optional, Union
+
+import numpy as np
+from ares.consts import UnitRole, UnitTreeQueryType
+from sc2.data import Race
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId as UnitID
+from sc2.position import Point2
+from sc2.units import Units
+
+from bot.managers.unit_proximity_manager import NeighbourTable
+from bot.managers.unit_snapshot_manager import UnitSnapshot
+
+MAP_SIZE: int = 200
+GAME_STEP: int = 2
+# where the armies are centred, and how spread out they are
+OWN_CENTRE: Point2 = Point2((90.0, 90.0))
+ENEMY_CENTRE: Point2 = Point2((100.0, 100.0))
+ARMY_SPREAD: float = 8.0
+PROXIMITY_DISTANCE: float = 15.0
+
+
+@dataclass(frozen=True)
+class UnitStats:
+    radius: float
+    health: float
+    ground_range: float
+    air_range: float
+    # movement speed per second, python-sc2's `real_speed`
+    speed: float
+    is_flying: bool = False
+    is_light: bool = False
+    is_structure: bool = False
+
+
+UNIT_STATS: dict[UnitID, UnitStats] = {
+    UnitID.SCV: UnitStats(0.375, 45, 0.1, 0.0, 3.94, is_light=True),
+    UnitID.MARINE: UnitStats(0.375, 45, 5.0, 5.0, 3.15, is_light=True),
+    UnitID.MARAUDER: UnitStats(0.5625, 125, 6.0, 0.0, 3.15),
+    UnitID.REAPER: UnitStats(0.375, 60, 5.0, 0.0, 5.25, is_light=True),
+    UnitID.SIEGETANK: UnitStats(0.875, 175, 7.0, 0.0, 3.15),
+    UnitID.WIDOWMINE: UnitStats(0.5, 90, 0.0, 0.0, 3.94, is_light=True),
+    UnitID.MEDIVAC: UnitStats(0.75, 150, 0.0, 0.0, 3.5, is_flying=True),
+    UnitID.DRONE: UnitStats(0.375, 40, 0.1, 0.0, 3.94, is_light=True),
+    UnitID.ZERGLING: UnitStats(0.375, 35, 0.1, 0.0, 4.13, is_light=True),
+    UnitID.ROACH: UnitStats(0.625, 145, 4.0, 0.0, 3.15),
+    UnitID.QUEEN: UnitStats(0.875, 175, 5.0, 7.0, 1.31),
+    UnitID.MUTALISK: UnitStats(0.5, 120, 3.0, 3.0, 5.6, is_flying=True, is_light=True),
+    UnitID.SPINECRAWLER: UnitStats(1.0, 300, 7.0, 0.0, 0.0, is_structure=True),
+    UnitID.HATCHERY: UnitStats(2.75, 1500, 0.0, 0.0, 0.0, is_structure=True),
+    UnitID.MINERALFIELD: UnitStats(1.125, 1, 0.0, 0.0, 0.0, is_structure=True),
+}
+# enemy population, cycled through
+ENEMY_TYPES: tuple[UnitID, ...] = (
+    UnitID.ZERGLING,
+    UnitID.ZERGLING,
+    UnitID.ROACH,
+    UnitID.DRONE,
+    UnitID.DRONE,
+    UnitID.QUEEN,
+    UnitID.MUTALISK,
+    UnitID.ROACH,
+    UnitID.ZERGLING,
+    UnitID.SPINECRAWLER,
+)
+UNIT_ABILITIES: dict[UnitID, frozenset[AbilityId]] = {
+    UnitID.REAPER: frozenset({AbilityId.KD8CHARGE_KD8CHARGE}),
+    UnitID.MEDIVAC: frozenset({AbilityId.EFFECT_MEDIVACIGNITEAFTERBURNERS}),
+    UnitID.WIDOWMINE: frozenset({AbilityId.WIDOWMINEATTACK_WIDOWMINEATTACK}),
+}
+
+
+class FakeUnit:
+    """The parts of `sc2.unit.Unit` phobos reads, with fixed values."""
+
+    def __init__(
+        self,
+        bot: "FakeBot",
+        tag: int,
+        type_id: UnitID,
+        position: Point2,
+        facing: float,
+        is_mine: bool,
+    ):
+        stats: UnitStats = UNIT_STATS[type_id]
+        self._bot: "FakeBot" = bot
+        self.tag: int = tag
+        self.type_id: UnitID = type_id
+        self.position: Point2 = position
+        self.position_tuple: tuple[float, float] = (position.x, position.y)
+        self.facing: float = facing
+        self.radius: float = stats.radius
+        self.health: float = stats.health
+        self.health_max: float = stats.health
+        self.health_percentage: float = 1.0
+        self.shield: float = 0.0
+        self.shield_max: float = 0.0
+        self.shield_percentage: float = 0.0
+        self.energy: float = 0.0
+        self.ground_range: float = stats.ground_range
+        self.air_range: float = stats.air_range
+        self.can_attack_ground: bool = stats.ground_range > 0.0
+        self.can_attack_air: bool = stats.air_range > 0.0
+        self.can_attack: bool = self.can_attack_ground or self.can_attack_air
+        self.weapon_cooldown: float = 0.0
+        self.is_mine: bool = is_mine
+        self.is_enemy: bool = not is_mine
+        self.is_memory: bool = False
+        self.is_snapshot: bool = False
+        self.is_visible: bool = True
+        self.is_structure: bool = stats.is_structure
+        self.is_flying: bool = stats.is_flying
+        self.is_light: bool = stats.is_light
+        self.is_armored: bool = not stats.is_light
+        self.is_burrowed: bool = False
+        self.is_moving: bool = False
+        self.is_attacking: bool = False
+        self.is_ready: bool = True
+        self.build_progress: float = 1.0
+        self.real_speed: float = stats.speed
+        self.movement_speed: float = stats.speed
+        self.distance_per_step: float = stats.speed / 22.4 * GAME_STEP
+        self.abilities: frozenset[AbilityId] = UNIT_ABILITIES.get(type_id, frozenset())
+        self.has_cargo: bool = False
+        self.cargo_used: int = 0
+        self.passengers_tags: set[int] = set()
+        self.orders: list = []
+        # some cython helpers read the proto directly
+        self._proto: SimpleNamespace = SimpleNamespace(
+            pos=SimpleNamespace(x=position.x, y=position.y),
+            facing=facing,
+            radius=self.radius,
+            health=self.health,
+            shield=self.shield,
+        )
+
+    def __repr__(self) -> str:
+        return f"FakeUnit({self.type_id.name}, tag={self.tag})"
+
+    def __hash__(self) -> int:
+        return self.tag
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, FakeUnit) and other.tag == self.tag
+
+    def distance_to(self, p: Union["FakeUnit", Point2]) -> float:
+        p = p.position if isinstance(p, FakeUnit) else p
+        return math.hypot(self.position.x - p[0], self.position.y - p[1])
+
+    def is_facing(self, other: "FakeUnit", angle_error: float = 0.05) -> bool:
+        angle: float = math.atan2(
+            other.position.y - self.position.y, other.position.x - self.position.x
+        )
+        if angle < 0:
+            angle += 2 * math.pi
+        difference: float = math.fabs(angle - self.facing)
+        return min(difference, 2 * math.pi - difference) < angle_error
+
+    def __call__(
+        self, ability: AbilityId, target: Any = None, queue: bool = False
+    ) -> bool:
+        self._bot.actions.append((ability, self.tag, target, queue))
+        return True
+
+    def move(self, target: Any, queue: bool = False) -> bool:
+        return self(AbilityId.MOVE_MOVE, target, queue)
+
+    def attack(self, target: Any, queue: bool = False) -> bool:
+        return self(AbilityId.ATTACK, target, queue)
+
+    def gather(self, target: Any, queue: bool = False) -> bool:
+        return self(AbilityId.HARVEST_GATHER, target, queue)
+
+    def stop(self, queue: bool = False) -> bool:
+        return self(AbilityId.STOP, None, queue)
+
+
+class FakeBot:
+    """The parts of `AresBot` phobos reads.
+
+    Parameters
+    ----------
+    own_types : Iterable[UnitID]
+        Types of our units, cycled through.
+    num_own : int
+        Number of our units.
+    num_enemy : int
+        Number of enemy units.
+    seed : int
+        Seed for unit positions, so runs are comparable.
+    """
+
+    def __init__(
+        self, own_types: Iterable[UnitID], num_own: int, num_enemy: int, seed: int = 0
+    ):
+        rng: np.random.Generator = np.random.default_rng(seed)
+        own_types = list(own_types)
+        self.config: dict = {"Debug": False}
+        self.actions: list[tuple] = []
+        self.behaviors: list = []
+        self.state: SimpleNamespace = SimpleNamespace(game_loop=10_752)
+        self.client: SimpleNamespace = SimpleNamespace(game_step=GAME_STEP)
+        self.enemy_race: Race = Race.Zerg
+        self.start_location: Point2 = Point2((30.0, 30.0))
+        self.enemy_start_locations: list[Point2] = [Point2((170.0, 170.0))]
+        self.expansion_locations_list: list[Point2] = [
+            Point2((30.0 + 20.0 * i, 30.0 + 20.0 * i)) for i in range(8)
+        ]
+        self.game_info: SimpleNamespace = SimpleNamespace(
+            map_center=Point2((MAP_SIZE / 2, MAP_SIZE / 2))
+        )
+        self.main_base_ramp: SimpleNamespace = SimpleNamespace(
+            top_center=Point2((40.0, 40.0)), bottom_center=Point2((44.0, 44.0))
+        )
+
+        self.own_units: Units = Units(
+            [
+                self._make_unit(
+                    1 + i, own_types[i % len(own_types)], OWN_CENTRE, rng, True
+                )
+                for i in range(num_own)
+            ],
+            self,
+        )
+        self.enemy_units_and_structures: Units = Units(
+            [
+                self._make_unit(
+                    100_000 + i,
+                    ENEMY_TYPES[i % len(ENEMY_TYPES)],
+                    ENEMY_CENTRE,
+                    rng,
+                    False,
+                )
+                for i in range(num_enemy)
+            ],
+            self,
+        )
+        self.mineral_field: Units = Units(
+            [
+                self._make_unit(
+                    200_000 + i,
+                    UnitID.MINERALFIELD,
+                    Point2((24.0, 30.0 + i)),
+                    rng,
+                    False,
+                )
+                for i in range(8)
+            ],
+            self,
+        )
+        self.unit_tag_dict: dict[int, FakeUnit] = {
+            u.tag: u for u in [*self.own_units, *self.enemy_units_and_structures]
+        }
+
+    @property
+    def all_own_units(self) -> Units:
+        return self.own_units
+
+    @property
+    def units(self) -> Units:
+        return self.own_units
+
+    @property
+    def all_enemy_units(self) -> Units:
+        return self.enemy_units_and_structures
+
+    @property
+    def enemy_units(self) -> Units:
+        return Units(
+            [u for u in self.enemy_units_and_structures if not u.is_structure], self
+        )
+
+    @property
+    def enemy_structures(self) -> Units:
+        return Units(
+            [u for u in self.enemy_units_and_structures if u.is_structure], self
+        )
+
+    @property
+    def time(self) -> float:
+        return self.state.game_loop / 22.4
+
+    @property
+    def time_formatted(self) -> str:
+        return f"{int(self.time // 60):02}:{int(self.time % 60):02}"
+
+    def register_behavior(self, behavior: Any) -> None:
+        self.behaviors.append(behavior)
+
+    def is_visible(self, pos: Any) -> bool:
+        return True
+
+    def in_pathing_grid(self, pos: Any) -> bool:
+        return True
+
+    def get_total_supply(self, units: Iterable[FakeUnit]) -> float:
+        return float(sum(2 if u.type_id == UnitID.ROACH else 1 for u in units))
+
+    def get_enemy_proxies(self, distance: float, from_position: Point2) -> list:
+        return [
+            s for s in self.enemy_structures if s.distance_to(from_position) < distance
+        ]
+
+    def reset(self) -> None:
+        """Forget the commands and behaviors issued so far."""
+        self.actions.clear()
+        self.behaviors.clear()
+
+    # used by `Units.closest_to` and friends
+    def _distance_units_to_pos(self, units: Units, pos: Point2) -> list[float]:
+        return [u.distance_to(pos) for u in units]
+
+    def _distance_squared_unit_to_unit(self, unit1: FakeUnit, unit2: FakeUnit) -> float:
+        return unit1.distance_to(unit2) ** 2
+
+    def _make_unit(
+        self,
+        tag: int,
+        type_id: UnitID,
+        centre: Point2,
+        rng: np.random.Generator,
+        is_mine: bool,
+    ) -> FakeUnit:
+        # plain floats, as python-sc2 gives, numpy scalars change what Point2 does
+        dx, dy = rng.normal(0.0, ARMY_SPREAD, 2).tolist()
+        position: Point2 = Point2((centre.x + dx, centre.y + dy))
+        # enemies roughly face our army, so some of them count as chasing
+        facing: float = (
+            rng.uniform(0.0, 2 * math.pi)
+            if is_mine
+            else math.atan2(OWN_CENTRE.y - position.y, OWN_CENTRE.x - position.x)
+            % (2 * math.pi)
+        )
+        return FakeUnit(self, tag, type_id, position, facing, is_mine)
+
+
+class FakeMediator:
+    """The `ManagerMediator` queries phobos makes, answered from a `FakeBot`.
+
+    Grids are plain open maps, paths are straight lines and every position is
+    safe, so path finding cost stays out of the measurements.
+
+    Parameters
+    ----------
+    bot : FakeBot
+        The units to answer queries about.
+    roles : dict[UnitRole, Units]
+        What `get_units_from_role` returns per role.
+    """
+
+    def __init__(self, bot: FakeBot, roles: Optional[dict[UnitRole, Units]] = None):
+        self.bot: FakeBot = bot
+        self.roles: dict[UnitRole, Units] = roles or dict()
+        self.grid: np.ndarray = np.ones((MAP_SIZE, MAP_SIZE), dtype=np.float32)
+        self.get_ground_grid: np.ndarray = self.grid
+        self.get_air_grid: np.ndarray = self.grid
+        self.get_climber_grid: np.ndarray = self.grid
+        self.get_cached_ground_grid: np.ndarray = self.grid
+        self.get_ground_avoidance_grid: np.ndarray = self.grid
+        self.get_own_nat: Point2 = Point2((50.0, 30.0))
+        self.get_enemy_nat: Point2 = Point2((150.0, 170.0))
+        self.get_main_ground_threats_near_townhall: Units = Units([], bot)
+        self.get_unit_to_ability_dict: defaultdict[int, dict] = defaultdict(
+            lambda: {AbilityId.WIDOWMINEATTACK_WIDOWMINEATTACK: 0}
+        )
+        self.role_assignments: int = 0
+
+    @property
+    def get_all_enemy(self) -> Units:
+        return self.bot.all_enemy_units
+
+    @property
+    def get_unit_role_dict(self) -> dict[UnitRole, set[int]]:
+        return {role: {u.tag for u in units} for role, units in self.roles.items()}
+
+    def get_units_from_role(
+        self, role: UnitRole, unit_type: Optional[UnitID] = None
+    ) -> Units:
+        units: Units = self.roles.get(role, Units([], self.bot))
+        return units(unit_type) if unit_type else units
+
+    def get_units_in_range(
+        self,
+        start_points: list,
+        distances: Union[float, list[float]],
+        query_tree: UnitTreeQueryType,
+        return_as_dict: bool = False,
+    ) -> Union[list[Units], dict[int, Units]]:
+        enemies: list[FakeUnit] = [
+            u
+            for u in self.bot.enemy_units_and_structures
+            if query_tree != UnitTreeQueryType.EnemyGround
+            or not (u.is_flying or u.is_structure)
+        ]
+        positions: np.ndarray = np.array(
+            [u.position for u in enemies], dtype=float
+        ).reshape(-1, 2)
+        if not isinstance(distances, list):
+            distances = [distances] * len(start_points)
+
+        found: list[Units] = []
+        for start, distance in zip(start_points, distances):
+            pos: Point2 = start.position if isinstance(start, FakeUnit) else start
+            in_range: np.ndarray = np.flatnonzero(
+                np.hypot(positions[:, 0] - pos[0], positions[:, 1] - pos[1]) <= distance
+            )
+            found.append(Units([enemies[i] for i in in_range], self.bot))
+        if return_as_dict:
+            return {s.tag: units for s, units in zip(start_points, found)}
+        return found
+
+    def find_raw_path(
+        self, start: Point2, target: Point2, grid: np.ndarray, sensitivity: int
+    ) -> list[Point2]:
+        distance: float = start.distance_to(target)
+        num_points: int = max(2, int(distance / max(sensitivity, 1)))
+        return [
+            Point2(
+                (
+                    start.x + (target.x - start.x) * i / (num_points - 1),
+                    start.y + (target.y - start.y) * i / (num_points - 1),
+                )
+            )
+            for i in range(num_points)
+        ]
+
+    def find_path_next_point(
+        self, start: Point2, target: Point2, grid: np.ndarray, **kwargs
+    ) -> Point2:
+        return start.towards(target, 4.0, limit=True)
+
+    def find_closest_safe_spot(
+        self, from_pos: Point2, grid: np.ndarray, radius: float = 15.0
+    ) -> Point2:
+        return from_pos
+
+    def is_position_safe(self, grid: np.ndarray, position: Point2, **kwargs) -> bool:
+        return True
+
+    def assign_role(self, tag: int, role: UnitRole, **kwargs) -> None:
+        self.role_assignments += 1
+
+    def batch_assign_role(self, tags: set[int], role: UnitRole, **kwargs) -> None:
+        self.role_assignments += len(tags)
+
+    def update_unit_to_ability_dict(self, ability: AbilityId, unit_tag: int) -> None:
+        pass
+
+
+class FakeWorld:
+    """A fake bot and mediator, plus the shared per step data built from them.
+
+    Parameters
+    ----------
+    own_types : Iterable[UnitID]
+        Types of our units, cycled through.
+    num_own : int
+        Number of our units.
+    num_enemy : int
+        Number of enemy units.
+    seed : int
+        Seed for unit positions.
+    """
+
+    def __init__(
+        self, own_types: Iterable[UnitID], num_own: int, num_enemy: int, seed: int = 0
+    ):
+        self.bot: FakeBot = FakeBot(own_types, num_own, num_enemy, seed)
+        self.mediator: FakeMediator = FakeMediator(self.bot)
+        self.snapshot: UnitSnapshot = UnitSnapshot(
+            self.bot, self.bot.all_own_units, self.bot.all_enemy_units
+        )
+        snapshot: UnitSnapshot = self.snapshot
+        own_rows: np.ndarray = np.flatnonzero(snapshot.is_own & ~snapshot.is_structure)
+        self.all_enemy_table: NeighbourTable = NeighbourTable(
+            snapshot, own_rows, np.flatnonzero(snapshot.is_enemy), PROXIMITY_DISTANCE
+        )
+        self.ground_enemy_table: NeighbourTable = NeighbourTable(
+            snapshot,
+            own_rows,
+            np.flatnonzero(
+                snapshot.is_enemy & ~snapshot.is_flying & ~snapshot.is_structure
+            ),
+            PROXIMITY_DISTANCE,
+        )
+
+    @property
+    def own(self) -> Units:
+        return self.bot.own_units
+
+    def own_of_type(self, type_id: UnitID) -> Units:
+        return Units([u for u in self.bot.own_units if u.type_id == type_id], self.bot)
@@ -0,0 +1,218 @@
+"""Fail when a phobos hot path got slower or hungrier than the stored baseline.
+
+Usage::
+
+    poetry run python -m benchmarks.regression_gate           # check
+    poetry run python -m benchmarks.regression_gate --update  # record baseline
+
+Every scenario of `benchmarks.combat_scaling` is measured at a few army sizes,
+over several rounds. Each round gives a median latency, and the ratio of the
+current rounds to the baseline rounds gets a bootstrapped confidence interval.
+A path only fails once the whole interval sits above `1 + threshold`, so a
+noisy run doesn't fail the gate but a consistent slowdown does.
+
+Latencies are stored relative to a fixed pure python workload timed right
+before them, which takes most of the difference between machines, and between
+a quiet and a busy machine, out of the comparison. Peak traced memory is
+deterministic enough to compare directly.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Optional
+
+import numpy as np
+
+from benchmarks.combat_scaling import SCENARIOS, Scenario, measure
+from benchmarks.fakes import FakeWorld
+
+BASELINE_FILE: Path = Path(__file__).parent / "baseline.json"
+# (own, enemies) each hot path is checked at
+GATE_SIZES: tuple[tuple[int, int], ...] = ((10, 30), (100, 100), (200, 300))
+ROUNDS: int = 7
+REPEATS: int = 9
+CONFIDENCE: float = 0.95
+BOOTSTRAP_SAMPLES: int = 2000
+# allowed slowdown / memory growth as a fraction of the baseline
+TIME_THRESHOLD: float = 0.15
+MEMORY_THRESHOLD: float = 0.2
+# peaks below this are too small to compare meaningfully
+MIN_PEAK_KIB: float = 4.0
+CALIBRATION_LOOPS: int = 20_000
+
+
+def calibrate() -> float:
+    """Time in microseconds of a fixed pure python workload."""
+    start: int = perf_counter_ns()
+    total: float = 0.0
+    values: dict[int, float] = dict()
+    for i in range(CALIBRATION_LOOPS):
+        values[i & 1023] = total
+        total += (i % 7) * 0.5
+    return (perf_counter_ns() - start) / 1e3
+
+
+def path_key(scenario: Scenario, own: int, enemies: int) -> str:
+    return f"{scenario.name}[{own}/{enemies}]"
+
+
+def measure_paths(rounds: int, repeats: int) -> dict[str, dict]:
+    """Measure every hot path `rounds` times.
+
+    Each round measures every path once, straight after timing the calibration
+    workload, so drift in machine speed over the run affects every path alike
+    and is divided out.
+
+    Returns
+    -------
+    dict[str, dict] :
+        Path key to the median latency of each round relative to the
+        calibration workload, and the peak memory.
+    """
+    calls: dict[str, tuple] = dict()
+    for scenario in SCENARIOS:
+        sizes: set[tuple[int, int]] = {
+            (own, enemies if scenario.uses_enemies else 1)
+            for own, enemies in GATE_SIZES
+        }
+        for own, enemies in sorted(sizes):
+            world: FakeWorld = FakeWorld(scenario.own_types, own, enemies)
+            calls[path_key(scenario, own, enemies)] = scenario.build(world)
+
+    relative: dict[str, list[float]] = {key: [] for key in calls}
+    peaks: dict[str, list[float]] = {key: [] for key in calls}
+    for _ in range(rounds):
+        for key, (prepare, run) in calls.items():
+            calibration_us: float = calibrate()
+            result: dict = measure(prepare, run, repeats)
+            relative[key].append(result["median_us"] / calibration_us)
+            peaks[key].append(result["peak_kib"])
+    return {
+        key: {"relative": relative[key], "peak_kib": float(np.median(peaks[key]))}
+        for key in calls
+    }
+
+
+def ratio_interval(
+    current: np.ndarray, baseline: np.ndarray, rng: np.random.Generator
+) -> tuple[float, float, float]:
+    """Ratio of the current to the baseline median, with a confidence interval.
+
+    Both sets of round medians are resampled with replacement, so the interval
+    reflects the noise of both runs.
+
+    Returns
+    -------
+    tuple[float, float, float] :
+        The ratio, and the lower and upper bound of its interval.
+    """
+    current_samples: np.ndarray = np.median(
+        rng.choice(current, (BOOTSTRAP_SAMPLES, current.size)), axis=1
+    )
+    baseline_samples: np.ndarray = np.median(
+        rng.choice(baseline, (BOOTSTRAP_SAMPLES, baseline.size)), axis=1
+    )
+    ratios: np.ndarray = current_samples / baseline_samples
+    tail: float = (1.0 - CONFIDENCE) / 2 * 100
+    low, high = np.percentile(ratios, [tail, 100 - tail])
+    return float(np.median(current) / np.median(baseline)), float(low), float(high)
+
+
+def compare(
+    current: dict, baseline: dict, time_threshold: float, memory_threshold: float
+) -> list[str]:
+    """Print how each path compares to the baseline.
+
+    Returns
+    -------
+    list[str] :
+        Description of every regression found.
+    """
+    rng: np.random.Generator = np.random.default_rng(0)
+    regressions: list[str] = []
+    print(f"Latency relative to the baseline, {CONFIDENCE:.0%} intervals")
+    print(f"{'path':<48} {'time':>7} {'interval':>15} {'peak KiB':>17}")
+    for key, result in current["paths"].items():
+        if key not in baseline["paths"]:
+            print(f"{key:<48} not in baseline")
+            continue
+        base: dict = baseline["paths"][key]
+        ratio, low, high = ratio_interval(
+            np.array(result["relative"]), np.array(base["relative"]), rng
+        )
+        status: str = ""
+        if low > 1.0 + time_threshold:
+            status = " SLOWER"
+            regressions.append(f"{key} is {ratio - 1:.0%} slower")
+        if base["peak_kib"] >= MIN_PEAK_KIB and result["peak_kib"] > base[
+            "peak_kib"
+        ] * (1.0 + memory_threshold):
+            status += " MEMORY"
+            regressions.append(
+                f"{key} peak memory {base['peak_kib']:.1f} -> "
+                f"{result['peak_kib']:.1f} KiB"
+            )
+        print(
+            f"{key:<48} {ratio:>6.2f}x [{low:>5.2f}, {high:>5.2f}] "
+            f"{base['peak_kib']:>7.1f} -> {result['peak_kib']:>7.1f}{status}"
+        )
+    return regressions
+
+
+def load_baseline(path: Path) -> Optional[dict]:
+    if not path.is_file():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--update", action="store_true", help="Store the timings as the baseline"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--time-threshold", type=float, default=TIME_THRESHOLD)
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD)
+    args = parser.parse_args()
+
+    baseline: Optional[dict] = load_baseline(args.baseline)
+    if baseline is None and not args.update:
+        print(
+            f"No baseline at {args.baseline}, record one with "
+            f"`python -m benchmarks.regression_gate --update`"
+        )
+        return 1
+
+    current: dict = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "rounds": args.rounds,
+        "repeats": args.repeats,
+        "paths": measure_paths(args.rounds, args.repeats),
+    }
+    if args.update:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline of {len(current['paths'])} paths written to {args.baseline}")
+        return 0
+
+    regressions: list[str] = compare(
+        current, baseline, args.time_threshold, args.memory_threshold
+    )
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
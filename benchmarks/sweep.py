@@ -0,0 +1,279 @@
+"""Run scenarios under every combination of tuning values, across all cores.
+
+Usage::
+
+    poetry run python -m benchmarks.sweep data/recordings/*.rec WorkerDefenders.execute \\
+        --set ReaperHarassManager.RETREAT_THRESHOLD=0.3,0.45,0.6 \\
+        --set WorkerDefenceManager.WORKERS_REQUIRED_PER_ENEMY.ZERGLING=1,2,3
+
+A scenario is either a recording, replayed through the phobos managers by
+`ReplayHarness`, or the name of a `benchmarks.combat_scaling` scenario run on a
+synthetic army. `--set` takes a tunable class constant, `Class.CONSTANT` or
+`Class.CONSTANT.KEY` for an entry of a dictionary constant, and the values to
+try. Each job (scenario and set of values) runs in a fresh worker process, so
+overridden constants never leak into another job, and its metrics are written
+as a json line as soon as it finishes.
+
+Replayed mediator lookups give the answers of the recorded game, see
+`bot.replay.harness`, so tunables that change which units the managers ask
+about show up as mediator misses rather than different outcomes.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+from ares.managers.manager import Manager
+from sc2.ids.ability_id import AbilityId
+
+from benchmarks.combat_scaling import SCENARIOS, Scenario, measure
+from benchmarks.fakes import FakeWorld
+from bot.combat.base_unit import BaseUnit
+from bot.replay.harness import ReplayHarness, load_config
+
+ROOT: Path = Path(__file__).parent.parent
+OUTPUT_DIR: Path = ROOT / "data" / "sweeps"
+RECORDING_SUFFIX: str = ".rec"
+SYNTHETIC_OWN: int = 50
+SYNTHETIC_ENEMIES: int = 100
+SYNTHETIC_REPEATS: int = 15
+# abilities issued most often, as an outcome proxy per job
+TOP_ABILITIES: int = 10
+
+
+@dataclass(frozen=True)
+class SweepJob:
+    """One scenario under one set of tuning values.
+
+    Attributes
+    ----------
+    scenario : str
+        Path of a recording, or name of a `benchmarks.combat_scaling` scenario.
+    overrides : dict[str, Any]
+        `Class.CONSTANT` or `Class.CONSTANT.KEY` to the value to use.
+    own : int
+        Own units in a synthetic scenario.
+    enemies : int
+        Enemy units in a synthetic scenario.
+    max_frames : int | None
+        Frames to replay of a recording, all of them if None.
+    """
+
+    scenario: str
+    overrides: dict[str, Any] = field(default_factory=dict)
+    own: int = SYNTHETIC_OWN
+    enemies: int = SYNTHETIC_ENEMIES
+    max_frames: int | None = None
+
+
+def tunable_classes() -> dict[str, type]:
+    """Manager and combat classes whose constants can be overridden, by name.
+
+    Every phobos manager and combat class is imported by the replay harness.
+    """
+    return {
+        cls.__name__: cls
+        for base in (Manager, BaseUnit)
+        for cls in base.__subclasses__()
+    }
+
+
+def apply_overrides(overrides: dict[str, Any]) -> None:
+    """Set the overridden class constants, for the rest of this process.
+
+    Raises
+    ------
+    ValueError :
+        If an override doesn't name an existing constant.
+    """
+    classes: dict[str, type] = tunable_classes()
+    for name, value in overrides.items():
+        class_name, constant, *key = name.split(".", 2)
+        cls: type | None = classes.get(class_name)
+        if cls is None or not hasattr(cls, constant):
+            raise ValueError(f"No tunable constant {class_name}.{constant}")
+        if not key:
+            setattr(cls, constant, value)
+            continue
+        # entries of dictionaries keyed by enum are named by the enum member
+        current: dict = dict(getattr(cls, constant))
+        matches: list = [
+            k for k in current if (k.name if isinstance(k, Enum) else str(k)) == key[0]
+        ]
+        if not matches:
+            raise ValueError(f"{class_name}.{constant} has no entry {key[0]}")
+        current[matches[0]] = value
+        setattr(cls, constant, current)
+
+
+def ability_name(ability_id: int) -> str:
+    try:
+        return AbilityId(ability_id).name
+    except ValueError:
+        return str(ability_id)
+
+
+def run_recording(job: SweepJob) -> dict[str, Any]:
+    harness: ReplayHarness = ReplayHarness(Path(job.scenario), load_config())
+    asyncio.run(harness.run(job.max_frames))
+    issued: list[list] = [c for frame in harness.commands for c in frame]
+    return {
+        "frames": len(harness.commands),
+        "step_ms": harness.profiler.histograms["Replay/step"].summary(),
+        "managers_ms": {
+            name: histogram.summary()["mean_ms"]
+            for name, histogram in sorted(harness.profiler.histograms.items())
+            if name.startswith("Manager/")
+        },
+        "commands": len(issued),
+        "matched_commands": harness.matched_commands,
+        "recorded_commands": harness.recorded_commands,
+        "abilities": {
+            ability_name(ability): count
+            for ability, count in Counter(c[0] for c in issued).most_common(
+                TOP_ABILITIES
+            )
+        },
+        "mediator_misses": sum(harness.mediator.misses.values()),
+    }
+
+
+def run_synthetic(job: SweepJob) -> dict[str, Any]:
+    scenarios: dict[str, Scenario] = {s.name: s for s in SCENARIOS}
+    if job.scenario not in scenarios:
+        raise ValueError(f"Unknown scenario {job.scenario}")
+    scenario: Scenario = scenarios[job.scenario]
+    world: FakeWorld = FakeWorld(scenario.own_types, job.own, job.enemies)
+    prepare, run = scenario.build(world)
+    result: dict[str, Any] = measure(prepare, run, SYNTHETIC_REPEATS)
+    result.update(
+        {
+            "commands": len(world.bot.actions),
+            "abilities": {
+                ability.name: count
+                for ability, count in Counter(
+                    a[0] for a in world.bot.actions
+                ).most_common(TOP_ABILITIES)
+            },
+            "behaviors": len(world.bot.behaviors),
+            "role_assignments": world.mediator.role_assignments,
+        }
+    )
+    return result
+
+
+def run_job(job: SweepJob) -> dict[str, Any]:
+    """Run one job, in a worker process of its own."""
+    start: float = perf_counter()
+    apply_overrides(job.overrides)
+    if job.scenario.endswith(RECORDING_SUFFIX):
+        metrics: dict[str, Any] = run_recording(job)
+    else:
+        metrics = run_synthetic(job)
+    return {
+        **asdict(job),
+        "metrics": metrics,
+        "wall_s": perf_counter() - start,
+    }
+
+
+def parse_value(value: str) -> Any:
+    """Numbers and booleans as such, anything else as a string."""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def parse_setting(setting: str) -> tuple[str, list[Any]]:
+    name, _, values = setting.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"Expected Class.CONSTANT=v1,v2 not {setting}")
+    return name, [parse_value(v) for v in values.split(",")]
+
+
+def build_jobs(
+    scenarios: list[str], settings: list[tuple[str, list[Any]]], **kwargs
+) -> list[SweepJob]:
+    """Every scenario under every combination of the values in `settings`."""
+    names: list[str] = [name for name, _ in settings]
+    return [
+        SweepJob(scenario, dict(zip(names, values)), **kwargs)
+        for scenario in scenarios
+        for values in itertools.product(*(values for _, values in settings))
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="+", help="Recordings or scenario names")
+    parser.add_argument(
+        "--set",
+        dest="settings",
+        type=parse_setting,
+        action="append",
+        default=[],
+        help="Class.CONSTANT=v1,v2,... to sweep over",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--frames", type=int, default=None, help="Frames to replay")
+    parser.add_argument("--own", type=int, default=SYNTHETIC_OWN)
+    parser.add_argument("--enemies", type=int, default=SYNTHETIC_ENEMIES)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=OUTPUT_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+    )
+    args = parser.parse_args()
+
+    # fail on a bad override here, rather than once per worker
+    for name, values in args.settings:
+        apply_overrides({name: values[0]})
+
+    jobs: list[SweepJob] = build_jobs(
+        args.scenarios,
+        args.settings,
+        own=args.own,
+        enemies=args.enemies,
+        max_frames=args.frames,
+    )
+    print(f"{len(jobs)} jobs on {args.workers} workers")
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    start: float = perf_counter()
+    failed: int = 0
+    # one job per process: overrides and profiler instrumentation patch classes
+    with ProcessPoolExecutor(args.workers, max_tasks_per_child=1) as pool, open(
+        args.output, "w"
+    ) as f:
+        futures: dict[Future, SweepJob] = {pool.submit(run_job, j): j for j in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            job: SweepJob = futures[future]
+            try:
+                result: dict[str, Any] = future.result()
+            except Exception as e:
+                failed += 1
+                result = {**asdict(job), "error": repr(e)}
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            print(
+                f"[{done}/{len(jobs)}] {Path(job.scenario).name} {job.overrides} "
+                f"{'failed: ' + result['error'] if 'error' in result else 'done'}"
+            )
+
+    print(
+        f"{len(jobs) - failed} of {len(jobs)} jobs finished in "
+        f"{perf_counter() - start:.1f}s, results in {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
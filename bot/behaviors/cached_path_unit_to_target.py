@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+from ares.behaviors.combat import CombatBehavior
+from ares.cython_extensions.geometry import cy_distance_to
+from ares.managers.manager_mediator import ManagerMediator
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bot.consts import GridKind
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+    from bot.managers.path_cache_manager import PathCacheManager
+
+
+@dataclass
+class CachedPathUnitToTarget(CombatBehavior):
+    """Path a unit to a target, reusing paths from `PathCacheManager`.
+
+    Like `PathUnitToTarget`, but the path is only recalculated when the
+    grid changes along the remaining route, instead of every step.
+
+    Attributes
+    ----------
+    unit: Unit
+        The unit to path.
+    grid: np.ndarray
+        Pathing grid to use.
+    grid_kind: GridKind
+        Which grid `grid` is.
+    target: Point2
+        Where the unit should end up.
+    path_cache: PathCacheManager
+        Cache to find paths through.
+    success_at_distance: float
+        Stop pathing when the unit is this close to the target.
+    sensitivity: int
+        Take every nth point of the path.
+    """
+
+    unit: Unit
+    grid: np.ndarray
+    grid_kind: GridKind
+    target: Point2
+    path_cache: "PathCacheManager"
+    success_at_distance: float = 0.0
+    sensitivity: int = 5
+
+    def execute(
+        self, ai: "AresBot", config: dict, mediator: ManagerMediator, **kwargs
+    ) -> bool:
+        """Move the unit to the next point on its path.
+
+        Parameters
+        ----------
+        ai : AresBot
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        **kwargs :
+            None
+
+        Returns
+        -------
+        bool :
+            CombatBehavior carried out an action.
+        """
+        unit_pos: Point2 = self.unit.position
+        if cy_distance_to(unit_pos, self.target) < self.success_at_distance:
+            return False
+
+        move_to: Point2 = self.path_cache.find_path_next_point(
+            start=unit_pos,
+            target=self.target,
+            grid=self.grid,
+            grid_kind=self.grid_kind,
+            sensitivity=self.sensitivity,
+        )
+        self.unit.move(move_to)
+        return True
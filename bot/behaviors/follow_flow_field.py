@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from ares.behaviors.combat import CombatBehavior
+from ares.cython_extensions.geometry import cy_distance_to
+from ares.managers.manager_mediator import ManagerMediator
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bot.consts import GridKind
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+    from bot.managers.flow_field_manager import FlowFieldManager
+
+
+@dataclass
+class FollowFlowField(CombatBehavior):
+    """Move a unit along the shared flow field towards a target.
+
+    Attributes
+    ----------
+    unit: Unit
+        The unit to move.
+    grid: np.ndarray
+        Pathing grid to use.
+    grid_kind: GridKind
+        Which grid `grid` is.
+    target: Point2
+        Where the unit should end up.
+    flow_field: FlowFieldManager
+        Manager holding the shared flow fields.
+    success_at_distance: float
+        Stop moving when the unit is this close to the target.
+    lookahead: int
+        How many cells along the field the unit should move towards.
+    """
+
+    unit: Unit
+    grid: np.ndarray
+    grid_kind: GridKind
+    target: Point2
+    flow_field: "FlowFieldManager"
+    success_at_distance: float = 0.0
+    lookahead: int = 4
+
+    def execute(
+        self, ai: "AresBot", config: dict, mediator: ManagerMediator, **kwargs
+    ) -> bool:
+        """Move the unit to its next waypoint on the flow field.
+
+        Parameters
+        ----------
+        ai : AresBot
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        **kwargs :
+            None
+
+        Returns
+        -------
+        bool :
+            CombatBehavior carried out an action.
+        """
+        unit_pos: Point2 = self.unit.position
+        if cy_distance_to(unit_pos, self.target) < self.success_at_distance:
+            return False
+
+        waypoint: Optional[Point2] = self.flow_field.get_next_waypoint(
+            position=unit_pos,
+            destination=self.target,
+            grid=self.grid,
+            grid_kind=self.grid_kind,
+            lookahead=self.lookahead,
+        )
+        # unit is on a blocked cell or can't reach the target, head straight there
+        self.unit.move(waypoint or self.target)
+        return True
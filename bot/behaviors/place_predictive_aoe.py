@@ -1,7 +1,8 @@
 import math
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
+import numpy as np
 from ares.behaviors.combat import CombatBehavior
 from ares.managers.manager_mediator import ManagerMediator
 from sc2.ids.ability_id import AbilityId
@@ -11,13 +12,319 @@ from sc2.unit import Unit
 if TYPE_CHECKING:
     from ares import AresBot
 
+# matches the iteration cap of the original pure python simulation
+MAX_SIMULATION_STEPS: int = 100
+
+
+def resample_path(
+    path: np.ndarray, distance_per_step: float, max_steps: int
+) -> np.ndarray:
+    """Find where a unit will be at each game step while following `path`.
+
+    The path is treated as a polyline and sampled every `distance_per_step`
+    along its arc length in one vectorized pass, so several path points can be
+    crossed within a single game step.
+
+    Parameters
+    ----------
+    path : np.ndarray
+        (n, 2) array of path points, the first point being the unit position.
+    distance_per_step : float
+        How far the unit moves each game step.
+    max_steps : int
+        Maximum number of game steps to sample.
+
+    Returns
+    -------
+    np.ndarray :
+        (m, 2) array of positions, one per game step, starting at `path[0]`.
+        The last entry is the end of the path if it's reached within `max_steps`.
+    """
+    if path.shape[0] < 2 or distance_per_step <= 0.0:
+        return path[:1]
+
+    segments: np.ndarray = np.diff(path, axis=0)
+    arc_length: np.ndarray = np.concatenate(
+        ([0.0], np.cumsum(np.hypot(segments[:, 0], segments[:, 1])))
+    )
+    total_length: float = arc_length[-1]
+    num_steps: int = min(max_steps, math.ceil(total_length / distance_per_step))
+    distances: np.ndarray = np.minimum(
+        np.arange(num_steps + 1) * distance_per_step, total_length
+    )
+    return np.column_stack(
+        (
+            np.interp(distances, arc_length, path[:, 0]),
+            np.interp(distances, arc_length, path[:, 1]),
+        )
+    )
+
+
+def chase_position(
+    target_path: np.ndarray,
+    start_position: Tuple[float, float],
+    unit_speed: float,
+    num_steps: int,
+) -> Tuple[float, float]:
+    """Find where a unit chasing `target_path` will be after `num_steps` steps.
+
+    The chaser moves straight at the target's position for the current step. Only
+    the requested step is simulated, each step being a closed form move along the
+    current segment, rather than the full chase.
+
+    Parameters
+    ----------
+    target_path : np.ndarray
+        (m, 2) array of where the target will be at each game step.
+    start_position : Tuple[float, float]
+        Where the chasing unit is starting from.
+    unit_speed : float
+        How far the chasing unit moves each game step.
+    num_steps : int
+        Game step to return the chaser position for.
+
+    Returns
+    -------
+    Tuple[float, float] :
+        Chaser position after `num_steps` steps, or where it caught the target.
+    """
+    x, y = start_position
+    last_idx: int = target_path.shape[0] - 1
+    # plain floats are faster than numpy scalars for this short sequential walk
+    targets: list = target_path.tolist()
+    for step in range(num_steps):
+        target_x, target_y = targets[min(step, last_idx)]
+        dx: float = target_x - x
+        dy: float = target_y - y
+        distance: float = math.hypot(dx, dy)
+        if distance < unit_speed:
+            # caught the target, the chaser stops here
+            return target_x, target_y
+        if distance > 0.0:
+            x += dx / distance * unit_speed
+            y += dy / distance * unit_speed
+    return x, y
+
+
+def predict_aoe_target(
+    path: List[Point2],
+    unit_speed: float,
+    enemy_position: Point2,
+    enemy_speed: float,
+    delayed_idx: int,
+) -> Point2:
+    """Predict where an enemy chasing our unit will be once the AoE goes off.
+
+    Parameters
+    ----------
+    path : List[Point2]
+        How our unit is getting to its target position.
+    unit_speed : float
+        How far our unit moves each game step.
+    enemy_position : Point2
+        Where the chasing enemy currently is.
+    enemy_speed : float
+        How far the enemy moves each game step.
+    delayed_idx : int
+        Amount of game steps until the ability goes off.
+
+    Returns
+    -------
+    Point2 :
+        Where we want to place the AoE.
+    """
+    num_steps: int = min(delayed_idx, MAX_SIMULATION_STEPS)
+    # the chaser only ever targets positions up to the current step
+    own_unit_path: np.ndarray = resample_path(
+        np.asarray(path, dtype=float), unit_speed, num_steps
+    )
+    return Point2(chase_position(own_unit_path, enemy_position, enemy_speed, num_steps))
+
+
+@dataclass
+class PredictiveAoERequest:
+    """Everything needed to predict one caster's AoE position.
+
+    Attributes
+    ----------
+    unit: Unit
+        The unit to fire the AoE.
+    path : List[Point2]
+        How we're getting to the target position (the last point in the list)
+    enemy_center_unit: Unit
+        Enemy unit to calculate positions based on.
+    ability_delay: int
+        Amount of frames between using the ability and the ability occurring.
+    """
+
+    unit: Unit
+    path: List[Point2]
+    enemy_center_unit: Unit
+    ability_delay: int
+
+
+def resample_paths(
+    paths: np.ndarray, distances_per_step: np.ndarray, max_steps: int
+) -> np.ndarray:
+    """Batched version of `resample_path`.
+
+    Parameters
+    ----------
+    paths : np.ndarray
+        (n, p, 2) array of paths, shorter paths padded with their last point.
+    distances_per_step : np.ndarray
+        (n,) array of how far each unit moves each game step.
+    max_steps : int
+        Number of game steps to sample.
+
+    Returns
+    -------
+    np.ndarray :
+        (n, max_steps + 1, 2) array of positions. Units that reached the end of
+        their path stay on the last point.
+    """
+    num_paths, num_points, _ = paths.shape
+    segments: np.ndarray = np.diff(paths, axis=1)
+    segment_lengths: np.ndarray = np.hypot(segments[..., 0], segments[..., 1])
+    arc_length: np.ndarray = np.concatenate(
+        (np.zeros((num_paths, 1)), np.cumsum(segment_lengths, axis=1)), axis=1
+    )
+    distances: np.ndarray = np.minimum(
+        np.arange(max_steps + 1)[None, :]
+        * np.maximum(distances_per_step, 0.0)[:, None],
+        arc_length[:, -1:],
+    )
+    # segment each sample falls on, padding segments have zero length
+    segment_idx: np.ndarray = np.clip(
+        (arc_length[:, None, :] <= distances[:, :, None]).sum(axis=2) - 1,
+        0,
+        num_points - 2,
+    )
+    segment_start: np.ndarray = np.take_along_axis(arc_length, segment_idx, axis=1)
+    segment_length: np.ndarray = np.take_along_axis(
+        segment_lengths, segment_idx, axis=1
+    )
+    fraction: np.ndarray = np.divide(
+        distances - segment_start,
+        segment_length,
+        out=np.zeros_like(distances),
+        where=segment_length > 0.0,
+    )
+    rows: np.ndarray = np.arange(num_paths)[:, None]
+    return (
+        paths[rows, segment_idx]
+        + np.clip(fraction, 0.0, 1.0)[..., None] * segments[rows, segment_idx]
+    )
+
+
+def chase_positions(
+    target_paths: np.ndarray,
+    start_positions: np.ndarray,
+    unit_speeds: np.ndarray,
+    num_steps: np.ndarray,
+) -> np.ndarray:
+    """Batched version of `chase_position`.
+
+    Parameters
+    ----------
+    target_paths : np.ndarray
+        (n, m, 2) array of where each target will be at each game step.
+    start_positions : np.ndarray
+        (n, 2) array of where each chasing unit is starting from.
+    unit_speeds : np.ndarray
+        (n,) array of how far each chasing unit moves each game step.
+    num_steps : np.ndarray
+        (n,) array of the game step to return each chaser position for.
+
+    Returns
+    -------
+    np.ndarray :
+        (n, 2) array of chaser positions.
+    """
+    positions: np.ndarray = start_positions.astype(float)
+    active: np.ndarray = num_steps > 0
+    last_idx: int = target_paths.shape[1] - 1
+    for step in range(int(num_steps.max(initial=0))):
+        offsets: np.ndarray = target_paths[:, min(step, last_idx)] - positions
+        distances: np.ndarray = np.hypot(offsets[:, 0], offsets[:, 1])
+        # a chaser closer than its speed lands on the target and stops there
+        move_distances: np.ndarray = np.where(
+            active, np.minimum(unit_speeds, distances), 0.0
+        )
+        positions += (
+            offsets
+            * np.divide(
+                move_distances,
+                distances,
+                out=np.zeros_like(distances),
+                where=distances > 0.0,
+            )[:, None]
+        )
+        active &= (distances >= unit_speeds) & (step + 1 < num_steps)
+        if not active.any():
+            break
+    return positions
+
+
+def batch_predict_aoe_targets(
+    requests: List[PredictiveAoERequest], game_step: int
+) -> Dict[int, Point2]:
+    """Predict AoE positions for every caster this frame in one pass.
+
+    Paths are padded into a single array so the path sampling and the chase
+    simulation cost a handful of array operations regardless of the number
+    of casters.
+
+    Parameters
+    ----------
+    requests : List[PredictiveAoERequest]
+        One request per caster.
+    game_step : int
+        Amount of frames per game step.
+
+    Returns
+    -------
+    Dict[int, Point2] :
+        Caster tag to where it should place the AoE.
+    """
+    requests = [r for r in requests if r.path]
+    if not requests:
+        return {}
+
+    num_points: int = max(2, max(len(r.path) for r in requests))
+    # pad shorter paths with their last point, then convert everything at once
+    paths: np.ndarray = np.array(
+        [r.path + [r.path[-1]] * (num_points - len(r.path)) for r in requests],
+        dtype=float,
+    )
+
+    num_steps: np.ndarray = np.minimum(
+        np.ceil(np.array([r.ability_delay for r in requests]) / game_step).astype(int),
+        MAX_SIMULATION_STEPS,
+    )
+    own_unit_paths: np.ndarray = resample_paths(
+        paths,
+        np.array([r.unit.distance_per_step for r in requests]),
+        int(num_steps.max()),
+    )
+    targets: np.ndarray = chase_positions(
+        own_unit_paths,
+        np.array([r.enemy_center_unit.position for r in requests]),
+        np.array([r.enemy_center_unit.distance_per_step for r in requests]),
+        num_steps,
+    )
+    return {
+        request.unit.tag: Point2(target)
+        for request, target in zip(requests, targets.tolist())
+    }
+
 
 @dataclass
 class PlacePredictiveAoE(CombatBehavior):
     """Predict an enemy position and fire AoE accordingly.
 
-    TODO: Guess where the enemy is going based on how it's been moving.
-        Cythonize this.
+    Assumes the enemy is chasing our unit, for enemies that aren't see
+    `EnemyMotionManager.get_expected_position`.
 
     Attributes
     ----------
@@ -31,6 +338,14 @@ class PlacePredictiveAoE(CombatBehavior):
         AoE ability to use.
     ability_delay: int
         Amount of frames between using the ability and the ability occurring.
+    use_numpy: bool
+        Use the vectorized trajectory engine, set to False to run the original
+        step by step simulation. Both agree when every path segment is at least
+        one step long (eg: A* paths). On shorter segments the original runs
+        past the next path point, as it can only cross one point per step,
+        while `resample_path` stays on the path.
+    target_position: Optional[Point2]
+        Precalculated AoE position, see `batch_predict_aoe_targets`.
     """
 
     unit: Unit
@@ -38,6 +353,8 @@ class PlacePredictiveAoE(CombatBehavior):
     enemy_center_unit: Unit
     aoe_ability: AbilityId
     ability_delay: int
+    use_numpy: bool = True
+    target_position: Optional[Point2] = None
 
     def execute(
         self, ai: "AresBot", config: dict, mediator: ManagerMediator, **kwargs
@@ -77,6 +394,22 @@ class PlacePredictiveAoE(CombatBehavior):
             Where we want to place the AoE.
 
         """
+        if self.target_position:
+            return self.target_position
+
+        # pick the spot along the predicted path that the enemy will have reached when
+        # the ability goes off
+        delayed_idx = math.ceil(self.ability_delay / ai.client.game_step)
+
+        if self.use_numpy:
+            return predict_aoe_target(
+                self.path,
+                self.unit.distance_per_step,
+                self.enemy_center_unit.position,
+                self.enemy_center_unit.distance_per_step,
+                delayed_idx,
+            )
+
         # figure out where our unit is going to be during the chase
         own_unit_path = self._get_unit_real_path(self.path, self.unit.distance_per_step)
 
@@ -87,10 +420,6 @@ class PlacePredictiveAoE(CombatBehavior):
             self.enemy_center_unit.distance_per_step,
         )
 
-        # pick the spot along the predicted path that the enemy will have reached when
-        # the ability goes off
-        delayed_idx = math.ceil(self.ability_delay / ai.client.game_step)
-
         return chasing_path[min(delayed_idx, len(chasing_path) - 1)]
 
     @staticmethod
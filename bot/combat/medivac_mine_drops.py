@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
 import numpy as np
 from ares import ManagerMediator
@@ -17,11 +17,21 @@ from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bot.behaviors.cached_path_unit_to_target import CachedPathUnitToTarget
 from bot.combat.base_unit import BaseUnit
+from bot.consts import GridKind
+from bot.managers.planning_manager import PlanResult
 
 if TYPE_CHECKING:
     from ares import AresBot
 
+    from bot.drop_tracker import DropTracker, MineDrop
+    from bot.managers.dead_space_manager import DeadSpaceManager
+    from bot.managers.path_cache_manager import PathCacheManager
+    from bot.managers.planning_manager import PlanningManager
+    from bot.managers.unit_snapshot_manager import UnitSnapshot
+    from bot.managers.worker_cluster_manager import WorkerClusterManager
+
 # when mines have 3 seconds of weapon cooldown left, medivac can drop off
 THREE_SECONDS: int = int(22.4 * 3)
 
@@ -40,11 +50,25 @@ class MedivacMineDrops(BaseUnit):
         Dictionary with the data from the configuration file
     mediator : ManagerMediator
         Used for getting information from managers in Ares.
+    path_cache : Optional[PathCacheManager]
+        If provided, medivac paths are reused across steps.
+    planner : Optional[PlanningManager]
+        If provided, safe spot searches run off the main step.
+    worker_clusters : Optional[WorkerClusterManager]
+        If provided, finds where mines hit the most workers, otherwise
+        medivacs go for the centre of nearby workers.
+    dead_space : Optional[DeadSpaceManager]
+        If provided, medivacs waiting to drop hover in dead space near the
+        target.
     """
 
     ai: "AresBot"
     config: dict
     mediator: ManagerMediator
+    path_cache: Optional["PathCacheManager"] = None
+    planner: Optional["PlanningManager"] = None
+    worker_clusters: Optional["WorkerClusterManager"] = None
+    dead_space: Optional["DeadSpaceManager"] = None
 
     def execute(self, units: Units, **kwargs) -> None:
         """Execute the mine drop.
@@ -58,49 +82,114 @@ class MedivacMineDrops(BaseUnit):
 
         Keyword Arguments
         -----------------
-        medivac_tag_to_mine_tracker : dict[int, dict]
-            Tracker detailing medivac tag to mine tags.
-            And target for the mine drop.
+        drop_tracker : DropTracker
+            The drops, their targets and the roles of their units.
+        unit_snapshot : UnitSnapshot
+            Columnar snapshot of all units for this step.
 
         """
         assert (
-            "medivac_tag_to_mine_tracker" in kwargs
-        ), "No value for medivac_tag_to_mine_tracker was passed into kwargs."
+            "drop_tracker" in kwargs
+        ), "No value for drop_tracker was passed into kwargs."
+        assert (
+            "unit_snapshot" in kwargs
+        ), "No value for unit_snapshot was passed into kwargs."
         # no units assigned to mine drop currently.
         if not units:
             return
 
         air_grid: np.ndarray = self.mediator.get_air_grid
         ground_grid: np.ndarray = self.mediator.get_ground_grid
-        medivac_tag_to_mine_tracker: dict[int, dict] = kwargs[
-            "medivac_tag_to_mine_tracker"
-        ]
-
-        # we have the exact units, but we need to split them depending on precise job.
-        unit_role_dict: dict[UnitRole, set[int]] = self.mediator.get_unit_role_dict
-
-        for medivac_tag, tracker_info in medivac_tag_to_mine_tracker.items():
-            medivac: Optional[Unit] = self.ai.unit_tag_dict.get(medivac_tag, None)
-
+        drop_tracker: "DropTracker" = kwargs["drop_tracker"]
+        snapshot: "UnitSnapshot" = kwargs["unit_snapshot"]
+        unit_tag_dict: dict[int, Unit] = self.ai.unit_tag_dict
+
+        # the tracker knows which mines of each drop have which job
+        drops: list[tuple["MineDrop", Optional[Unit], list[Unit], list[Unit]]] = []
+        dropping_medivacs: list[Unit] = []
+        for medivac_tag, drop in drop_tracker.drops.items():
+            medivac: Optional[Unit] = unit_tag_dict.get(medivac_tag, None)
             mines_to_pickup: list[Unit] = [
-                u
-                for u in units
-                if u.tag in tracker_info["mine_tags"]
-                and u.tag in unit_role_dict[UnitRole.DROP_UNITS_TO_LOAD]
+                mine
+                for tag in drop_tracker.mines_with_role(
+                    drop, UnitRole.DROP_UNITS_TO_LOAD
+                )
+                if (mine := unit_tag_dict.get(tag))
             ]
             dropped_off_mines: list[Unit] = [
-                u
-                for u in units
-                if u.tag in tracker_info["mine_tags"]
-                and u.tag in unit_role_dict[UnitRole.DROP_UNITS_ATTACKING]
+                mine
+                for tag in drop_tracker.mines_with_role(
+                    drop, UnitRole.DROP_UNITS_ATTACKING
+                )
+                if (mine := unit_tag_dict.get(tag))
             ]
+            drops.append((drop, medivac, mines_to_pickup, dropped_off_mines))
+            if medivac and drop_tracker.role_of(medivac_tag) == UnitRole.DROP_SHIP:
+                dropping_medivacs.append(medivac)
 
-            if medivac and medivac_tag in unit_role_dict[UnitRole.DROP_SHIP]:
+        # one lookup for the worker clusters near every dropping medivac
+        worker_clusters: dict[int, Optional[Point2]] = self._find_worker_clusters(
+            dropping_medivacs, snapshot
+        )
+        for drop, medivac, mines_to_pickup, dropped_off_mines in drops:
+            if medivac and medivac.tag in worker_clusters:
                 self._handle_medivac_dropping_mines(
-                    medivac, mines_to_pickup, air_grid, tracker_info["target"]
+                    medivac,
+                    mines_to_pickup,
+                    air_grid,
+                    drop.target,
+                    worker_clusters[medivac.tag],
                 )
-            self._handle_mines_to_pickup(mines_to_pickup, medivac, ground_grid)
-            self._handle_dropped_mines(ground_grid, dropped_off_mines, medivac)
+            self._handle_mines_to_pickup(
+                mines_to_pickup, medivac, ground_grid, drop_tracker
+            )
+            self._handle_dropped_mines(
+                ground_grid, dropped_off_mines, medivac, drop_tracker
+            )
+
+    def _find_worker_clusters(
+        self, medivacs: list[Unit], snapshot: "UnitSnapshot"
+    ) -> dict[int, Optional[Point2]]:
+        """Where to drop on enemy workers near each medivac, if anywhere.
+
+        Parameters
+        ----------
+        medivacs :
+            Medivacs to look around.
+        snapshot :
+            Columnar snapshot of all units for this step.
+
+        Returns
+        -------
+        dict[int, Optional[Point2]] :
+            Medivac tag to the best spot to hit workers, None if there's no
+            worth while cluster near it.
+        """
+        if not medivacs:
+            return dict()
+        if self.worker_clusters:
+            return dict(
+                zip(
+                    (medivac.tag for medivac in medivacs),
+                    self.worker_clusters.drop_points(m.position for m in medivacs),
+                )
+            )
+
+        in_range: list[Units] = self.mediator.get_units_in_range(
+            start_points=[medivac.position for medivac in medivacs],
+            distances=8.5,
+            query_tree=UnitTreeQueryType.EnemyGround,
+        )
+        worker_mask: np.ndarray = snapshot.type_mask(WORKER_TYPES)
+        clusters: dict[int, Optional[Point2]] = dict()
+        for medivac, units in zip(medivacs, in_range):
+            close_enemy_workers: Units = snapshot.select(units, worker_mask)
+            clusters[medivac.tag] = (
+                Point2(cy_center(close_enemy_workers))
+                if len(close_enemy_workers) >= 6
+                else None
+            )
+        return clusters
 
     def _handle_medivac_dropping_mines(
         self,
@@ -108,6 +197,7 @@ class MedivacMineDrops(BaseUnit):
         mines_to_pickup: list[Unit],
         air_grid: np.ndarray,
         target: Point2,
+        worker_cluster: Optional[Point2],
     ) -> None:
         """Control medivacs involvement.
 
@@ -121,6 +211,8 @@ class MedivacMineDrops(BaseUnit):
             Pathing grid this medivac can path on.
         target :
             Where should this medivac drop mines?
+        worker_cluster :
+            Where to drop on enemy workers near this medivac, if anywhere.
         """
 
         # can speed boost, do that and ignore other actions till next step
@@ -132,7 +224,9 @@ class MedivacMineDrops(BaseUnit):
             return
 
         # recalculate precise target based on live game state
-        target = self._calculate_precise_target(air_grid, medivac, target)
+        target = self._calculate_precise_target(
+            air_grid, medivac, target, worker_cluster
+        )
 
         # initiate a new mine drop maneuver
         mine_drop: CombatManeuver = CombatManeuver()
@@ -146,11 +240,8 @@ class MedivacMineDrops(BaseUnit):
         if ready_to_drop:
             # path to target
             mine_drop.add(
-                PathUnitToTarget(
-                    unit=medivac,
-                    grid=air_grid,
-                    target=target,
-                    success_at_distance=4.0,
+                self._path_medivac_to_target(
+                    medivac, air_grid, target, success_at_distance=4.0
                 )
             )
             # drop off the mines
@@ -158,21 +249,103 @@ class MedivacMineDrops(BaseUnit):
         # not ready to drop anything, add staying safe and path to dead-space
         else:
             mine_drop.add(KeepUnitSafe(unit=medivac, grid=air_grid))
-            # TODO: Find dead space to hang around in for target here.
-            #   This currently tries to move away from likely enemy position.
-            safe_spot: Point2 = self.mediator.find_closest_safe_spot(
-                from_pos=target.towards(self.mediator.get_enemy_nat, -20.0),
-                grid=air_grid,
-            )
-            mine_drop.add(
-                PathUnitToTarget(unit=medivac, grid=air_grid, target=safe_spot)
+            safe_spot: Optional[Point2] = (
+                self.dead_space.hover_spot(target, air_grid)
+                if self.dead_space
+                else None
             )
+            # no safe dead space, try to move away from likely enemy position
+            if safe_spot is None:
+                safe_spot = self._find_closest_safe_spot(
+                    ("medivac_hover_spot", medivac.tag),
+                    target.towards(self.mediator.get_enemy_nat, -20.0),
+                    air_grid,
+                )
+            mine_drop.add(self._path_medivac_to_target(medivac, air_grid, safe_spot))
 
         # register the behavior so it will be executed.
         self.ai.register_behavior(mine_drop)
 
+    def _find_closest_safe_spot(
+        self, key: tuple, from_pos: Point2, grid: np.ndarray, radius: float = 15.0
+    ) -> Point2:
+        """Find a safe spot, through the planner if we have one.
+
+        Parameters
+        ----------
+        key :
+            Identifies the search between steps.
+        from_pos :
+            Where to search from.
+        grid :
+            Grid to search.
+        radius :
+            How far away from `from_pos` to look.
+
+        Returns
+        -------
+        Point2 :
+            The safe spot, possibly planned a few frames ago.
+        """
+        if self.planner:
+            # a recent spot planned from close by is used while a newer one is
+            # worked out, otherwise search now
+            plan: Optional[PlanResult] = self.planner.request_safe_spot(
+                key, grid, from_pos, radius
+            )
+            if plan:
+                return plan.value
+        return self.mediator.find_closest_safe_spot(
+            from_pos=from_pos, grid=grid, radius=radius
+        )
+
+    def _path_medivac_to_target(
+        self,
+        medivac: Unit,
+        air_grid: np.ndarray,
+        target: Point2,
+        success_at_distance: float = 0.0,
+    ) -> Union[CachedPathUnitToTarget, PathUnitToTarget]:
+        """Get the behavior pathing a medivac, through the path cache if we have one.
+
+        Parameters
+        ----------
+        medivac :
+            The medivac to path.
+        air_grid :
+            Pathing grid this medivac can path on.
+        target :
+            Where the medivac should go.
+        success_at_distance :
+            Stop pathing when the medivac is this close to the target.
+
+        Returns
+        -------
+        Union[CachedPathUnitToTarget, PathUnitToTarget] :
+            Behavior to add to the medivac's maneuver.
+        """
+        if self.path_cache:
+            return CachedPathUnitToTarget(
+                unit=medivac,
+                grid=air_grid,
+                grid_kind=GridKind.AIR,
+                target=target,
+                path_cache=self.path_cache,
+                success_at_distance=success_at_distance,
+            )
+        return PathUnitToTarget(
+            unit=medivac,
+            grid=air_grid,
+            target=target,
+            success_at_distance=success_at_distance,
+        )
+
     def _handle_mines_to_pickup(
-        self, mines: list[Unit], medivac: Optional[Unit], ground_grid: np.ndarray
+        self,
+        mines: list[Unit],
+        medivac: Optional[Unit],
+        ground_grid: np.ndarray,
+        drop_tracker: "DropTracker",
     ) -> None:
         """Control mines waiting rescue.
 
@@ -186,6 +359,8 @@ class MedivacMineDrops(BaseUnit):
             Medivac that could possibly pick these mines up.
         ground_grid :
             Pathing grid these mines can path on.
+        drop_tracker :
+            Mines changing job change role through here.
         """
         for mine in mines:
             if mine.is_burrowed:
@@ -193,12 +368,14 @@ class MedivacMineDrops(BaseUnit):
             elif medivac:
                 mine.move(medivac.position)
             else:
-                self.mediator.assign_role(
-                    tag=mine.tag, role=UnitRole.DROP_UNITS_ATTACKING
-                )
+                drop_tracker.assign_role((mine.tag,), UnitRole.DROP_UNITS_ATTACKING)
 
     def _handle_dropped_mines(
-        self, grid: np.ndarray, mines: list[Unit], medivac: Unit
+        self,
+        grid: np.ndarray,
+        mines: list[Unit],
+        medivac: Unit,
+        drop_tracker: "DropTracker",
     ) -> None:
         """Control mines that've recently been dropped off.
 
@@ -206,6 +383,8 @@ class MedivacMineDrops(BaseUnit):
         ----------
         mines :
             Mines this method should control.
+        drop_tracker :
+            Mines changing job change role through here.
         """
         if len(mines) == 0:
             return
@@ -230,9 +409,7 @@ class MedivacMineDrops(BaseUnit):
                 # attack is not available, therefore:
                 # - assign mine with role, so it can be rescued.
                 # - tell ability tracker manager, so we know when weapon is ready.
-                self.mediator.assign_role(
-                    tag=mine.tag, role=UnitRole.DROP_UNITS_TO_LOAD
-                )
+                drop_tracker.assign_role((mine.tag,), UnitRole.DROP_UNITS_TO_LOAD)
                 self.mediator.update_unit_to_ability_dict(
                     ability=ability,
                     unit_tag=mine.tag,
@@ -278,7 +455,11 @@ class MedivacMineDrops(BaseUnit):
         return True
 
     def _calculate_precise_target(
-        self, air_grid: np.ndarray, medivac: Unit, target: Point2
+        self,
+        air_grid: np.ndarray,
+        medivac: Unit,
+        target: Point2,
+        worker_cluster: Optional[Point2],
     ) -> Point2:
         """Given the precalculated target, update it depending on current game state.
 
@@ -290,26 +471,22 @@ class MedivacMineDrops(BaseUnit):
             The actual medivac to calculate drop target for.
         target :
             General precalculated target.
+        worker_cluster :
+            Where to drop on enemy workers near this medivac, if anywhere.
 
         Returns
         -------
 
         """
         med_pos: Point2 = medivac.position
-        # look for a cluster of enemy workers nearby
-        close_enemy_workers: list[Unit] = self.mediator.get_units_in_range(
-            start_points=[med_pos],
-            distances=[8.5],
-            query_tree=UnitTreeQueryType.EnemyGround,
-        )[0].filter(lambda u: u.type_id in WORKER_TYPES)
-
-        if len(close_enemy_workers) >= 6:
-            target = Point2(cy_center(close_enemy_workers))
+        # go for a cluster of enemy workers nearby
+        if worker_cluster is not None:
+            target = worker_cluster
 
         # current position is not safe for medivac, find a nearby safe spot
         if not self.mediator.is_position_safe(grid=air_grid, position=med_pos):
-            target = self.mediator.find_closest_safe_spot(
-                from_pos=target, grid=air_grid
+            target = self._find_closest_safe_spot(
+                ("medivac_safe_target", medivac.tag), target, air_grid
             )
 
         return target
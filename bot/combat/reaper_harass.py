@@ -12,7 +12,6 @@ from ares.behaviors.combat.individual import (
     UseAbility,
     AttackTarget,
 )
-from ares.consts import ALL_STRUCTURES, UnitTreeQueryType
 from ares.cython_extensions.combat_utils import cy_pick_enemy_target, cy_is_facing
 from ares.cython_extensions.geometry import cy_distance_to
 from ares.cython_extensions.units_utils import cy_closest_to, cy_in_attack_range
@@ -23,12 +22,28 @@ from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
-from bot.behaviors.place_predictive_aoe import PlacePredictiveAoE
+from bot.behaviors.cached_path_unit_to_target import CachedPathUnitToTarget
+from bot.behaviors.follow_flow_field import FollowFlowField
+from bot.behaviors.place_predictive_aoe import (
+    PlacePredictiveAoE,
+    PredictiveAoERequest,
+    batch_predict_aoe_targets,
+)
 from bot.combat.base_unit import BaseUnit
+from bot.consts import DegradationTier, GridKind
+from bot.managers.planning_manager import PlanResult
 
 if TYPE_CHECKING:
     from ares import AresBot
 
+    from bot.managers.enemy_motion_manager import EnemyMotionManager
+    from bot.managers.flow_field_manager import FlowFieldManager
+    from bot.managers.path_cache_manager import PathCacheManager
+    from bot.managers.planning_manager import PlanningManager
+    from bot.managers.unit_proximity_manager import NeighbourTable
+    from bot.managers.unit_snapshot_manager import UnitSnapshot
+    from bot.step_watchdog import StepWatchdog
+
 
 @dataclass
 class ReaperHarass(BaseUnit):
@@ -44,12 +59,30 @@ class ReaperHarass(BaseUnit):
         Dictionary with the data from the configuration file
     mediator : ManagerMediator
         Used for getting information from managers in Ares.
+    enemy_motion : Optional[EnemyMotionManager]
+        If provided, used to lead grenades thrown at enemies not chasing us.
+    path_cache : Optional[PathCacheManager]
+        If provided, grenade and healing paths are reused across steps.
+    flow_field : Optional[FlowFieldManager]
+        If provided, healing Reapers share one flow field home.
+    watchdog : Optional[StepWatchdog]
+        If provided, predictive grenades are skipped when the step is running
+        late.
+    planner : Optional[PlanningManager]
+        If provided, safe spot searches run off the main step.
     """
 
     ai: "AresBot"
     config: dict
     mediator: ManagerMediator
+    enemy_motion: Optional["EnemyMotionManager"] = None
+    path_cache: Optional["PathCacheManager"] = None
+    flow_field: Optional["FlowFieldManager"] = None
+    watchdog: Optional["StepWatchdog"] = None
+    planner: Optional["PlanningManager"] = None
     reaper_grenade_range: float = 5.0
+    # TODO: verify, currently based on experimental evidence
+    reaper_grenade_delay: int = 34
 
     def execute(self, units: Units, **kwargs) -> None:
         """Execute the Reaper harass.
@@ -67,6 +100,10 @@ class ReaperHarass(BaseUnit):
             Tracker detailing Reaper tag to enemy base.
         heal_threshold: float
             Health percentage where a Reaper should disengage to heal
+        unit_snapshot: UnitSnapshot
+            Columnar snapshot of all units for this step.
+        neighbour_table: NeighbourTable
+            All enemy units near each of our units this step.
 
         Returns
         -------
@@ -78,15 +115,21 @@ class ReaperHarass(BaseUnit):
         assert (
             "heal_threshold" in kwargs
         ), "No value for heal_threshold was passed into kwargs."
+        assert (
+            "unit_snapshot" in kwargs
+        ), "No value for unit_snapshot was passed into kwargs."
+        assert (
+            "neighbour_table" in kwargs
+        ), "No value for neighbour_table was passed into kwargs."
 
         reaper_to_target_tracker: dict[int, Point2] = kwargs["reaper_to_target_tracker"]
+        snapshot: "UnitSnapshot" = kwargs["unit_snapshot"]
+        neighbour_table: "NeighbourTable" = kwargs["neighbour_table"]
 
-        everything_near_reapers: dict[int, Units] = self.mediator.get_units_in_range(
-            start_points=units,
-            distances=15,
-            query_tree=UnitTreeQueryType.AllEnemy,
-            return_as_dict=True,
-        )
+        # snapshot rows of everything near each reaper
+        rows_near_reapers: dict[int, np.ndarray] = {
+            unit.tag: neighbour_table.rows_near(unit) for unit in units
+        }
         proxy_pylons: list[Unit] = [
             s
             for s in self.ai.get_enemy_proxies(
@@ -98,20 +141,38 @@ class ReaperHarass(BaseUnit):
         avoidance_grid = self.mediator.get_ground_avoidance_grid
         reaper_grid = self.mediator.get_climber_grid
 
+        # get units near each reaper that can damage it
+        threat_mask: np.ndarray = (
+            snapshot.can_attack_ground & ~snapshot.is_structure & ~snapshot.is_memory
+        )
+        threats_near_reapers: dict[int, Units] = {
+            tag: snapshot.to_units(rows[threat_mask[rows]])
+            for tag, rows in rows_near_reapers.items()
+        }
+        pylon_mask: np.ndarray = snapshot.type_mask(UnitID.PYLON)
+        # predict all aggressive grenade positions for this frame in one go
+        grenade_targets: dict[int, Point2] = dict()
+        if not (
+            self.watchdog
+            and self.watchdog.is_degraded(DegradationTier.SKIP_PREDICTIVE_AOE)
+        ):
+            grenade_targets = batch_predict_aoe_targets(
+                self._get_grenade_requests(
+                    units, reaper_grid, reaper_to_target_tracker, threats_near_reapers
+                ),
+                self.ai.client.game_step,
+            )
+
         for unit in units:
             tag: int = unit.tag
             target: Point2 = reaper_to_target_tracker[tag]
             unit_pos: Point2 = unit.position
 
-            pylons: Units = everything_near_reapers[tag].filter(
-                lambda u: u.type_id == UnitID.PYLON
-            )
-            # get units near the reaper that can damage it
-            threats_near_reaper: Units = everything_near_reapers[tag].filter(
-                lambda u: u.can_attack_ground
-                and u.type_id not in ALL_STRUCTURES
-                and not u.is_memory
+            rows_near_reaper: np.ndarray = rows_near_reapers[tag]
+            pylons: Units = snapshot.to_units(
+                rows_near_reaper[pylon_mask[rows_near_reaper]]
             )
+            threats_near_reaper: Units = threats_near_reapers[tag]
 
             reaper_maneuver: CombatManeuver = CombatManeuver()
             # dodge biles, storms etc
@@ -124,7 +185,7 @@ class ReaperHarass(BaseUnit):
             ):
                 reaper_maneuver.add(
                     self._do_reaper_grenade(
-                        reaper_grid, unit, unit_pos, target, threats_near_reaper
+                        unit, unit_pos, threats_near_reaper, grenade_targets
                     )
                 )
 
@@ -159,18 +220,69 @@ class ReaperHarass(BaseUnit):
                         unit=unit,
                         target=target,
                         threats_near_reaper=threats_near_reaper,
+                        snapshot=snapshot,
                     )
                 )
 
             self.ai.register_behavior(reaper_maneuver)
 
-    def _do_reaper_grenade(
+    def _get_grenade_requests(
         self,
+        units: Units,
         reaper_grid: np.ndarray,
+        reaper_to_target_tracker: dict[int, Point2],
+        threats_near_reapers: dict[int, Units],
+    ) -> list[PredictiveAoERequest]:
+        """Collect every Reaper that should throw a predictive grenade this frame.
+
+        Parameters
+        ----------
+        units : Units
+            The Reapers being controlled.
+        reaper_grid : np.ndarray
+            Pathing grid to use for the Reapers.
+        reaper_to_target_tracker : dict[int, Point2]
+            Tracker detailing Reaper tag to enemy base.
+        threats_near_reapers : dict[int, Units]
+            Reaper tag to the enemy units that can damage it.
+
+        Returns
+        -------
+        list[PredictiveAoERequest] :
+            One request per Reaper being chased by a visible enemy.
+        """
+        requests: list[PredictiveAoERequest] = []
+        for unit in units:
+            threats: Units = threats_near_reapers[unit.tag]
+            if (
+                not threats
+                or unit.tag not in reaper_to_target_tracker
+                or AbilityId.KD8CHARGE_KD8CHARGE not in unit.abilities
+            ):
+                continue
+            unit_pos: Point2 = unit.position
+            close_unit: Unit = cy_closest_to(unit_pos, threats)
+            # close unit is not chasing reaper, throw aggressive grenade
+            if not close_unit.is_memory and close_unit.is_facing(unit):
+                if path_to_target := self._find_raw_path(
+                    unit_pos, reaper_to_target_tracker[unit.tag], reaper_grid
+                ):
+                    requests.append(
+                        PredictiveAoERequest(
+                            unit=unit,
+                            path=path_to_target[:30],
+                            enemy_center_unit=close_unit,
+                            ability_delay=self.reaper_grenade_delay,
+                        )
+                    )
+        return requests
+
+    def _do_reaper_grenade(
+        self,
         unit: Unit,
         unit_pos: Point2,
-        target: Point2,
         threats_near_reaper: Units,
+        grenade_targets: dict[int, Point2],
     ) -> CombatManeuver:
         grenade_maneuver: CombatManeuver = CombatManeuver()
         close_unit: Unit = cy_closest_to(unit_pos, threats_near_reaper)
@@ -179,20 +291,15 @@ class ReaperHarass(BaseUnit):
             facing: bool = close_unit.is_facing(unit)
             # close unit is not chasing reaper, throw aggressive grenade
             if facing:
-                if path_to_target := self.mediator.find_raw_path(
-                    start=unit_pos,
-                    target=target,
-                    grid=reaper_grid,
-                    sensitivity=1,
-                ):
+                if unit.tag in grenade_targets:
                     grenade_maneuver.add(
                         PlacePredictiveAoE(
                             unit=unit,
-                            path=path_to_target[:30],
+                            path=[unit_pos],
                             enemy_center_unit=close_unit,
                             aoe_ability=AbilityId.KD8CHARGE_KD8CHARGE,
-                            # TODO: verify, currently based on experimental evidence
-                            ability_delay=34,
+                            ability_delay=self.reaper_grenade_delay,
+                            target_position=grenade_targets[unit.tag],
                         )
                     )
             elif (
@@ -201,11 +308,26 @@ class ReaperHarass(BaseUnit):
                 < self.reaper_grenade_range + close_unit.radius
             ):
                 # TODO: Look for clumps etc a clump of workers
+                grenade_target: Optional[Point2] = None
+                if self.enemy_motion:
+                    # lead the throw based on how the enemy has been moving
+                    grenade_target = self.enemy_motion.get_expected_position(
+                        close_unit.tag, self.reaper_grenade_delay
+                    )
+                    # keep the lead within cast range so the throw still happens
+                    if (
+                        grenade_target
+                        and cy_distance_to(unit_pos, grenade_target)
+                        > self.reaper_grenade_range
+                    ):
+                        grenade_target = unit_pos.towards(
+                            grenade_target, self.reaper_grenade_range
+                        )
                 grenade_maneuver.add(
                     UseAbility(
                         ability=AbilityId.KD8CHARGE_KD8CHARGE,
                         unit=unit,
-                        target=close_unit.position,
+                        target=grenade_target or close_unit.position,
                     )
                 )
 
@@ -217,13 +339,16 @@ class ReaperHarass(BaseUnit):
         unit: Unit,
         target: Point2,
         threats_near_reaper: Units,
+        snapshot: "UnitSnapshot",
     ) -> CombatManeuver:
         reaper_harass_maneuver: CombatManeuver = CombatManeuver()
 
         in_attack_range: list[Unit] = cy_in_attack_range(unit, threats_near_reaper)
-        melee_units: Units = threats_near_reaper.filter(lambda u: u.ground_range < 3)
-        light: Units = threats_near_reaper.filter(
-            lambda u: u.is_light and not u.is_memory
+        melee_units: Units = snapshot.select(
+            threats_near_reaper, snapshot.ground_range < 3
+        )
+        light: Units = snapshot.select(
+            threats_near_reaper, snapshot.is_light & ~snapshot.is_memory
         )
         only_melee: bool = len(melee_units) == len(threats_near_reaper)
 
@@ -268,10 +393,11 @@ class ReaperHarass(BaseUnit):
             # else try to get out of the way
             else:
                 radius: float = 10.0
-            safest_spot: Point2 = self.mediator.find_closest_safe_spot(
-                from_pos=enemy_target.position,
-                grid=reaper_grid,
-                radius=radius,
+            safest_spot: Point2 = self._find_closest_safe_spot(
+                ("reaper_safe_spot", unit.tag),
+                enemy_target.position,
+                reaper_grid,
+                radius,
             )
             reaper_harass_maneuver.add(
                 PathUnitToTarget(
@@ -319,12 +445,98 @@ class ReaperHarass(BaseUnit):
         # best to run back home, keeping unit safe can make reaper
         # sit at bottom of cliffs and die from high ground enemies'
         # Reaper will likely turn around as healing starts
-        heal_maneuver.add(
-            PathUnitToTarget(
-                unit=unit,
-                grid=reaper_grid,
-                target=self.ai.start_location,
+        if self.flow_field:
+            # every healing reaper reads from the same field
+            heal_maneuver.add(
+                FollowFlowField(
+                    unit=unit,
+                    grid=reaper_grid,
+                    grid_kind=GridKind.CLIMBER,
+                    target=self.ai.start_location,
+                    flow_field=self.flow_field,
+                )
+            )
+        elif self.path_cache:
+            heal_maneuver.add(
+                CachedPathUnitToTarget(
+                    unit=unit,
+                    grid=reaper_grid,
+                    grid_kind=GridKind.CLIMBER,
+                    target=self.ai.start_location,
+                    path_cache=self.path_cache,
+                )
+            )
+        else:
+            heal_maneuver.add(
+                PathUnitToTarget(
+                    unit=unit,
+                    grid=reaper_grid,
+                    target=self.ai.start_location,
+                )
             )
-        )
 
         return heal_maneuver
+
+    def _find_closest_safe_spot(
+        self, key: tuple, from_pos: Point2, grid: np.ndarray, radius: float
+    ) -> Point2:
+        """Find a safe spot, through the planner if we have one.
+
+        Parameters
+        ----------
+        key :
+            Identifies the search between steps.
+        from_pos :
+            Where to search from.
+        grid :
+            Grid to search.
+        radius :
+            How far away from `from_pos` to look.
+
+        Returns
+        -------
+        Point2 :
+            The safe spot, possibly planned a few frames ago.
+        """
+        if self.planner:
+            # a recent spot planned from close by is used while a newer one is
+            # worked out, otherwise search now
+            plan: Optional[PlanResult] = self.planner.request_safe_spot(
+                key, grid, from_pos, radius
+            )
+            if plan:
+                return plan.value
+        return self.mediator.find_closest_safe_spot(
+            from_pos=from_pos, grid=grid, radius=radius
+        )
+
+    def _find_raw_path(
+        self, start: Point2, target: Point2, reaper_grid: np.ndarray
+    ) -> list[Point2]:
+        """Find a Reaper path, through the path cache if we have one.
+
+        Parameters
+        ----------
+        start : Point2
+            Where the path starts.
+        target : Point2
+            Where the path ends.
+        reaper_grid : np.ndarray
+            Pathing grid to use for the Reaper.
+
+        Returns
+        -------
+        list[Point2] :
+            The path, empty if no path was found.
+        """
+        if self.path_cache:
+            return self.path_cache.find_raw_path(
+                start=start,
+                target=target,
+                grid=reaper_grid,
+                grid_kind=GridKind.CLIMBER,
+                sensitivity=1,
+            )
+        return self.mediator.find_raw_path(
+            start=start, target=target, grid=reaper_grid, sensitivity=1
+        )
@@ -1,14 +1,18 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
-from ares import ManagerMediator, UnitTreeQueryType
+from ares import ManagerMediator
 from ares.behaviors.combat.individual import WorkerKiteBack
 from ares.cython_extensions.units_utils import cy_closest_to, cy_center
 from bot.combat.base_unit import BaseUnit
 
+if TYPE_CHECKING:
+    from bot.managers.unit_proximity_manager import NeighbourTable
+
 
 @dataclass
 class WorkerDefenders(BaseUnit):
@@ -42,18 +46,16 @@ class WorkerDefenders(BaseUnit):
 
         Keyword Arguments
         -----------------
-        medivac_tag_to_mine_tracker : dict[int, dict]
-            Tracker detailing medivac tag to mine tags.
-            And target for the mine drop.
+        ground_neighbour_table : NeighbourTable
+            Enemy ground units near each of our units this step.
 
         """
+        assert (
+            "ground_neighbour_table" in kwargs
+        ), "No value for ground_neighbour_table was passed into kwargs."
 
-        ground_near_workers: dict[int, Units] = self.mediator.get_units_in_range(
-            start_points=units,
-            distances=15,
-            query_tree=UnitTreeQueryType.EnemyGround,
-            return_as_dict=True,
-        )
+        neighbour_table: "NeighbourTable" = kwargs["ground_neighbour_table"]
+        ground_near_workers: dict[int, Units] = neighbour_table.units_near(units)
 
         for worker in units:
             near_ground: Units = ground_near_workers[worker.tag]
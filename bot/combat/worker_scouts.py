@@ -1,11 +1,15 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from sc2.units import Units
 
-from ares import ManagerMediator, UnitTreeQueryType, WORKER_TYPES
+from ares import ManagerMediator, WORKER_TYPES
 from ares.cython_extensions.units_utils import cy_closest_to
 from bot.combat.base_unit import BaseUnit
 
+if TYPE_CHECKING:
+    from bot.managers.unit_proximity_manager import NeighbourTable
+
 
 @dataclass
 class WorkerScouts(BaseUnit):
@@ -40,21 +44,21 @@ class WorkerScouts(BaseUnit):
 
         Keyword Arguments
         -----------------
-        medivac_tag_to_mine_tracker : dict[int, dict]
-            Tracker detailing medivac tag to mine tags.
-            And target for the mine drop.
+        points_to_check : list[Point2]
+            Where the scouting worker should go.
+        ground_neighbour_table : NeighbourTable
+            Enemy ground units near each of our units this step.
 
         """
         assert (
             "points_to_check" in kwargs
         ), "No value for `points_to_check` was passed into kwargs."
+        assert (
+            "ground_neighbour_table" in kwargs
+        ), "No value for `ground_neighbour_table` was passed into kwargs."
 
-        ground_near_workers: dict[int, Units] = self.mediator.get_units_in_range(
-            start_points=units,
-            distances=15,
-            query_tree=UnitTreeQueryType.EnemyGround,
-            return_as_dict=True,
-        )
+        neighbour_table: "NeighbourTable" = kwargs["ground_neighbour_table"]
+        ground_near_workers: dict[int, Units] = neighbour_table.units_near(units)
 
         for unit in units:
             enemy_near_worker: Units = ground_near_workers[unit.tag]
@@ -0,0 +1,231 @@
+"""Drop unit commands that wouldn't change anything before they're sent."""
+from collections import Counter
+from typing import TYPE_CHECKING, Optional, Union
+
+from loguru import logger
+from sc2.ids.ability_id import AbilityId
+from sc2.position import Point2
+from sc2.unit import Unit
+from sc2.unit_command import UnitCommand
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+# abilities that leave an order on the unit until it's done, issuing them again
+# with the same target only restarts what the unit is already doing
+PERSISTENT_ORDER_ABILITIES: frozenset[AbilityId] = frozenset(
+    {
+        AbilityId.ATTACK,
+        AbilityId.ATTACK_ATTACK,
+        AbilityId.MOVE,
+        AbilityId.MOVE_MOVE,
+        AbilityId.SMART,
+        AbilityId.HARVEST_GATHER,
+        AbilityId.HARVEST_GATHER_SCV,
+        AbilityId.HARVEST_RETURN,
+        AbilityId.HARVEST_RETURN_SCV,
+        AbilityId.HOLDPOSITION,
+        AbilityId.HOLDPOSITION_HOLD,
+        AbilityId.STOP,
+        AbilityId.STOP_STOP,
+        AbilityId.MORPH_SUPPLYDEPOT_LOWER,
+        AbilityId.MORPH_SUPPLYDEPOT_RAISE,
+    }
+)
+STOP_ABILITIES: frozenset[AbilityId] = frozenset({AbilityId.STOP, AbilityId.STOP_STOP})
+
+
+class CommandFilter:
+    """Remove redundant unit commands and group the rest for python-sc2.
+
+    Only commands with an ability in `PERSISTENT_ORDER_ABILITIES` are dropped,
+    anything else (abilities, training, building) is always sent. One of those
+    commands is dropped when:
+
+    - a later command this frame replaces it (same unit, not queued)
+    - the unit is already carrying out the same order
+    - the same order was sent to the unit less than `ReissueFrames` ago, and
+      the unit is still on the order it had then
+
+    Units also given queued commands this frame only lose replaced commands, as
+    their queue builds on the order before it.
+
+    python-sc2 combines consecutive commands with the same ability, target and
+    queue flag into one action, so the remaining commands are reordered to put
+    those next to each other. Units with more than one command keep them in
+    order, after everything else.
+
+    Parameters
+    ----------
+    ai : AresBot
+        Bot object that will be running the game
+    config : dict
+        Dictionary with the data from the configuration file
+    """
+
+    def __init__(self, ai: "AresBot", config: dict):
+        self.ai: "AresBot" = ai
+        filter_config: dict = config.get("CommandFilter", {})
+        self.enabled: bool = filter_config.get("Enabled", True)
+        self.target_tolerance: float = filter_config.get("TargetTolerance", 0.5)
+        self.reissue_frames: int = filter_config.get("ReissueFrames", 11)
+        # unit tag to the last persistent order sent, the frame it was sent and
+        # the order the unit had then, cleared by any other command to the unit
+        self._last_sent: dict[
+            int, tuple[AbilityId, Union[int, Point2, None], int, Optional[tuple]]
+        ] = dict()
+        self.commands_seen: int = 0
+        self.dropped: Counter[str] = Counter()
+        # raw actions python-sc2 would send without and with the filter
+        self.actions_before: int = 0
+        self.actions_after: int = 0
+
+    def filter(self, commands: list[UnitCommand]) -> None:
+        """Filter this frame's commands in place, before they're sent.
+
+        Parameters
+        ----------
+        commands :
+            `UnitCommand`s issued this step, usually `ai.actions`.
+        """
+        if not self.enabled or not commands:
+            return
+        frame: int = self.ai.state.game_loop
+        self.commands_seen += len(commands)
+        self.actions_before += num_raw_actions(commands)
+
+        # index of the last command replacing everything before it, per unit
+        last_replacing: dict[int, int] = dict()
+        # units given a sequence of orders, which are only ever sent as is
+        queueing: set[int] = set()
+        for i, command in enumerate(commands):
+            if command.queue:
+                queueing.add(command.unit.tag)
+            elif command.ability in PERSISTENT_ORDER_ABILITIES:
+                last_replacing[command.unit.tag] = i
+
+        kept: list[UnitCommand] = []
+        for i, command in enumerate(commands):
+            reason: Optional[str] = None
+            if command.ability in PERSISTENT_ORDER_ABILITIES:
+                if last_replacing.get(command.unit.tag, i) > i:
+                    reason = "replaced"
+                elif command.unit.tag not in queueing:
+                    reason = self._drop_reason(command, frame)
+            if reason:
+                self.dropped[reason] += 1
+            else:
+                kept.append(command)
+
+        for command in kept:
+            if command.ability in PERSISTENT_ORDER_ABILITIES and not command.queue:
+                self._last_sent[command.unit.tag] = (
+                    command.ability,
+                    _target_key(command.target),
+                    frame,
+                    _current_order(command.unit),
+                )
+            else:
+                # the unit may not be on the remembered order once this lands
+                self._last_sent.pop(command.unit.tag, None)
+        if len(self._last_sent) > 4 * len(kept) + 256:
+            self._last_sent = {
+                tag: sent
+                for tag, sent in self._last_sent.items()
+                if frame - sent[2] < self.reissue_frames
+            }
+
+        commands[:] = _coalesce(kept)
+        self.actions_after += num_raw_actions(commands)
+
+    def summary(self) -> dict:
+        return {
+            "commands": self.commands_seen,
+            "dropped": dict(self.dropped),
+            "actions_before": self.actions_before,
+            "actions_after": self.actions_after,
+        }
+
+    def log_summary(self) -> None:
+        saved: int = self.actions_before - self.actions_after
+        logger.info(
+            f"Command filter dropped {sum(self.dropped.values())} of "
+            f"{self.commands_seen} commands ({dict(self.dropped)}), saving {saved} of "
+            f"{self.actions_before} actions"
+        )
+
+    def _drop_reason(self, command: UnitCommand, frame: int) -> Optional[str]:
+        """Why a persistent order shouldn't be sent, None if it should."""
+        unit: Unit = command.unit
+        if command.ability in STOP_ABILITIES:
+            return "current_order" if not unit.orders else None
+        target: Union[int, Point2, None] = _target_key(command.target)
+        if unit.orders:
+            order = unit.orders[0]
+            if command.ability in (
+                order.ability.id,
+                order.ability.exact_id,
+            ) and self._same_target(target, order.target):
+                return "current_order"
+
+        # a sent order can take a few frames to show on the unit, but once the
+        # unit's order changes it has been carried out or overridden
+        if (sent := self._last_sent.get(unit.tag)) is not None:
+            ability, sent_target, sent_frame, order_then = sent
+            if (
+                frame - sent_frame < self.reissue_frames
+                and _current_order(unit) == order_then
+                and ability == command.ability
+                and self._same_target(target, sent_target)
+            ):
+                return "recently_sent"
+        return None
+
+    def _same_target(
+        self, target: Union[int, Point2, None], other: Union[int, Point2, None]
+    ) -> bool:
+        if isinstance(target, Point2) and isinstance(other, Point2):
+            return target.distance_to_point2(other) <= self.target_tolerance
+        # orders without a target report target tag 0
+        return (target or 0) == (other or 0)
+
+
+def _target_key(target: Union[Unit, Point2, None]) -> Union[int, Point2, None]:
+    """Unit targets as their tag, the way unit orders report them."""
+    if isinstance(target, Unit):
+        return target.tag
+    return target
+
+
+def _current_order(unit: Unit) -> Optional[tuple]:
+    """The ability and target of the unit's current order, None if it's idle."""
+    if not unit.orders:
+        return None
+    order = unit.orders[0]
+    return order.ability.exact_id, order.target
+
+
+def _coalesce(commands: list[UnitCommand]) -> list[UnitCommand]:
+    """Put commands python-sc2 can combine next to each other."""
+    commands_per_unit: Counter[int] = Counter(c.unit.tag for c in commands)
+    groups: dict[tuple, list[UnitCommand]] = dict()
+    sequences: list[UnitCommand] = []
+    for command in commands:
+        if commands_per_unit[command.unit.tag] > 1:
+            sequences.append(command)
+        else:
+            groups.setdefault(command.combining_tuple, []).append(command)
+    return [c for group in groups.values() for c in group] + sequences
+
+
+def num_raw_actions(commands: list[UnitCommand]) -> int:
+    """Actions `sc2.action.combine_actions` turns `commands` into."""
+    num_actions: int = 0
+    previous: Optional[tuple] = None
+    for command in commands:
+        key: tuple = command.combining_tuple
+        # combineable commands join the run of the previous one
+        if not key[3] or key != previous:
+            num_actions += 1
+        previous = key
+    return num_actions
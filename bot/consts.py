@@ -1,3 +1,34 @@
+from enum import Enum, IntEnum
+
 from sc2.ids.unit_typeid import UnitTypeId as UnitID
 
 NON_COMBAT_UNIT_TYPES: set[UnitID] = {UnitID.MULE, UnitID.SCV}
+
+
+class GridKind(str, Enum):
+    """Grids phobos paths on, used to key cached pathing data."""
+
+    AIR = "Air"
+    CACHED_GROUND = "CachedGround"
+    CLIMBER = "Climber"
+    GROUND = "Ground"
+
+
+class ManagerPriority(IntEnum):
+    """How important it is a manager runs on time, see `ManagerScheduler`."""
+
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+
+
+class DegradationTier(IntEnum):
+    """Features switched off as a step nears its time limit, see `StepWatchdog`.
+
+    Each tier includes the ones below it.
+    """
+
+    NONE = 0
+    SKIP_PREDICTIVE_AOE = 1
+    CACHED_PATHS_ONLY = 2
+    CRITICAL_MANAGERS_ONLY = 3
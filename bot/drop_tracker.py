@@ -0,0 +1,190 @@
+"""Mine drops and the roles of the units in them, kept current from events."""
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from ares import ManagerMediator
+from ares.consts import DROP_ROLES, UnitRole
+from sc2.ids.unit_typeid import UnitTypeId as UnitID
+from sc2.position import Point2
+from sc2.unit import Unit
+
+MINE_TYPES: frozenset[UnitID] = frozenset({UnitID.WIDOWMINE, UnitID.WIDOWMINEBURROWED})
+
+
+@dataclass(order=True)
+class PendingDrop:
+    """A planned drop waiting for a medivac and mines to be free.
+
+    Pending drops are ordered by readiness, so a heap of them gives the drop
+    that can launch soonest, the most important one first among those.
+
+    Attributes
+    ----------
+    ready_frame : int
+        Earliest frame the drop should try to launch.
+    priority : int
+        Lower launches first among drops ready at the same frame.
+    sequence : int
+        Order drops were planned in, breaks the remaining ties.
+    target : Point2
+        Where the mines should be dropped.
+    """
+
+    ready_frame: int
+    priority: int
+    sequence: int
+    target: Point2 = field(compare=False)
+
+
+class MineDrop:
+    """A medivac and the widow mines it drops.
+
+    Parameters
+    ----------
+    medivac_tag : int
+        The medivac carrying the mines, it may have died since.
+    mine_tags : set[int]
+        The mines still alive.
+    target : Point2
+        Where the mines should be dropped.
+    started : int
+        Frame the drop launched on.
+    """
+
+    __slots__ = ("medivac_tag", "mine_tags", "target", "started")
+
+    def __init__(
+        self, medivac_tag: int, mine_tags: set[int], target: Point2, started: int = 0
+    ):
+        self.medivac_tag: int = medivac_tag
+        self.mine_tags: set[int] = mine_tags
+        self.target: Point2 = target
+        self.started: int = started
+
+
+class DropTracker:
+    """Track mine drops without scanning the army every step.
+
+    Units are added and removed from `on_unit_created` and
+    `on_unit_destroyed`, and the drop roles are tracked for every role change
+    made through `assign_role`. Dropping units only ever change role through
+    here, so per step lookups cost as much as the units in the drop, and
+    updates as much as the units that changed.
+
+    Parameters
+    ----------
+    mediator : ManagerMediator
+        Used to assign the roles.
+    """
+
+    __slots__ = (
+        "mediator",
+        "drops",
+        "medivac_tags",
+        "mine_tags",
+        "_drop_of_mine",
+        "_role_of",
+        "_tags_by_role",
+    )
+
+    def __init__(self, mediator: ManagerMediator):
+        self.mediator: ManagerMediator = mediator
+        # medivac tag to its drop
+        self.drops: dict[int, MineDrop] = dict()
+        # every own medivac and widow mine alive, in a drop or not
+        self.medivac_tags: set[int] = set()
+        self.mine_tags: set[int] = set()
+        self._drop_of_mine: dict[int, MineDrop] = dict()
+        self._role_of: dict[int, UnitRole] = dict()
+        self._tags_by_role: dict[UnitRole, set[int]] = {
+            role: set() for role in DROP_ROLES
+        }
+
+    @property
+    def dropping_tags(self) -> set[int]:
+        """Every unit currently in a drop role."""
+        return set(self._role_of)
+
+    @property
+    def active_drops(self) -> list[MineDrop]:
+        """Drops whose medivac is still carrying out the drop."""
+        return [
+            drop
+            for drop in self.drops.values()
+            if self._role_of.get(drop.medivac_tag) == UnitRole.DROP_SHIP
+        ]
+
+    def add_drop(
+        self,
+        medivac_tag: int,
+        mine_tags: Iterable[int],
+        target: Point2,
+        started: int = 0,
+    ) -> MineDrop:
+        """Start a drop, assigning the medivac and mines their roles."""
+        mine_tags = set(mine_tags)
+        drop: MineDrop = MineDrop(medivac_tag, mine_tags, target, started)
+        self.drops[medivac_tag] = drop
+        for tag in mine_tags:
+            self._drop_of_mine[tag] = drop
+        self.assign_role((medivac_tag,), UnitRole.DROP_SHIP)
+        self.assign_role(mine_tags, UnitRole.DROP_UNITS_TO_LOAD)
+        return drop
+
+    def remove_drop(self, medivac_tag: int) -> Optional[MineDrop]:
+        """Forget a drop, the roles of its units are left as they are."""
+        drop: Optional[MineDrop] = self.drops.pop(medivac_tag, None)
+        if drop:
+            for tag in drop.mine_tags:
+                self._drop_of_mine.pop(tag, None)
+        return drop
+
+    def drop_of_mine(self, mine_tag: int) -> Optional[MineDrop]:
+        return self._drop_of_mine.get(mine_tag)
+
+    def assign_role(self, tags: Iterable[int], role: UnitRole) -> None:
+        """Assign `role` to `tags` and track the change.
+
+        Parameters
+        ----------
+        tags :
+            Units changing role.
+        role :
+            The new role, units leaving the drop roles are no longer tracked.
+        """
+        tags = set(tags)
+        if not tags:
+            return
+        self.mediator.batch_assign_role(tags=tags, role=role)
+        for tag in tags:
+            self._set_role(tag, role)
+
+    def role_of(self, tag: int) -> Optional[UnitRole]:
+        return self._role_of.get(tag)
+
+    def tags_with_role(self, role: UnitRole) -> set[int]:
+        """Units in drop role `role`, don't modify the result."""
+        return self._tags_by_role[role]
+
+    def mines_with_role(self, drop: MineDrop, role: UnitRole) -> set[int]:
+        return drop.mine_tags & self._tags_by_role[role]
+
+    def on_unit_created(self, unit: Unit) -> None:
+        if unit.type_id == UnitID.MEDIVAC:
+            self.medivac_tags.add(unit.tag)
+        elif unit.type_id in MINE_TYPES:
+            self.mine_tags.add(unit.tag)
+
+    def on_unit_destroyed(self, unit_tag: int) -> None:
+        self.medivac_tags.discard(unit_tag)
+        self.mine_tags.discard(unit_tag)
+        self._set_role(unit_tag, None)
+        if drop := self._drop_of_mine.pop(unit_tag, None):
+            drop.mine_tags.discard(unit_tag)
+
+    def _set_role(self, tag: int, role: Optional[UnitRole]) -> None:
+        if (previous := self._role_of.pop(tag, None)) is not None:
+            self._tags_by_role[previous].discard(tag)
+        if role in self._tags_by_role:
+            self._role_of[tag] = role
+            self._tags_by_role[role].add(tag)
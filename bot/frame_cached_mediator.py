@@ -0,0 +1,162 @@
+"""Frame scoped caching in front of the ares `ManagerMediator`."""
+from collections import defaultdict
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Optional
+
+from ares import ManagerMediator
+from loguru import logger
+
+from bot.replay.recorder import CALL, PROPERTY
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+    from bot.replay.recorder import FrameRecorder
+
+# mediator properties that don't change within a frame unless we write something
+CACHED_PROPERTIES: frozenset[str] = frozenset(
+    {
+        "get_enemy_fliers",
+        "get_enemy_nat",
+        "get_ground_enemy_near_bases",
+        "get_main_ground_threats_near_townhall",
+        "get_own_army_dict",
+        "get_own_expansions",
+        "get_own_nat",
+        "get_own_structures_dict",
+    }
+)
+# mediator methods whose result only depends on their arguments within a frame
+CACHED_METHODS: frozenset[str] = frozenset(
+    {
+        "get_units_from_role",
+        "get_units_from_roles",
+    }
+)
+# mediator methods that modify state, calling any of these clears the cache
+INVALIDATING_METHODS: frozenset[str] = frozenset(
+    {
+        "assign_role",
+        "batch_assign_role",
+        "clear_role",
+        "remove_worker_from_mineral",
+        "select_worker",
+        "switch_roles",
+        "update_unit_to_ability_dict",
+    }
+)
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn an argument into something usable in a cache key."""
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class FrameCachedMediator:
+    """Cache pure `ManagerMediator` queries for the rest of the frame.
+
+    Drop in replacement for the mediator passed to phobos managers. Anything
+    not listed in `CACHED_PROPERTIES`, `CACHED_METHODS` or
+    `INVALIDATING_METHODS` is passed straight through to the real mediator.
+
+    Parameters
+    ----------
+    mediator : ManagerMediator
+        The real mediator.
+    ai : AresBot
+        Bot object that will be running the game
+
+    Attributes
+    ----------
+    recorder : Optional[FrameRecorder]
+        When set, every lookup and its result is recorded for replaying.
+    """
+
+    def __init__(self, mediator: ManagerMediator, ai: "AresBot"):
+        self._mediator: ManagerMediator = mediator
+        self._ai: "AresBot" = ai
+        self._frame: int = -1
+        self._cache: dict[Hashable, Any] = dict()
+        self._hits: defaultdict[str, int] = defaultdict(int)
+        self._misses: defaultdict[str, int] = defaultdict(int)
+        self.recorder: Optional["FrameRecorder"] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self.recorder is None:
+            return self._lookup(name)
+
+        value: Any = self._lookup(name)
+        if callable(value):
+            return partial(self._recorded_call, name, value)
+        self.recorder.record_query(PROPERTY, name, (), {}, value)
+        return value
+
+    def _lookup(self, name: str) -> Any:
+        if name in CACHED_PROPERTIES:
+            return self._get_cached(name, name, partial(getattr, self._mediator, name))
+        if name in CACHED_METHODS:
+            return partial(self._cached_call, name)
+        if name in INVALIDATING_METHODS:
+            return partial(self._invalidating_call, name)
+        return getattr(self._mediator, name)
+
+    @property
+    def hit_rates(self) -> dict[str, float]:
+        """Fraction of lookups served from the cache, per query."""
+        return {
+            name: self._hits[name] / (self._hits[name] + self._misses[name])
+            for name in {*self._hits, *self._misses}
+        }
+
+    def log_hit_rates(self) -> None:
+        for name, hit_rate in sorted(self.hit_rates.items()):
+            logger.info(
+                f"Mediator cache {name}: {hit_rate:.1%} of "
+                f"{self._hits[name] + self._misses[name]} lookups"
+            )
+
+    def invalidate(self) -> None:
+        """Drop everything cached so far this frame."""
+        self._cache.clear()
+
+    def _get_cached(self, name: str, key: Hashable, query: Callable) -> Any:
+        frame: int = self._ai.state.game_loop
+        if frame != self._frame:
+            self._frame = frame
+            self._cache.clear()
+
+        if key in self._cache:
+            self._hits[name] += 1
+            return self._cache[key]
+
+        self._misses[name] += 1
+        value: Any = query()
+        self._cache[key] = value
+        return value
+
+    def _cached_call(self, name: str, *args, **kwargs) -> Any:
+        method: Callable = getattr(self._mediator, name)
+        try:
+            key: Hashable = (
+                name,
+                _freeze(args),
+                frozenset((k, _freeze(v)) for k, v in kwargs.items()),
+            )
+            hash(key)
+        except TypeError:
+            # unhashable arguments, nothing we can cache on
+            return method(*args, **kwargs)
+        return self._get_cached(name, key, partial(method, *args, **kwargs))
+
+    def _recorded_call(self, name: str, method: Callable, *args, **kwargs) -> Any:
+        value: Any = method(*args, **kwargs)
+        self.recorder.record_query(CALL, name, args, kwargs, value)
+        return value
+
+    def _invalidating_call(self, name: str, *args, **kwargs) -> Any:
+        self._cache.clear()
+        return getattr(self._mediator, name)(*args, **kwargs)
@@ -1,20 +1,36 @@
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter_ns
 from typing import Any, Optional
 
 from ares import AresBot, Hub, ManagerMediator
+from ares.behaviors.behavior import Behavior
 from ares.behaviors.macro import Mining, SpawnController
 from ares.consts import UnitRole
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.data import Result
 from sc2.ids.ability_id import AbilityId
 from sc2.ids.unit_typeid import UnitTypeId as UnitID
 from sc2.unit import Unit
 
 from ares.cython_extensions.geometry import cy_distance_to
+from bot.command_filter import CommandFilter
 from bot.consts import NON_COMBAT_UNIT_TYPES
-from bot.managers.combat_manager import CombatManager
-from bot.managers.drop_manager import DropManager
-from bot.managers.orbital_manager import OrbitalManager
-from bot.managers.reaper_harass_manager import ReaperHarassManager
-from bot.managers.scout_manager import ScoutManager
-from bot.managers.worker_defence_manager import WorkerDefenceManager
+from bot.drop_tracker import DropTracker
+from bot.frame_cached_mediator import FrameCachedMediator
+from bot.manager_setup import PhobosManagers, create_managers
+from bot.managers.game_step_manager import GameStepManager
+from bot.managers.manager_scheduler import ManagerScheduler
+from bot.managers.planning_manager import PlanningManager
+from bot.profiling.sampling_profiler import SamplingProfiler
+from bot.profiling.step_profiler import StepProfiler
+from bot.profiling.step_tracer import StepTracer
+from bot.replay.recorder import FrameRecorder
+from bot.step_watchdog import StepWatchdog
+
+# timing reports are stored alongside the other game data
+PROFILE_REPORT_DIR: Path = Path(__file__).parent.parent / "data" / "profiles"
+RECORDING_DIR: Path = Path(__file__).parent.parent / "data" / "recordings"
 
 
 class MyBot(AresBot):
@@ -38,14 +54,46 @@ class MyBot(AresBot):
             UnitID.SIEGETANK: {"proportion": 0.1, "priority": 1},
         }
         self.spawn_controller_active: bool = False
+        self.cached_mediator: Optional[FrameCachedMediator] = None
+        self.manager_scheduler: Optional[ManagerScheduler] = None
+        self.step_profiler: Optional[StepProfiler] = None
+        self.sampling_profiler: Optional[SamplingProfiler] = None
+        self.game_step_manager: Optional[GameStepManager] = None
+        self.planning_manager: Optional[PlanningManager] = None
+        self.drop_tracker: Optional[DropTracker] = None
+        self.recorder: Optional[FrameRecorder] = None
+        self.game_name: str = "local"
+        self.step_watchdog: StepWatchdog = StepWatchdog(self.config)
+        self.command_filter: CommandFilter = CommandFilter(self, self.config)
 
     async def on_start(self) -> None:
+        opponent_id: str = getattr(self, "opponent_id", None) or "local"
+        self.game_name = f"{opponent_id}_{datetime.now():%Y%m%d_%H%M%S}"
+        # start before the managers are initialised, so their queries are included
+        if self.config.get("Recording", {}).get("Enabled", False):
+            await self._start_recording()
+
         await super(MyBot, self).on_start()
 
         self.opening_build = self.build_order_runner.chosen_opening
+        if self.recorder:
+            self.recorder.add_info(opening=self.opening_build)
+
+        profiling_config: dict = self.config.get("Profiling", {})
+        if profiling_config.get("Sampling", False):
+            self.sampling_profiler = SamplingProfiler(
+                profiling_config.get("SampleIntervalMs", 5.0)
+            )
+            self.sampling_profiler.start()
 
     async def on_step(self, iteration: int) -> None:
+        self.step_watchdog.start_step()
+        if self.sampling_profiler:
+            self.sampling_profiler.active = True
+        step_start: int = perf_counter_ns()
         await super(MyBot, self).on_step(iteration)
+        if self.step_profiler:
+            self.step_profiler.record("AresBot.on_step", step_start, perf_counter_ns())
 
         self.register_behavior(Mining())
         if self.spawn_controller_active:
@@ -59,35 +107,139 @@ class MyBot(AresBot):
             for depot in self.structures(UnitID.SUPPLYDEPOT):
                 depot(AbilityId.MORPH_SUPPLYDEPOT_LOWER)
 
+        self.command_filter.filter(self.actions)
+        step_end: int = perf_counter_ns()
+        if self.recorder:
+            self.recorder.end_frame(self.actions)
+        if self.game_step_manager:
+            self.game_step_manager.record_step_time((step_end - step_start) / 1e6)
+        if self.step_profiler:
+            self.step_profiler.record("MyBot.on_step", step_start, step_end)
+        if self.sampling_profiler:
+            self.sampling_profiler.active = False
+        self.step_watchdog.end_step()
+
     async def register_managers(self) -> None:
         """
         Override the default `register_managers` in Ares, so we can
         add our own managers.
         """
         manager_mediator = ManagerMediator()
+        # phobos managers share a frame scoped cache in front of the mediator
+        mediator = FrameCachedMediator(manager_mediator, self)
+        mediator.recorder = self.recorder
+        self.cached_mediator = mediator
+        managers: PhobosManagers = create_managers(
+            self, self.config, mediator, self.step_watchdog
+        )
+        self.planning_manager = managers.planning
+        self.game_step_manager = managers.game_step
+        self.manager_scheduler = managers.scheduler
+        self.drop_tracker = managers.drop_tracker
 
         self.manager_hub = Hub(
             self,
             self.config,
             manager_mediator,
-            additional_managers=[
-                CombatManager(self, self.config, manager_mediator),
-                DropManager(self, self.config, manager_mediator),
-                OrbitalManager(self, self.config, manager_mediator),
-                ReaperHarassManager(self, self.config, manager_mediator),
-                ScoutManager(self, self.config, manager_mediator),
-                WorkerDefenceManager(self, self.config, manager_mediator),
-            ],
+            additional_managers=managers.update_order,
         )
 
+        profiling_config: dict = self.config.get("Profiling", {})
+        if profiling_config.get("Enabled", False):
+            tracer: Optional[StepTracer] = (
+                StepTracer(profiling_config.get("MaxTraceSpans", 2_000_000))
+                if profiling_config.get("Trace", False)
+                else None
+            )
+            self.step_profiler = StepProfiler(PROFILE_REPORT_DIR, tracer=tracer)
+            self.step_profiler.instrument_managers(
+                [
+                    *getattr(self.manager_hub, "managers", []),
+                    *managers.all_managers,
+                ]
+            )
+            self.step_profiler.instrument_combat_classes()
+
         await self.manager_hub.init_managers()
 
+    def register_behavior(self, behavior: Behavior) -> None:
+        start: int = perf_counter_ns()
+        if self.recorder:
+            # as `AresBot.register_behavior`, but through the cached mediator
+            # so the behavior's queries are recorded as well
+            behavior.execute(self, self.config, self.cached_mediator)
+        else:
+            super(MyBot, self).register_behavior(behavior)
+        if self.step_profiler:
+            self.step_profiler.record(
+                f"Behavior/{type(behavior).__name__}", start, perf_counter_ns()
+            )
+
+    async def _start_recording(self) -> None:
+        """Record every frame for replaying the managers outside the game."""
+        game_info: sc_pb.Response = await self.client._execute(
+            game_info=sc_pb.RequestGameInfo()
+        )
+        game_data: sc_pb.Response = await self.client._execute(
+            data=sc_pb.RequestData(
+                ability_id=True,
+                unit_type_id=True,
+                upgrade_id=True,
+                buff_id=True,
+                effect_id=True,
+            )
+        )
+        self.recorder = FrameRecorder(RECORDING_DIR / f"{self.game_name}.rec", self)
+        self.recorder.start(
+            game_info.game_info.SerializeToString(),
+            game_data.data.SerializeToString(),
+            {"name": self.game_name, "player_id": self.player_id},
+        )
+
     async def on_unit_created(self, unit: Unit) -> None:
         await super(MyBot, self).on_unit_created(unit)
+        if self.drop_tracker:
+            self.drop_tracker.on_unit_created(unit)
 
         # assign all units to ATTACKING role by default
         if unit.type_id not in NON_COMBAT_UNIT_TYPES:
-            self.mediator.assign_role(tag=unit.tag, role=UnitRole.ATTACKING)
+            self.cached_mediator.assign_role(tag=unit.tag, role=UnitRole.ATTACKING)
+
+    async def on_unit_destroyed(self, unit_tag: int) -> None:
+        await super(MyBot, self).on_unit_destroyed(unit_tag)
+        if self.drop_tracker:
+            self.drop_tracker.on_unit_destroyed(unit_tag)
+
+    async def on_end(self, game_result: Result) -> None:
+        await super(MyBot, self).on_end(game_result)
+
+        if self.planning_manager:
+            self.planning_manager.shutdown()
+
+        if self.cached_mediator:
+            self.cached_mediator.log_hit_rates()
+        if self.manager_scheduler:
+            self.manager_scheduler.log_timings()
+        self.step_watchdog.log_tier_counts()
+        self.command_filter.log_summary()
+        if self.recorder:
+            self.recorder.close()
+        if self.step_profiler:
+            self.step_profiler.write_report(
+                {
+                    "name": self.game_name,
+                    "opponent_id": getattr(self, "opponent_id", None) or "local",
+                    "map": self.game_info.map_name,
+                    "result": game_result.name,
+                    "game_loop": self.state.game_loop,
+                    "game_step": self.client.game_step,
+                    "command_filter": self.command_filter.summary(),
+                }
+            )
+        if self.sampling_profiler:
+            self.sampling_profiler.write(
+                PROFILE_REPORT_DIR / f"{self.game_name}.collapsed.txt"
+            )
 
     async def on_building_construction_complete(self, unit: Unit) -> None:
         await super(MyBot, self).on_building_construction_complete(unit)
@@ -109,4 +261,4 @@ class MyBot(AresBot):
                 if cy_distance_to(scv.position, unit.position) < 2.6
             ]
             for scv in scvs:
-                self.mediator.assign_role(tag=scv.tag, role=UnitRole.GATHERING)
+                self.cached_mediator.assign_role(tag=scv.tag, role=UnitRole.GATHERING)
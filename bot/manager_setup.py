@@ -0,0 +1,183 @@
+"""Build the phobos managers, shared by `MyBot` and the replay harness."""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from ares.managers.manager import Manager
+
+from bot.drop_tracker import DropTracker
+from bot.managers.combat_manager import CombatManager
+from bot.managers.dead_space_manager import DeadSpaceManager
+from bot.managers.drop_manager import DropManager
+from bot.managers.drop_target_manager import DropTargetManager
+from bot.managers.enemy_motion_manager import EnemyMotionManager
+from bot.managers.flow_field_manager import FlowFieldManager
+from bot.managers.game_step_manager import GameStepManager
+from bot.managers.manager_scheduler import ManagerScheduler
+from bot.managers.orbital_manager import OrbitalManager
+from bot.managers.path_cache_manager import PathCacheManager
+from bot.managers.planning_manager import PlanningManager
+from bot.managers.reaper_harass_manager import ReaperHarassManager
+from bot.managers.scout_manager import ScoutManager
+from bot.managers.unit_proximity_manager import UnitProximityManager
+from bot.managers.unit_snapshot_manager import UnitSnapshotManager
+from bot.managers.worker_cluster_manager import WorkerClusterManager
+from bot.managers.worker_defence_manager import WorkerDefenceManager
+from bot.step_watchdog import StepWatchdog
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+
+@dataclass
+class PhobosManagers:
+    """The phobos managers, in the order they should be updated."""
+
+    unit_snapshot: UnitSnapshotManager
+    unit_proximity: UnitProximityManager
+    enemy_motion: EnemyMotionManager
+    planning: PlanningManager
+    path_cache: PathCacheManager
+    flow_field: FlowFieldManager
+    drop_targets: DropTargetManager
+    worker_clusters: WorkerClusterManager
+    dead_space: DeadSpaceManager
+    game_step: GameStepManager
+    scheduler: ManagerScheduler
+    # not a manager, kept current from unit events by the bot
+    drop_tracker: DropTracker
+
+    @property
+    def update_order(self) -> list[Manager]:
+        """Shared services first, then the scheduled gameplay managers."""
+        return [
+            self.unit_snapshot,
+            self.unit_proximity,
+            self.enemy_motion,
+            self.planning,
+            self.path_cache,
+            self.flow_field,
+            self.drop_targets,
+            self.worker_clusters,
+            self.dead_space,
+            self.game_step,
+            self.scheduler,
+        ]
+
+    @property
+    def all_managers(self) -> list[Manager]:
+        """Every manager, including the ones run by the scheduler."""
+        return [*self.update_order[:-1], *self.scheduler.managers]
+
+
+def create_managers(
+    ai: "AresBot", config: dict, mediator: Any, watchdog: StepWatchdog
+) -> PhobosManagers:
+    """Create the phobos managers and wire up the services they share.
+
+    Parameters
+    ----------
+    ai :
+        Bot object that will be running the game
+    config :
+        Dictionary with the data from the configuration file
+    mediator :
+        What the managers query, the `FrameCachedMediator` in a real game.
+    watchdog :
+        Step time watchdog the managers degrade against.
+
+    Returns
+    -------
+    PhobosManagers :
+        The managers, not yet initialised.
+    """
+    # shared services, these are updated before the managers that use them
+    unit_snapshot = UnitSnapshotManager(ai, config, mediator)
+    unit_proximity = UnitProximityManager(
+        ai, config, mediator, unit_snapshot=unit_snapshot
+    )
+    enemy_motion = EnemyMotionManager(ai, config, mediator)
+    planning = PlanningManager(ai, config, mediator)
+    path_cache = PathCacheManager(ai, config, mediator, watchdog=watchdog)
+    flow_field = FlowFieldManager(
+        ai, config, mediator, watchdog=watchdog, planner=planning
+    )
+    drop_targets = DropTargetManager(
+        ai,
+        config,
+        mediator,
+        unit_snapshot=unit_snapshot,
+        flow_field=flow_field,
+        watchdog=watchdog,
+    )
+    worker_clusters = WorkerClusterManager(
+        ai, config, mediator, unit_snapshot=unit_snapshot
+    )
+    dead_space = DeadSpaceManager(ai, config, mediator)
+    game_step = GameStepManager(ai, config, mediator, unit_proximity=unit_proximity)
+    drop_tracker = DropTracker(mediator)
+
+    # gameplay managers run at their own cadence within a step time budget
+    scheduler = ManagerScheduler(
+        ai,
+        config,
+        mediator,
+        managers=[
+            CombatManager(
+                ai,
+                config,
+                mediator,
+                unit_snapshot=unit_snapshot,
+                unit_proximity=unit_proximity,
+                flow_field=flow_field,
+            ),
+            DropManager(
+                ai,
+                config,
+                mediator,
+                unit_snapshot=unit_snapshot,
+                drop_tracker=drop_tracker,
+                drop_targets=drop_targets,
+                worker_clusters=worker_clusters,
+                dead_space=dead_space,
+                path_cache=path_cache,
+                planner=planning,
+            ),
+            OrbitalManager(ai, config, mediator, unit_snapshot=unit_snapshot),
+            ReaperHarassManager(
+                ai,
+                config,
+                mediator,
+                unit_snapshot=unit_snapshot,
+                unit_proximity=unit_proximity,
+                enemy_motion=enemy_motion,
+                path_cache=path_cache,
+                flow_field=flow_field,
+                watchdog=watchdog,
+                planner=planning,
+            ),
+            ScoutManager(ai, config, mediator, unit_proximity=unit_proximity),
+            WorkerDefenceManager(
+                ai,
+                config,
+                mediator,
+                unit_snapshot=unit_snapshot,
+                unit_proximity=unit_proximity,
+            ),
+        ],
+        watchdog=watchdog,
+    )
+
+    return PhobosManagers(
+        unit_snapshot=unit_snapshot,
+        unit_proximity=unit_proximity,
+        enemy_motion=enemy_motion,
+        planning=planning,
+        path_cache=path_cache,
+        flow_field=flow_field,
+        drop_targets=drop_targets,
+        worker_clusters=worker_clusters,
+        dead_space=dead_space,
+        game_step=game_step,
+        scheduler=scheduler,
+        drop_tracker=drop_tracker,
+    )
@@ -1,5 +1,5 @@
 from itertools import cycle
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from ares import ManagerMediator
 from ares.behaviors.combat.individual import DropCargo
@@ -10,18 +10,38 @@ from ares.managers.manager import Manager
 from sc2.ids.ability_id import AbilityId
 from sc2.ids.unit_typeid import UnitTypeId as UnitID
 from sc2.position import Point2
+from sc2.unit import Unit
 from sc2.units import Units
 
+from bot.consts import GridKind, ManagerPriority
+from bot.managers.flow_field_manager import FlowFieldManager
+from bot.managers.unit_proximity_manager import UnitProximityManager
+from bot.managers.unit_snapshot_manager import UnitSnapshot, UnitSnapshotManager
+
 if TYPE_CHECKING:
     from ares import AresBot
 
 
 class CombatManager(Manager):
+    # cadence for `ManagerScheduler`
+    UPDATE_PERIOD: int = 1
+    UPDATE_PRIORITY: ManagerPriority = ManagerPriority.HIGH
+    UPDATE_BUDGET_MS: float = 4.0
+
+    # ground units further than this from the attack target follow the flow field
+    FLOW_FIELD_DISTANCE: float = 25.0
+    FLOW_FIELD_LOOKAHEAD: int = 12
+    # a flow field waypoint is kept until the unit gets this close to it
+    WAYPOINT_REACHED_DISTANCE: float = 3.0
+
     def __init__(
         self,
         ai: "AresBot",
         config: dict,
         mediator: ManagerMediator,
+        unit_snapshot: UnitSnapshotManager,
+        unit_proximity: UnitProximityManager,
+        flow_field: Optional[FlowFieldManager] = None,
     ) -> None:
         """Handle all main combat logic.
 
@@ -37,8 +57,19 @@ class CombatManager(Manager):
             Dictionary with the data from the configuration file
         mediator :
             ManagerMediator used for getting information from other managers.
+        unit_snapshot :
+            Provides the columnar unit snapshot for the current step.
+        unit_proximity :
+            Provides the enemies near each of our units for the current step.
+        flow_field :
+            Shared flow fields, used to route the army to the attack target.
         """
         super().__init__(ai, config, mediator)
+        self._unit_snapshot: UnitSnapshotManager = unit_snapshot
+        self._unit_proximity: UnitProximityManager = unit_proximity
+        self.flow_field: Optional[FlowFieldManager] = flow_field
+        # unit tag -> (attack target, flow field waypoint towards it)
+        self._waypoints: dict[int, tuple[Point2, Point2]] = dict()
         self.expansions_generator = None
         self.current_base_target: Point2 = self.ai.enemy_start_locations[0]
         self.commenced_a_move: bool = False
@@ -96,13 +127,12 @@ class CombatManager(Manager):
         # everything we have no logic for yet gets a-moved
         # this should all go in combat classes eventually
         target: Point2 = self.attack_target
-        ground, flying = self.ai.split_ground_fliers(attackers)
+        snapshot: UnitSnapshot = self._unit_snapshot.snapshot
+        ground: Units = snapshot.select(attackers, ~snapshot.is_flying)
+        flying: Units = snapshot.select(attackers, snapshot.is_flying)
 
-        ground_enemy: dict[int, Units] = self.manager_mediator.get_units_in_range(
-            start_points=ground,
-            distances=15,
-            query_tree=UnitTreeQueryType.EnemyGround,
-            return_as_dict=True,
+        ground_enemy: dict[int, Units] = self._unit_proximity.get_enemy_near(
+            ground, UnitTreeQueryType.EnemyGround
         )
 
         for u in ground:
@@ -116,7 +146,14 @@ class CombatManager(Manager):
             elif u.type_id == UnitID.SIEGETANKSIEGED and not near_ground:
                 u(AbilityId.UNSIEGE_UNSIEGE)
             else:
-                u.attack(target)
+                u.attack(self._get_attack_waypoint(u, target))
+
+        ground_tags: set[int] = ground.tags
+        self._waypoints = {
+            tag: waypoint
+            for tag, waypoint in self._waypoints.items()
+            if tag in ground_tags
+        }
 
         for u in flying:
             if u.has_cargo and self.ai.in_pathing_grid(u.position):
@@ -125,6 +162,48 @@ class CombatManager(Manager):
             elif ground:
                 u.move(cy_closest_to(target, ground))
 
+    def _get_attack_waypoint(self, unit: Unit, target: Point2) -> Point2:
+        """Where a ground unit should a-move to, to get to `target`.
+
+        Far away units a-move along the shared flow field on the non-influence
+        ground grid, so the whole army reads one field instead of pathing alone.
+        A waypoint is kept until the unit is within `WAYPOINT_REACHED_DISTANCE`
+        of it, so the same attack command isn't sent again every step.
+
+        Parameters
+        ----------
+        unit :
+            The unit to move.
+        target :
+            The army attack target.
+
+        Returns
+        -------
+        Point2 :
+            Position to a-move to.
+        """
+        position: Point2 = unit.position
+        if (
+            not self.flow_field
+            or cy_distance_to(position, target) <= self.FLOW_FIELD_DISTANCE
+        ):
+            return target
+
+        if (previous := self._waypoints.get(unit.tag)) and previous[0] == target:
+            if cy_distance_to(position, previous[1]) > self.WAYPOINT_REACHED_DISTANCE:
+                return previous[1]
+
+        if waypoint := self.flow_field.get_next_waypoint(
+            position=position,
+            destination=target,
+            grid=self.manager_mediator.get_cached_ground_grid,
+            grid_kind=GridKind.CACHED_GROUND,
+            lookahead=self.FLOW_FIELD_LOOKAHEAD,
+        ):
+            self._waypoints[unit.tag] = (target, waypoint)
+            return waypoint
+        return target
+
     def _handle_defenders(self):
         defenders: Units = self.manager_mediator.get_units_from_role(
             role=UnitRole.DEFENDING
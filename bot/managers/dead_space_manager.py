@@ -0,0 +1,207 @@
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from ares import ManagerMediator
+from ares.managers.manager import Manager
+from loguru import logger
+from sc2.position import Point2
+from scipy.ndimage import distance_transform_edt
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+# hover spots are worked out once per map and kept here
+CACHE_DIR: Path = Path(__file__).parent.parent.parent / "data" / "dead_space"
+# bump when the way spots are found changes, to ignore old cache files
+CACHE_VERSION: int = 1
+
+
+class DeadSpaceManager(Manager):
+    # spots ground units can't get within this distance of
+    MIN_GROUND_DISTANCE: float = 4.0
+    # spots further than this from a base aren't kept for it
+    MAX_BASE_DISTANCE: float = 20.0
+    SPOTS_PER_BASE: int = 16
+    # spots are ranked on distance to the base plus this much per cell
+    # of distance to the map edge
+    EDGE_DISTANCE_WEIGHT: float = 0.5
+    # highest air grid cost of a spot still safe to hover at
+    SAFE_COST: float = 1.0
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+    ) -> None:
+        """Find dead space near every base for drop ships to wait in.
+
+        Dead space is any cell air units can reach but ground units can't
+        walk or build on. At startup, each base gets up to `SPOTS_PER_BASE`
+        of these cells that ground units can't get near, ranked by distance
+        to the base and to the map edge. Spots are saved per map to
+        `CACHE_DIR` and loaded from there in later games. Finding a hover
+        spot is then a lookup of the nearest base's spots, filtered by the
+        current air grid.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._bases: np.ndarray = np.empty((0, 2))
+        # ranked spots of every base one after the other, base `i` owns
+        # `_spots[_offsets[i] : _offsets[i + 1]]`
+        self._spots: np.ndarray = np.empty((0, 2), dtype=int)
+        self._offsets: np.ndarray = np.zeros(1, dtype=int)
+
+    async def initialise(self) -> None:
+        bases: np.ndarray = np.array(
+            self.ai.expansion_locations_list, dtype=float
+        ).reshape(-1, 2)
+        air_grid: np.ndarray = self.manager_mediator.get_air_grid
+        cache_file: Path = CACHE_DIR / (
+            re.sub(r"\W+", "_", self.ai.game_info.map_name) + ".npz"
+        )
+        if not self._load(cache_file, bases, air_grid.shape):
+            self._spots, self._offsets = self._find_spots(bases, air_grid)
+            self._save(cache_file, bases, air_grid.shape)
+        self._bases = bases
+
+    async def update(self, iteration: int) -> None:
+        # spots are fixed for the game, see `initialise`
+        pass
+
+    def hover_spot(self, near: Point2, air_grid: np.ndarray) -> Optional[Point2]:
+        """Best dead space spot of the base closest to `near` that's safe now.
+
+        Parameters
+        ----------
+        near :
+            Where the drop ship wants to be, usually its drop target.
+        air_grid :
+            The current air grid.
+
+        Returns
+        -------
+        Optional[Point2] :
+            The spot, None if that base has no safe dead space.
+        """
+        if not len(self._bases):
+            return None
+        base: int = int(
+            np.argmin(np.sum((self._bases - np.array(near, dtype=float)) ** 2, axis=1))
+        )
+        spots: np.ndarray = self._spots[self._offsets[base] : self._offsets[base + 1]]
+        if not len(spots):
+            return None
+        safe: np.ndarray = air_grid[spots[:, 0], spots[:, 1]] <= self.SAFE_COST
+        if not safe.any():
+            return None
+        x, y = spots[int(np.argmax(safe))].tolist()
+        return Point2((x + 0.5, y + 0.5))
+
+    def _find_spots(
+        self, bases: np.ndarray, air_grid: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Rank the dead space around every base.
+
+        Parameters
+        ----------
+        bases :
+            Base locations.
+        air_grid :
+            Air grid at the start of the game, to tell where air units can go.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray] :
+            Every base's ranked spots one after the other, and where each
+            base's spots start.
+        """
+        air_pathable: np.ndarray = np.isfinite(air_grid) & (air_grid > 0)
+        # game info grids are indexed [y, x]
+        ground_usable: np.ndarray = (
+            self.ai.game_info.pathing_grid.data_numpy.T.astype(bool)
+            | self.ai.game_info.placement_grid.data_numpy.T.astype(bool)
+        )[: air_grid.shape[0], : air_grid.shape[1]]
+        ground_distance: np.ndarray = distance_transform_edt(~ground_usable)
+        edge_distance: np.ndarray = distance_transform_edt(air_pathable)
+        dead_space: np.ndarray = (
+            air_pathable
+            & ~ground_usable
+            & (ground_distance >= self.MIN_GROUND_DISTANCE)
+        )
+
+        cells: np.ndarray = np.argwhere(dead_space)
+        base_distances: np.ndarray = np.sqrt(
+            np.sum((cells[None, :, :] + 0.5 - bases[:, None, :]) ** 2, axis=2)
+        )
+        ranks: np.ndarray = (
+            base_distances
+            + self.EDGE_DISTANCE_WEIGHT * edge_distance[cells[:, 0], cells[:, 1]]
+        )
+        ranks[base_distances > self.MAX_BASE_DISTANCE] = np.inf
+
+        spots: list[np.ndarray] = []
+        for base_ranks in ranks:
+            best: np.ndarray = np.argsort(base_ranks, kind="stable")[
+                : self.SPOTS_PER_BASE
+            ]
+            spots.append(cells[best[np.isfinite(base_ranks[best])]])
+        offsets: np.ndarray = np.concatenate(
+            [[0], np.cumsum([len(s) for s in spots])]
+        ).astype(int)
+        return np.concatenate([np.empty((0, 2), dtype=int), *spots]), offsets
+
+    def _parameters(self, bases: np.ndarray, shape: tuple[int, ...]) -> np.ndarray:
+        """Everything the spots depend on, to check a cache file against."""
+        return np.array(
+            [
+                CACHE_VERSION,
+                *shape,
+                self.MIN_GROUND_DISTANCE,
+                self.MAX_BASE_DISTANCE,
+                self.SPOTS_PER_BASE,
+                self.EDGE_DISTANCE_WEIGHT,
+                *bases.ravel(),
+            ],
+            dtype=float,
+        )
+
+    def _load(self, path: Path, bases: np.ndarray, shape: tuple[int, ...]) -> bool:
+        """Load the spots for this map, if they were saved for the same setup."""
+        if not path.is_file():
+            return False
+        try:
+            with np.load(path) as cache:
+                if not np.array_equal(
+                    cache["parameters"], self._parameters(bases, shape)
+                ):
+                    return False
+                self._spots = cache["spots"]
+                self._offsets = cache["offsets"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring dead space cache {path}: {e}")
+            return False
+        return True
+
+    def _save(self, path: Path, bases: np.ndarray, shape: tuple[int, ...]) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(
+                path,
+                parameters=self._parameters(bases, shape),
+                spots=self._spots,
+                offsets=self._offsets,
+            )
+        except OSError as e:
+            logger.warning(f"Couldn't save dead space cache {path}: {e}")
@@ -1,31 +1,57 @@
-from typing import TYPE_CHECKING, Callable
+import heapq
+from typing import TYPE_CHECKING, Optional
 
+import numpy as np
 from sc2.position import Point2
 
 from ares import ManagerMediator
 from ares.consts import DROP_ROLES, UnitRole
-from ares.cython_extensions.geometry import cy_towards
 from ares.managers.manager import Manager
-from sc2.ids.unit_typeid import UnitTypeId as UnitID
 from sc2.unit import Unit
-from sc2.units import Units
 
 from bot.combat.base_unit import BaseUnit
 from bot.combat.medivac_mine_drops import MedivacMineDrops
+from bot.consts import ManagerPriority
+from bot.drop_tracker import DropTracker, MineDrop, PendingDrop
+from bot.managers.dead_space_manager import DeadSpaceManager
+from bot.managers.drop_target_manager import DropTargetManager
+from bot.managers.path_cache_manager import PathCacheManager
+from bot.managers.planning_manager import PlanningManager
+from bot.managers.unit_snapshot_manager import UnitSnapshotManager
+from bot.managers.worker_cluster_manager import WorkerClusterManager
 
 if TYPE_CHECKING:
     from ares import AresBot
 
 
 class DropManager(Manager):
+    # cadence for `ManagerScheduler`
+    UPDATE_PERIOD: int = 1
+    UPDATE_PRIORITY: ManagerPriority = ManagerPriority.NORMAL
+    UPDATE_BUDGET_MS: float = 2.0
+
     # at this percentage, medivac should be unassigned and go home
     MIN_HEALTH_MEDIVAC_PERC: float = 0.2
+    # drops carried out or waiting for units at any one time
+    MAX_CONCURRENT_DROPS: int = 3
+    # a medivac carries up to four mines
+    MIN_MINES_PER_DROP: int = 2
+    MAX_MINES_PER_DROP: int = 4
+    # frames before a drop that found no free units looks again
+    RETRY_FRAMES: int = 22
 
     def __init__(
         self,
         ai: "AresBot",
         config: dict,
         mediator: ManagerMediator,
+        unit_snapshot: UnitSnapshotManager,
+        drop_tracker: DropTracker,
+        drop_targets: DropTargetManager,
+        worker_clusters: Optional[WorkerClusterManager] = None,
+        dead_space: Optional[DeadSpaceManager] = None,
+        path_cache: Optional[PathCacheManager] = None,
+        planner: Optional[PlanningManager] = None,
     ) -> None:
         """Handle all drop related logic.
 
@@ -33,6 +59,10 @@ class DropManager(Manager):
         relevant drop related combat classes to execute all
         drops.
 
+        Drops are planned against the best ranked enemy bases into a queue
+        ordered by readiness, and launched whenever a medivac and enough mines are
+        free, so several drops can run at once.
+
         Parameters
         ----------
         ai :
@@ -41,103 +71,230 @@ class DropManager(Manager):
             Dictionary with the data from the configuration file
         mediator :
             ManagerMediator used for getting information from other managers.
+        unit_snapshot :
+            Provides the columnar unit snapshot for the current step.
+        drop_tracker :
+            The drops and the roles of their units, kept current from events.
+        drop_targets :
+            Ranks the enemy bases to drop.
+        worker_clusters :
+            Finds where dropped mines hit the most workers.
+        dead_space :
+            Dead space near each base for waiting medivacs.
+        path_cache :
+            Shared path cache for drop ship pathing.
+        planner :
+            Runs drop ship safe spot searches off the main step.
         """
         super().__init__(ai, config, mediator)
 
-        self._assigned_111_mine_drop: bool = False
-        # {med_tag : {"mine_tags: {12, 32, 55}, "target": Point2((50.0, 75.5)}}
-        self._medivac_tag_to_mine_tracker: dict[int, dict] = dict()
+        self._unit_snapshot: UnitSnapshotManager = unit_snapshot
+        self.drop_tracker: DropTracker = drop_tracker
+        self._drop_targets: DropTargetManager = drop_targets
+        # heap of drops waiting to launch, soonest ready first
+        self._pending: list[PendingDrop] = []
+        self._drops_planned: int = 0
 
-        self._mine_drops: BaseUnit = MedivacMineDrops(ai, config, mediator)
+        self._mine_drops: BaseUnit = MedivacMineDrops(
+            ai,
+            config,
+            mediator,
+            path_cache=path_cache,
+            planner=planner,
+            worker_clusters=worker_clusters,
+            dead_space=dead_space,
+        )
 
     async def update(self, iteration: int) -> None:
-        self._assign_mine_drops()
-        self._unassign_drops()
-        self._execute_drops()
-
-    def _assign_mine_drops(self) -> None:
+        # drops give up completely if enemy has air-to-air, including fliers
+        # seen earlier that are out of vision now
+        dangerous_fliers: bool = any(
+            u.can_attack_air for u in self.manager_mediator.get_enemy_fliers
+        )
         if (
             "OneOneOne" in self.ai.build_order_runner.chosen_opening
-            and not self._assigned_111_mine_drop
-            and not self.manager_mediator.get_main_ground_threats_near_townhall
+            and not dangerous_fliers
         ):
-            mine_drop_target: Point2 = Point2(
-                cy_towards(
-                    self.ai.enemy_start_locations[0], self.ai.game_info.map_center, -4.0
-                )
+            targets: list[Point2] = [
+                target.position for target in self._drop_targets.ranked_targets()
+            ]
+            self._plan_drops(targets)
+            self._launch_ready_drops(targets)
+        self._unassign_drops(dangerous_fliers)
+        self._execute_drops()
+
+    def _plan_drops(self, targets: list[Point2]) -> None:
+        """Queue a drop on every target not already dropped, up to the limit.
+
+        Parameters
+        ----------
+        targets :
+            Where to drop, most important first.
+        """
+        active: list[MineDrop] = self.drop_tracker.active_drops
+        planned: int = len(self._pending) + len(active)
+        if planned >= self.MAX_CONCURRENT_DROPS:
+            return
+
+        taken: set[Point2] = {d.target for d in self._pending} | {
+            d.target for d in active
+        }
+        frame: int = self.ai.state.game_loop
+        for priority, target in enumerate(targets):
+            if planned >= self.MAX_CONCURRENT_DROPS:
+                break
+            if target in taken:
+                continue
+            heapq.heappush(
+                self._pending,
+                PendingDrop(frame, priority, self._drops_planned, target),
             )
-            unit_dict: dict[UnitID, Units] = self.manager_mediator.get_own_army_dict
+            self._drops_planned += 1
+            planned += 1
 
-            if UnitID.MEDIVAC in unit_dict and (
-                UnitID.WIDOWMINE in unit_dict or UnitID.WIDOWMINEBURROWED in unit_dict
-            ):
-                medivacs: Units = unit_dict[UnitID.MEDIVAC].filter(
-                    lambda m: m.health_percentage > self.MIN_HEALTH_MEDIVAC_PERC
-                )
-                mines: Units = self.ai.units(
-                    {UnitID.WIDOWMINE, UnitID.WIDOWMINEBURROWED}
+    def _launch_ready_drops(self, targets: list[Point2]) -> None:
+        """Give every ready drop a medivac and mines, while there are any free.
+
+        Free units are collected once, and each launch takes the medivac
+        closest to the free mines and the mines closest to that medivac.
+
+        Parameters
+        ----------
+        targets :
+            Current drop targets, pending drops on anything else are dropped.
+        """
+        frame: int = self.ai.state.game_loop
+        if not self._pending or self._pending[0].ready_frame > frame:
+            return
+        # keep the mines home while they're needed there
+        if self.manager_mediator.get_main_ground_threats_near_townhall:
+            return
+
+        medivacs, mines = self._free_drop_units()
+        medivac_positions: np.ndarray = np.array(
+            [m.position for m in medivacs], dtype=float
+        ).reshape(-1, 2)
+        mine_positions: np.ndarray = np.array(
+            [m.position for m in mines], dtype=float
+        ).reshape(-1, 2)
+        current_targets: set[Point2] = set(targets)
+        deferred: list[PendingDrop] = []
+        while self._pending and self._pending[0].ready_frame <= frame:
+            pending: PendingDrop = heapq.heappop(self._pending)
+            if pending.target not in current_targets:
+                continue
+            if not medivacs or len(mines) < self.MIN_MINES_PER_DROP:
+                pending.ready_frame = frame + self.RETRY_FRAMES
+                deferred.append(pending)
+                continue
+
+            medivac_index: int = int(
+                np.argmin(
+                    np.sum(
+                        (medivac_positions - mine_positions.mean(axis=0)) ** 2,
+                        axis=1,
+                    )
                 )
+            )
+            mine_distances: np.ndarray = np.sum(
+                (mine_positions - medivac_positions[medivac_index]) ** 2, axis=1
+            )
+            mine_indices: np.ndarray = np.argsort(mine_distances)[
+                : self.MAX_MINES_PER_DROP
+            ]
+            self.drop_tracker.add_drop(
+                medivacs[medivac_index].tag,
+                (mines[i].tag for i in mine_indices),
+                pending.target,
+                frame,
+            )
+
+            # these units are no longer free for the next drop
+            medivacs.pop(medivac_index)
+            medivac_positions = np.delete(medivac_positions, medivac_index, axis=0)
+            taken: set[int] = set(mine_indices.tolist())
+            mines = [m for i, m in enumerate(mines) if i not in taken]
+            mine_positions = np.delete(mine_positions, mine_indices, axis=0)
 
-                if len(medivacs) > 0 and len(mines) > 1:
-                    assign_role: Callable = self.manager_mediator.assign_role
-                    medivac: Unit = unit_dict[UnitID.MEDIVAC][0]
-                    assign_role(tag=medivac.tag, role=UnitRole.DROP_SHIP)
-                    for u in mines:
-                        assign_role(tag=u.tag, role=UnitRole.DROP_UNITS_TO_LOAD)
-                    self._medivac_tag_to_mine_tracker[medivac.tag] = {
-                        "mine_tags": {mine.tag for mine in mines},
-                        "target": mine_drop_target,
-                    }
-                    self._assigned_111_mine_drop = True
-
-    def _unassign_drops(self) -> None:
-        self._unassign_mine_drops(switch_to=UnitRole.ATTACKING)
+        for pending in deferred:
+            heapq.heappush(self._pending, pending)
+
+    def _free_drop_units(self) -> tuple[list[Unit], list[Unit]]:
+        """Medivacs and mines that could start a drop.
+
+        Returns
+        -------
+        tuple[list[Unit], list[Unit]] :
+            Healthy medivacs and visible mines not in any drop.
+        """
+        tracker: DropTracker = self.drop_tracker
+        unit_tag_dict: dict[int, Unit] = self.ai.unit_tag_dict
+        medivacs: list[Unit] = [
+            medivac
+            for tag in tracker.medivac_tags
+            if tag not in tracker.drops
+            and tracker.role_of(tag) is None
+            and (medivac := unit_tag_dict.get(tag))
+            and medivac.health_percentage > self.MIN_HEALTH_MEDIVAC_PERC
+        ]
+        # mines already loaded into a medivac aren't visible
+        mines: list[Unit] = [
+            mine
+            for tag in tracker.mine_tags
+            if tracker.drop_of_mine(tag) is None
+            and tracker.role_of(tag) is None
+            and (mine := unit_tag_dict.get(tag))
+        ]
+        return medivacs, mines
+
+    def _unassign_drops(self, dangerous_fliers: bool) -> None:
+        self._unassign_mine_drops(
+            switch_to=UnitRole.ATTACKING, dangerous_fliers=dangerous_fliers
+        )
 
     def _execute_drops(self) -> None:
         self._mine_drops.execute(
             self.manager_mediator.get_units_from_roles(roles=DROP_ROLES),
-            medivac_tag_to_mine_tracker=self._medivac_tag_to_mine_tracker,
+            drop_tracker=self.drop_tracker,
+            unit_snapshot=self._unit_snapshot.snapshot,
         )
 
-    def _unassign_mine_drops(self, switch_to: UnitRole) -> None:
-        if not self._medivac_tag_to_mine_tracker:
+    def _unassign_mine_drops(self, switch_to: UnitRole, dangerous_fliers: bool) -> None:
+        tracker: DropTracker = self.drop_tracker
+        if not tracker.drops:
             return
 
-        # give up completely if enemy has air-to-air
-        dangerous_fliers: Units = self.manager_mediator.get_enemy_fliers.filter(
-            lambda u: u.can_attack_air
+        attacking_mines: set[int] = tracker.tags_with_role(
+            UnitRole.DROP_UNITS_ATTACKING
         )
+        finished: list[int] = []
         # unassign units from mine drop if medivac or assigned mines have died
-        for med_tag, mine_tracker in self._medivac_tag_to_mine_tracker.items():
+        for med_tag, drop in tracker.drops.items():
             if medivac := self.ai.unit_tag_dict.get(med_tag, None):
+                dropping: bool = tracker.role_of(med_tag) == UnitRole.DROP_SHIP
                 # deal with low health medivac, assign mines to drop attack
                 if (
-                    medivac.health_percentage <= self.MIN_HEALTH_MEDIVAC_PERC
+                    not dropping
+                    or medivac.health_percentage <= self.MIN_HEALTH_MEDIVAC_PERC
                     or dangerous_fliers
                 ):
-                    self.manager_mediator.assign_role(tag=medivac.tag, role=switch_to)
-                    self.manager_mediator.batch_assign_role(
-                        tags=mine_tracker["mine_tags"],
-                        role=UnitRole.DROP_UNITS_ATTACKING,
+                    if dropping:
+                        tracker.assign_role((med_tag,), switch_to)
+                    tracker.assign_role(
+                        drop.mine_tags - attacking_mines,
+                        UnitRole.DROP_UNITS_ATTACKING,
                     )
-                else:
-                    # all looking good, leave alone
-                    if medivac.has_cargo:
-                        return
-                    # no cargo, are mines still around?
-                    else:
-                        mines: list[Unit] = [
-                            m
-                            for m in self.ai.units
-                            if m.tag in mine_tracker["mine_tags"]
-                        ]
-                        # no mines, assign medivac to something else
-                        if len(mines) == 0:
-                            self.manager_mediator.assign_role(
-                                tag=medivac.tag, role=switch_to
-                            )
+                # no cargo and the mines have died, assign medivac to something else
+                elif not medivac.has_cargo and not drop.mine_tags:
+                    tracker.assign_role((med_tag,), switch_to)
             # no medivac exists, ensure mines are left on attacking mode
             else:
-                self.manager_mediator.batch_assign_role(
-                    tags=mine_tracker["mine_tags"], role=UnitRole.DROP_UNITS_ATTACKING
+                tracker.assign_role(
+                    drop.mine_tags - attacking_mines, UnitRole.DROP_UNITS_ATTACKING
                 )
+            # nothing left to control, free the medivac for another drop
+            if not drop.mine_tags and tracker.role_of(med_tag) != UnitRole.DROP_SHIP:
+                finished.append(med_tag)
+
+        for med_tag in finished:
+            tracker.remove_drop(med_tag)
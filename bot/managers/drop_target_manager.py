@@ -0,0 +1,324 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from ares import ManagerMediator
+from ares.consts import WORKER_TYPES
+from ares.managers.manager import Manager
+from sc2.data import Race, race_townhalls
+from sc2.ids.unit_typeid import UnitTypeId as UnitID
+from sc2.position import Point2
+
+from bot.consts import DegradationTier, GridKind
+from bot.managers.flow_field_manager import FlowField, FlowFieldManager
+from bot.managers.unit_snapshot_manager import UnitSnapshot, UnitSnapshotManager
+from bot.step_watchdog import StepWatchdog
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+TOWNHALL_TYPES: set[UnitID] = race_townhalls[Race.Random]
+DETECTOR_TYPES: set[UnitID] = {
+    UnitID.MISSILETURRET,
+    UnitID.OBSERVER,
+    UnitID.OBSERVERSIEGEMODE,
+    UnitID.OVERSEER,
+    UnitID.OVERSEERSIEGEMODE,
+    UnitID.PHOTONCANNON,
+    UnitID.RAVEN,
+    UnitID.SPORECRAWLER,
+}
+# every detector above sees this far
+DETECTION_RANGE: float = 11.0
+
+
+@dataclass(frozen=True)
+class DropTarget:
+    """An enemy base scored as a drop target.
+
+    Attributes
+    ----------
+    position : Point2
+        Where to drop, in the mineral line if the base has one.
+    base : Point2
+        The base being dropped.
+    score : float
+        Higher is a better target.
+    workers : float
+        Enemy workers expected at `position`.
+    path_cost : float
+        Air path cost from our main.
+    detected : bool
+        If an enemy detector covers `position`.
+    """
+
+    position: Point2
+    base: Point2
+    score: float
+    workers: float
+    path_cost: float
+    detected: bool
+
+
+class DropTargetManager(Manager):
+    # minerals this close to a base are its mineral line
+    MINERAL_LINE_RADIUS: float = 10.0
+    # drop this far from the townhall towards its mineral line, or behind it
+    MINERAL_LINE_OFFSET: float = 3.0
+    NO_MINERALS_OFFSET: float = 4.0
+    # half width of the air grid window and worker count radius around a target
+    DANGER_RADIUS: int = 4
+    WORKER_RADIUS: float = 8.0
+    # workers assumed per mineral patch at bases we can't see
+    WORKERS_PER_PATCH: float = 2.0
+    WORKER_WEIGHT: float = 1.0
+    DANGER_WEIGHT: float = 0.5
+    PATH_COST_WEIGHT: float = 0.05
+    DETECTION_PENALTY: float = 10.0
+    # rescore at least this often (frames), sooner if bases or the air grid change
+    MAX_SCORE_AGE: int = 44
+    # change in mean air grid cost around any target that triggers a rescore
+    GRID_CHANGE_THRESHOLD: float = 0.5
+    # step time (ms) a rescore needs left, the previous ranking is used otherwise
+    SCORE_BUDGET_MS: float = 2.0
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+        unit_snapshot: UnitSnapshotManager,
+        flow_field: FlowFieldManager,
+        watchdog: Optional[StepWatchdog] = None,
+    ) -> None:
+        """Rank every known enemy base as a drop target.
+
+        All bases are scored together in a few NumPy operations, on the
+        enemy workers expected there, the air grid cost around them, the air
+        path cost from our main and detection coverage. Scores are kept until
+        the enemy townhalls or detectors change, the air grid around a target
+        changes by more than `GRID_CHANGE_THRESHOLD`, or they're
+        `MAX_SCORE_AGE` frames old. A rescore is put off while the step is
+        short of `SCORE_BUDGET_MS`, so asking for targets costs a lookup on
+        most frames.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        unit_snapshot :
+            Provides the columnar unit snapshot for the current step.
+        flow_field :
+            Provides air path costs from our main to every target.
+        watchdog :
+            If provided, rescores are put off when the step is running late.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._unit_snapshot: UnitSnapshotManager = unit_snapshot
+        self._flow_field: FlowFieldManager = flow_field
+        self._watchdog: Optional[StepWatchdog] = watchdog
+
+        self._ranked: list[DropTarget] = []
+        self._checked_on: int = -1
+        self._scored_on: int = -1
+        # enemy townhalls and detectors the drop points were worked out for
+        self._structures: Optional[frozenset[int]] = None
+        self._bases: np.ndarray = np.empty((0, 2))
+        self._points: np.ndarray = np.empty((0, 2))
+        self._patches: np.ndarray = np.empty(0)
+        self._window_costs: np.ndarray = np.empty(0)
+        self.rescores: int = 0
+
+    async def update(self, iteration: int) -> None:
+        # targets are only scored when asked for, see `ranked_targets`
+        pass
+
+    def ranked_targets(self) -> list[DropTarget]:
+        """Every reachable enemy base as a drop target, best first.
+
+        Returns
+        -------
+        list[DropTarget] :
+            The targets, possibly scored on an earlier frame.
+        """
+        frame: int = self.ai.state.game_loop
+        if frame == self._checked_on:
+            return self._ranked
+        self._checked_on = frame
+
+        snapshot: UnitSnapshot = self._unit_snapshot.snapshot
+        structure_mask: np.ndarray = (
+            snapshot.is_enemy
+            & snapshot.is_structure
+            & snapshot.type_mask(TOWNHALL_TYPES | DETECTOR_TYPES)
+        )
+        structures: frozenset[int] = frozenset(snapshot.tags[structure_mask].tolist())
+        bases_changed: bool = structures != self._structures
+        if bases_changed:
+            self._structures = structures
+            self._update_drop_points(snapshot)
+
+        air_grid: np.ndarray = self.manager_mediator.get_air_grid
+        window_costs: np.ndarray = self._mean_window_costs(air_grid, self._points)
+        grid_changed: bool = window_costs.shape != self._window_costs.shape or bool(
+            np.any(
+                np.abs(window_costs - self._window_costs) > self.GRID_CHANGE_THRESHOLD
+            )
+        )
+        stale: bool = (
+            bases_changed
+            or grid_changed
+            or frame - self._scored_on >= self.MAX_SCORE_AGE
+        )
+        if stale and (self._scored_on < 0 or self._within_budget()):
+            self._window_costs = window_costs
+            self._ranked = self._score(snapshot, air_grid, window_costs)
+            self._scored_on = frame
+            self.rescores += 1
+        return self._ranked
+
+    def _within_budget(self) -> bool:
+        if not self._watchdog:
+            return True
+        return (
+            not self._watchdog.is_degraded(DegradationTier.CACHED_PATHS_ONLY)
+            and self._watchdog.remaining_ms >= self.SCORE_BUDGET_MS
+        )
+
+    def _update_drop_points(self, snapshot: UnitSnapshot) -> None:
+        """Work out the bases and where to drop each of them.
+
+        The enemy main is always a base, scouted or not.
+        """
+        townhalls: np.ndarray = snapshot.positions[
+            snapshot.is_enemy & snapshot.type_mask(TOWNHALL_TYPES) & ~snapshot.is_flying
+        ]
+        enemy_main: np.ndarray = np.array(self.ai.enemy_start_locations[0], dtype=float)
+        if not np.any(np.sum((townhalls - enemy_main) ** 2, axis=1) < 100.0):
+            townhalls = np.vstack([enemy_main, townhalls])
+        bases: np.ndarray = townhalls.reshape(-1, 2)
+
+        minerals: np.ndarray = np.array(
+            [m.position for m in self.ai.mineral_field], dtype=float
+        ).reshape(-1, 2)
+        to_minerals: np.ndarray = minerals[None, :, :] - bases[:, None, :]
+        in_line: np.ndarray = (
+            np.sum(to_minerals**2, axis=2) < self.MINERAL_LINE_RADIUS**2
+        )
+        patches: np.ndarray = in_line.sum(axis=1)
+        # mean direction to the mineral line, bases without one go behind
+        # the base, away from the map centre
+        towards: np.ndarray = np.einsum("bm,bmd->bd", in_line, to_minerals)
+        offsets: np.ndarray = np.full(len(bases), self.MINERAL_LINE_OFFSET)
+        no_minerals: np.ndarray = patches == 0
+        towards[no_minerals] = bases[no_minerals] - np.array(
+            self.ai.game_info.map_center, dtype=float
+        )
+        offsets[no_minerals] = self.NO_MINERALS_OFFSET
+        lengths: np.ndarray = np.linalg.norm(towards, axis=1, keepdims=True)
+        directions: np.ndarray = np.divide(
+            towards, lengths, out=np.zeros_like(towards), where=lengths > 0
+        )
+
+        self._bases = bases
+        self._points = bases + directions * offsets[:, None]
+        self._patches = patches
+
+    def _mean_window_costs(self, grid: np.ndarray, points: np.ndarray) -> np.ndarray:
+        """Mean finite grid cost in the square window around each point."""
+        if not len(points):
+            return np.empty(0)
+        radius: int = self.DANGER_RADIUS
+        offsets: np.ndarray = np.arange(-radius, radius + 1)
+        xs: np.ndarray = np.clip(
+            points[:, 0].astype(int)[:, None, None] + offsets[None, :, None],
+            0,
+            grid.shape[0] - 1,
+        )
+        ys: np.ndarray = np.clip(
+            points[:, 1].astype(int)[:, None, None] + offsets[None, None, :],
+            0,
+            grid.shape[1] - 1,
+        )
+        windows: np.ndarray = grid[xs, ys].reshape(len(points), -1)
+        finite: np.ndarray = np.isfinite(windows)
+        return np.where(finite, windows, 0.0).sum(axis=1) / np.maximum(
+            finite.sum(axis=1), 1
+        )
+
+    def _score(
+        self, snapshot: UnitSnapshot, air_grid: np.ndarray, window_costs: np.ndarray
+    ) -> list[DropTarget]:
+        """Score every base in one pass, dropping the unreachable ones."""
+        points: np.ndarray = self._points
+        if not len(points):
+            return []
+
+        workers: np.ndarray = snapshot.positions[
+            snapshot.is_enemy & snapshot.type_mask(WORKER_TYPES)
+        ]
+        seen_workers: np.ndarray = np.sum(
+            np.sum((points[:, None, :] - workers[None, :, :]) ** 2, axis=2)
+            < self.WORKER_RADIUS**2,
+            axis=1,
+        )
+        # bases we can't see are assumed saturated
+        visible: np.ndarray = np.fromiter(
+            (self.ai.is_visible(Point2(p)) for p in points.tolist()),
+            dtype=bool,
+            count=len(points),
+        )
+        expected_workers: np.ndarray = np.where(
+            visible,
+            seen_workers,
+            np.maximum(seen_workers, self.WORKERS_PER_PATCH * self._patches),
+        )
+
+        detectors: np.ndarray = snapshot.positions[
+            snapshot.is_enemy & snapshot.type_mask(DETECTOR_TYPES)
+        ]
+        detected: np.ndarray = np.any(
+            np.sum((points[:, None, :] - detectors[None, :, :]) ** 2, axis=2)
+            < DETECTION_RANGE**2,
+            axis=1,
+        )
+
+        # air distance from every cell to our main, shared with the flow fields
+        field: Optional[FlowField] = self._flow_field.get_field(
+            self.ai.start_location, air_grid, GridKind.AIR
+        )
+        if field:
+            distances: np.ndarray = field.distances
+            cells: np.ndarray = np.clip(
+                points.astype(int), 0, np.array(distances.shape) - 1
+            )
+            path_costs: np.ndarray = distances[cells[:, 0], cells[:, 1]]
+        else:
+            # field is still being built, air paths are mostly straight lines
+            path_costs = np.linalg.norm(
+                points - np.array(self.ai.start_location, dtype=float), axis=1
+            )
+
+        scores: np.ndarray = (
+            self.WORKER_WEIGHT * expected_workers
+            - self.DANGER_WEIGHT * np.maximum(window_costs - 1.0, 0.0)
+            - self.PATH_COST_WEIGHT * path_costs
+            - self.DETECTION_PENALTY * detected
+        )
+        return [
+            DropTarget(
+                position=Point2(points[i].tolist()),
+                base=Point2(self._bases[i].tolist()),
+                score=float(scores[i]),
+                workers=float(expected_workers[i]),
+                path_cost=float(path_costs[i]),
+                detected=bool(detected[i]),
+            )
+            for i in np.argsort(-scores, kind="stable").tolist()
+            if np.isfinite(path_costs[i])
+        ]
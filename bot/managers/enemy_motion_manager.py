@@ -0,0 +1,234 @@
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+from ares import ManagerMediator
+from ares.managers.manager import Manager
+from sc2.position import Point2
+from sc2.units import Units
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+
+class EnemyMotionManager(Manager):
+    # amount of position samples kept per enemy unit
+    HISTORY_LENGTH: int = 8
+    # forget enemies that haven't been seen for this many frames
+    EXPIRE_AFTER_FRAMES: int = 112
+    INITIAL_CAPACITY: int = 128
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+    ) -> None:
+        """Track how visible enemy units have been moving.
+
+        Every visible enemy gets a slot in a set of preallocated arrays,
+        each slot holding a ring buffer of its recent positions and the
+        frame they were seen on. Updating and querying are array
+        operations over the slots, so no objects are created per enemy.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._tag_to_slot: dict[int, int] = dict()
+        capacity: int = self.INITIAL_CAPACITY
+        self._positions: np.ndarray = np.zeros((capacity, self.HISTORY_LENGTH, 2))
+        self._frames: np.ndarray = np.zeros(
+            (capacity, self.HISTORY_LENGTH), dtype=np.int64
+        )
+        self._heads: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        self._counts: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        self._last_seen: np.ndarray = np.full(capacity, -1, dtype=np.int64)
+        self._slot_tags: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        # hand out low slots first
+        self._free_slots: list[int] = list(range(capacity - 1, -1, -1))
+
+    def _grow(self) -> None:
+        """Double the amount of slots, only happens when every slot is in use."""
+        capacity: int = self._slot_tags.shape[0]
+        self._positions = np.concatenate(
+            (self._positions, np.zeros_like(self._positions))
+        )
+        self._frames = np.concatenate((self._frames, np.zeros_like(self._frames)))
+        self._heads = np.concatenate((self._heads, np.zeros_like(self._heads)))
+        self._counts = np.concatenate((self._counts, np.zeros_like(self._counts)))
+        self._last_seen = np.concatenate(
+            (self._last_seen, np.full_like(self._last_seen, -1))
+        )
+        self._slot_tags = np.concatenate(
+            (self._slot_tags, np.zeros_like(self._slot_tags))
+        )
+        self._free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    async def update(self, iteration: int) -> None:
+        """Record the current position of every visible enemy unit.
+
+        Parameters
+        ----------
+        iteration :
+            The current game iteration.
+        """
+        frame: int = self.ai.state.game_loop
+        enemy_units: Units = self.ai.enemy_units
+        if enemy_units:
+            slots: np.ndarray = np.fromiter(
+                (self._get_or_assign_slot(u.tag) for u in enemy_units),
+                dtype=np.int64,
+                count=len(enemy_units),
+            )
+            heads: np.ndarray = self._heads[slots]
+            self._positions[slots, heads] = [u.position for u in enemy_units]
+            self._frames[slots, heads] = frame
+            self._heads[slots] = (heads + 1) % self.HISTORY_LENGTH
+            self._counts[slots] = np.minimum(
+                self._counts[slots] + 1, self.HISTORY_LENGTH
+            )
+            self._last_seen[slots] = frame
+
+        self._expire_slots(frame)
+
+    def _get_or_assign_slot(self, tag: int) -> int:
+        if (slot := self._tag_to_slot.get(tag)) is not None:
+            return slot
+        if not self._free_slots:
+            self._grow()
+        slot = self._free_slots.pop()
+        self._tag_to_slot[tag] = slot
+        self._slot_tags[slot] = tag
+        self._heads[slot] = 0
+        self._counts[slot] = 0
+        return slot
+
+    def _expire_slots(self, frame: int) -> None:
+        expired: np.ndarray = np.flatnonzero(
+            (self._last_seen >= 0)
+            & (self._last_seen < frame - self.EXPIRE_AFTER_FRAMES)
+        )
+        if expired.size == 0:
+            return
+        self._last_seen[expired] = -1
+        for slot, tag in zip(expired.tolist(), self._slot_tags[expired].tolist()):
+            del self._tag_to_slot[tag]
+            self._free_slots.append(slot)
+
+    def _slots_for(self, tags: Iterable[int]) -> np.ndarray:
+        """Slot for each tag, -1 for enemies we are not tracking."""
+        get = self._tag_to_slot.get
+        return np.fromiter((get(tag, -1) for tag in tags), dtype=np.int64)
+
+    def _latest_and_velocity(self, slots: np.ndarray) -> tuple:
+        """Latest sample and per frame velocity for each tracked slot.
+
+        Velocity is the displacement between the oldest and newest sample
+        in the window, which smooths out the odd stutter step.
+        """
+        newest: np.ndarray = (self._heads[slots] - 1) % self.HISTORY_LENGTH
+        oldest: np.ndarray = np.where(
+            self._counts[slots] == self.HISTORY_LENGTH, self._heads[slots], 0
+        )
+        latest_positions: np.ndarray = self._positions[slots, newest]
+        latest_frames: np.ndarray = self._frames[slots, newest]
+        elapsed: np.ndarray = latest_frames - self._frames[slots, oldest]
+        velocities: np.ndarray = np.zeros((slots.shape[0], 2))
+        np.divide(
+            latest_positions - self._positions[slots, oldest],
+            elapsed[:, None],
+            out=velocities,
+            where=elapsed[:, None] > 0,
+        )
+        return latest_positions, latest_frames, velocities
+
+    def get_velocities(self, tags: Iterable[int]) -> np.ndarray:
+        """Estimated velocity of each enemy in distance per game frame.
+
+        Parameters
+        ----------
+        tags :
+            Enemy unit tags to look up.
+
+        Returns
+        -------
+        np.ndarray :
+            (n, 2) array, zero for enemies we are not tracking.
+        """
+        slots: np.ndarray = self._slots_for(tags)
+        velocities: np.ndarray = np.zeros((slots.shape[0], 2))
+        tracked: np.ndarray = slots >= 0
+        if tracked.any():
+            velocities[tracked] = self._latest_and_velocity(slots[tracked])[2]
+        return velocities
+
+    def get_headings(self, tags: Iterable[int]) -> np.ndarray:
+        """Estimated movement direction of each enemy in radians.
+
+        Parameters
+        ----------
+        tags :
+            Enemy unit tags to look up.
+
+        Returns
+        -------
+        np.ndarray :
+            (n,) array, NaN for stationary or untracked enemies.
+        """
+        velocities: np.ndarray = self.get_velocities(tags)
+        headings: np.ndarray = np.arctan2(velocities[:, 1], velocities[:, 0])
+        headings[~velocities.any(axis=1)] = np.nan
+        return headings
+
+    def get_expected_positions(self, tags: Iterable[int], frames: int) -> np.ndarray:
+        """Where each enemy will be in `frames` frames if it keeps moving as is.
+
+        Parameters
+        ----------
+        tags :
+            Enemy unit tags to look up.
+        frames :
+            How many game frames into the future to look.
+
+        Returns
+        -------
+        np.ndarray :
+            (n, 2) array, NaN for enemies we are not tracking.
+        """
+        slots: np.ndarray = self._slots_for(tags)
+        expected: np.ndarray = np.full((slots.shape[0], 2), np.nan)
+        tracked: np.ndarray = slots >= 0
+        if tracked.any():
+            latest_positions, latest_frames, velocities = self._latest_and_velocity(
+                slots[tracked]
+            )
+            # account for the time since the enemy was last seen
+            look_ahead: np.ndarray = frames + self.ai.state.game_loop - latest_frames
+            expected[tracked] = latest_positions + velocities * look_ahead[:, None]
+        return expected
+
+    def get_expected_position(self, tag: int, frames: int) -> Optional[Point2]:
+        """Single unit version of `get_expected_positions`.
+
+        Parameters
+        ----------
+        tag :
+            Enemy unit tag to look up.
+        frames :
+            How many game frames into the future to look.
+
+        Returns
+        -------
+        Optional[Point2] :
+            Expected position, or None if we are not tracking this enemy.
+        """
+        if tag not in self._tag_to_slot:
+            return None
+        return Point2(self.get_expected_positions([tag], frames)[0])
@@ -0,0 +1,317 @@
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from ares import ManagerMediator
+from ares.managers.manager import Manager
+from sc2.position import Point2
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from bot.consts import DegradationTier, GridKind
+from bot.managers.planning_manager import PlanningManager, PlanResult
+from bot.step_watchdog import StepWatchdog
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+FieldKey = tuple[GridKind, tuple[int, int]]
+
+# neighbour offsets, orthogonal first so ties prefer straight moves
+NEIGHBOUR_OFFSETS: np.ndarray = np.array(
+    [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+)
+SQRT_2: float = float(np.sqrt(2))
+
+
+class FlowField:
+    """Distance to a destination from every cell, and the next cell to step to."""
+
+    __slots__ = ("grid", "distances", "next_cell", "built_on")
+
+    def __init__(
+        self,
+        grid: np.ndarray,
+        distances: np.ndarray,
+        next_cell: np.ndarray,
+        frame: int,
+    ):
+        self.grid: np.ndarray = grid
+        self.distances: np.ndarray = distances
+        self.next_cell: np.ndarray = next_cell
+        self.built_on: int = frame
+
+    def waypoint(self, position: Point2, lookahead: int) -> Optional[Point2]:
+        """Follow the field `lookahead` cells on from `position`."""
+        width, height = self.distances.shape
+        x, y = int(position[0]), int(position[1])
+        if not (0 <= x < width and 0 <= y < height) or not np.isfinite(
+            self.distances[x, y]
+        ):
+            return None
+        cell: int = x * height + y
+        for _ in range(lookahead):
+            cell = self.next_cell[cell]
+        return Point2((cell // height + 0.5, cell % height + 0.5))
+
+
+def build_flow_field(
+    grid: np.ndarray, destination: tuple[int, int]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Calculate the arrays of a `FlowField`, safe to run off the main thread.
+
+    Parameters
+    ----------
+    grid :
+        Grid to build the field on, kept by the field.
+    destination :
+        Cell the field leads to.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray] :
+        `grid`, distance from every cell and the next cell to step to.
+    """
+    distances: np.ndarray = _distance_field(grid, destination)
+    return grid, distances, _next_cells(distances)
+
+
+def _distance_field(grid: np.ndarray, destination: tuple[int, int]) -> np.ndarray:
+    """Weighted distance from every cell to `destination` in one Dijkstra pass.
+
+    Moving between two cells costs the step length multiplied by the average of
+    both cell weights. Diagonal moves are only allowed when neither orthogonal
+    cell in between is blocked, so paths don't cut corners. A blocked
+    `destination` (eg: the centre of a structure) is swapped for the closest
+    pathable cell.
+    """
+    width, height = grid.shape
+    pathable: np.ndarray = np.isfinite(grid) & (grid > 0)
+    target: Optional[tuple[int, int]] = _nearest_pathable(pathable, destination)
+    if target is None:
+        return np.full(grid.shape, np.inf)
+    weights: np.ndarray = np.where(pathable, grid, 0.0)
+    node_ids: np.ndarray = np.arange(width * height).reshape(width, height)
+
+    sources: list = []
+    targets: list = []
+    costs: list = []
+    for dx, dy in NEIGHBOUR_OFFSETS[[0, 2, 4, 5]]:
+        a = (slice(0, width - dx), slice(max(0, -dy), height - max(0, dy)))
+        b = (slice(dx, width), slice(max(0, dy), height - max(0, -dy)))
+        valid: np.ndarray = pathable[a] & pathable[b]
+        step: float = 1.0
+        if dx and dy:
+            step = SQRT_2
+            # both cells sharing an edge with the move need to be pathable
+            valid &= pathable[(b[0], a[1])] & pathable[(a[0], b[1])]
+        sources.append(node_ids[a][valid])
+        targets.append(node_ids[b][valid])
+        costs.append(step * (weights[a][valid] + weights[b][valid]) / 2.0)
+
+    num_nodes: int = width * height
+    graph = coo_matrix(
+        (np.concatenate(costs), (np.concatenate(sources), np.concatenate(targets))),
+        shape=(num_nodes, num_nodes),
+    ).tocsr()
+    distances: np.ndarray = dijkstra(
+        graph, directed=False, indices=node_ids[target], min_only=True
+    )
+    return distances.reshape(width, height)
+
+
+def _nearest_pathable(
+    pathable: np.ndarray, cell: tuple[int, int]
+) -> Optional[tuple[int, int]]:
+    """`cell` if it's pathable, otherwise the closest pathable cell to it."""
+    x: int = min(max(cell[0], 0), pathable.shape[0] - 1)
+    y: int = min(max(cell[1], 0), pathable.shape[1] - 1)
+    if pathable[x, y]:
+        return x, y
+    cells: np.ndarray = np.argwhere(pathable)
+    if not len(cells):
+        return None
+    nearest: np.ndarray = cells[np.argmin(np.sum((cells - (x, y)) ** 2, axis=1))]
+    return nearest[0].item(), nearest[1].item()
+
+
+def _next_cells(distances: np.ndarray) -> np.ndarray:
+    """For every cell, the flat index of the neighbour closest to the destination.
+
+    Cells without a closer neighbour (the destination and unreachable cells)
+    point at themselves.
+    """
+    width, height = distances.shape
+    padded: np.ndarray = np.pad(distances, 1, constant_values=np.inf)
+    neighbour_distances: np.ndarray = np.stack(
+        [
+            padded[1 + dx : 1 + dx + width, 1 + dy : 1 + dy + height]
+            for dx, dy in NEIGHBOUR_OFFSETS
+        ]
+    )
+    best: np.ndarray = np.argmin(neighbour_distances, axis=0)
+    closer: np.ndarray = (
+        np.take_along_axis(neighbour_distances, best[None], axis=0)[0] < distances
+    )
+    xs, ys = np.indices((width, height))
+    next_x: np.ndarray = np.where(closer, xs + NEIGHBOUR_OFFSETS[best, 0], xs)
+    next_y: np.ndarray = np.where(closer, ys + NEIGHBOUR_OFFSETS[best, 1], ys)
+    return (next_x * height + next_y).ravel()
+
+
+class FlowFieldManager(Manager):
+    # grid cost changes are picked up at most this often (frames)
+    REBUILD_INTERVAL: int = 22
+    # drop fields nobody asked for in this many frames
+    EXPIRE_AFTER_FRAMES: int = 224
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+        watchdog: Optional[StepWatchdog] = None,
+        planner: Optional[PlanningManager] = None,
+    ) -> None:
+        """Share flow fields between units heading to the same destination.
+
+        One distance field per (grid kind, destination) is calculated with a
+        single Dijkstra pass over the grid, after which any number of units
+        can read their next waypoint in constant time. A field is rebuilt as
+        soon as a cell's pathability changes, while changes in cost only
+        (enemy influence) trigger a rebuild every `REBUILD_INTERVAL` frames at
+        most, and not at all in `DegradationTier.CACHED_PATHS_ONLY`. With a
+        `planner`, every build happens off the main step, the old field is
+        used until the new one is ready and there is no field for a new
+        destination until its first build is done.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        watchdog :
+            If provided, cost only rebuilds are skipped when the step is
+            running late.
+        planner :
+            If provided, fields are built off the main step.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._watchdog: Optional[StepWatchdog] = watchdog
+        self._planner: Optional[PlanningManager] = planner
+        self._fields: dict[FieldKey, FlowField] = dict()
+        # last frame each field was checked against the current grid
+        self._checked_on: dict[FieldKey, int] = dict()
+
+    async def update(self, iteration: int) -> None:
+        frame: int = self.ai.state.game_loop
+        for key in [
+            k
+            for k, checked_on in self._checked_on.items()
+            if frame - checked_on > self.EXPIRE_AFTER_FRAMES
+        ]:
+            del self._checked_on[key]
+            self._fields.pop(key, None)
+
+    def get_field(
+        self, destination: Point2, grid: np.ndarray, grid_kind: GridKind
+    ) -> Optional[FlowField]:
+        """Get the flow field towards `destination`, building it if needed.
+
+        Parameters
+        ----------
+        destination :
+            Where the field leads to.
+        grid :
+            The current grid of kind `grid_kind`.
+        grid_kind :
+            Which grid `grid` is.
+
+        Returns
+        -------
+        Optional[FlowField] :
+            Field towards `destination`, None while the planner is still
+            building the first one.
+        """
+        frame: int = self.ai.state.game_loop
+        key: FieldKey = (grid_kind, (int(destination[0]), int(destination[1])))
+        field: Optional[FlowField] = self._fields.get(key)
+
+        if self._checked_on.get(key) != frame:
+            self._checked_on[key] = frame
+            if (
+                not field
+                or not np.array_equal(np.isfinite(field.grid), np.isfinite(grid))
+                or (
+                    frame - field.built_on >= self.REBUILD_INTERVAL
+                    and not (
+                        self._watchdog
+                        and self._watchdog.is_degraded(
+                            DegradationTier.CACHED_PATHS_ONLY
+                        )
+                    )
+                    and not np.array_equal(field.grid, grid)
+                )
+            ):
+                field = self._rebuild(key, field, grid)
+
+        return field
+
+    def _rebuild(
+        self, key: FieldKey, field: Optional[FlowField], grid: np.ndarray
+    ) -> Optional[FlowField]:
+        """Build the field for `key` on `grid`, off the main step if possible.
+
+        Returns
+        -------
+        Optional[FlowField] :
+            Field to use this frame.
+        """
+        frame: int = self.ai.state.game_loop
+        if self._planner:
+            plan: Optional[PlanResult] = self._planner.request(
+                ("flow_field", key), build_flow_field, grid, key[1]
+            )
+            # keep using the old field until a newer one is ready
+            if not plan or (field and plan.submitted_on <= field.built_on):
+                return field
+            field = FlowField(*plan.value, plan.submitted_on)
+        else:
+            field = FlowField(*build_flow_field(grid.copy(), key[1]), frame)
+        self._fields[key] = field
+        return field
+
+    def get_next_waypoint(
+        self,
+        position: Point2,
+        destination: Point2,
+        grid: np.ndarray,
+        grid_kind: GridKind,
+        lookahead: int = 4,
+    ) -> Optional[Point2]:
+        """Where a unit at `position` should move to, to reach `destination`.
+
+        Parameters
+        ----------
+        position :
+            Where the unit currently is.
+        destination :
+            Where the unit wants to go.
+        grid :
+            The current grid of kind `grid_kind`.
+        grid_kind :
+            Which grid `grid` is.
+        lookahead :
+            How many cells along the field to look ahead.
+
+        Returns
+        -------
+        Optional[Point2] :
+            The waypoint, None if `destination` can't be reached from `position`
+            or its field isn't ready yet.
+        """
+        field: Optional[FlowField] = self.get_field(destination, grid, grid_kind)
+        return field.waypoint(position, lookahead) if field else None
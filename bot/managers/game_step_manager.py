@@ -0,0 +1,107 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+from ares import ManagerMediator
+from ares.consts import WORKER_TYPES, UnitTreeQueryType
+from ares.managers.manager import Manager
+from loguru import logger
+
+from bot.managers.unit_proximity_manager import NeighbourTable, UnitProximityManager
+from bot.managers.unit_snapshot_manager import UnitSnapshot
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+
+class GameStepManager(Manager):
+    # smoothing factor for the step latency moving average
+    LATENCY_SMOOTHING: float = 0.1
+    # minimum game loops between two game step changes
+    ADJUST_INTERVAL: int = 22
+    # game loops without a fight before the step is allowed to grow
+    IDLE_AFTER: int = 112
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+        unit_proximity: UnitProximityManager,
+    ) -> None:
+        """Adjust `client.game_step` to the current step latency and situation.
+
+        The step grows by one while the average `on_step` latency is over
+        `StepBudgetMs`. Otherwise it drops to `MinGameStep` as soon as visible
+        enemy units (not workers or structures) are near any of our units, and
+        grows again after `IDLE_AFTER` game loops without a fight, up to
+        `MaxGameStep`. Changes are at least `ADJUST_INTERVAL` game loops apart.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        unit_proximity :
+            Provides the enemies near each of our units for the current step.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._unit_proximity: UnitProximityManager = unit_proximity
+        step_config: dict = config.get("AdaptiveGameStep", {})
+        self.enabled: bool = step_config.get("Enabled", False)
+        self.min_game_step: int = step_config.get("MinGameStep", 2)
+        self.max_game_step: int = step_config.get("MaxGameStep", 4)
+        self.step_budget_ms: float = step_config.get("StepBudgetMs", 40.0)
+
+        self.latency_ms: float = 0.0
+        self._last_change: int = 0
+        self._last_fight: int = 0
+
+    def record_step_time(self, duration_ms: float) -> None:
+        """Add the wall clock time of the last `on_step` to the moving average."""
+        self.latency_ms += self.LATENCY_SMOOTHING * (duration_ms - self.latency_ms)
+
+    async def update(self, iteration: int) -> None:
+        if not self.enabled:
+            return
+
+        frame: int = self.ai.state.game_loop
+        fighting: bool = self._is_fighting()
+        if fighting:
+            self._last_fight = frame
+        if frame - self._last_change < self.ADJUST_INTERVAL:
+            return
+
+        game_step: int = self.ai.client.game_step
+        new_game_step: int = game_step
+        reason: str = ""
+        if self.latency_ms > self.step_budget_ms:
+            new_game_step, reason = game_step + 1, "step overrun"
+        elif fighting:
+            new_game_step, reason = self.min_game_step, "fighting"
+        elif frame - self._last_fight > self.IDLE_AFTER:
+            new_game_step, reason = game_step + 1, "idle"
+
+        new_game_step = min(max(new_game_step, self.min_game_step), self.max_game_step)
+        if new_game_step != game_step:
+            logger.info(
+                f"{self.ai.time_formatted} game step {game_step} -> "
+                f"{new_game_step} ({reason}, {self.latency_ms:.1f}ms per step)"
+            )
+            self.ai.client.game_step = new_game_step
+            self._last_change = frame
+
+    def _is_fighting(self) -> bool:
+        neighbour_table: NeighbourTable = self._unit_proximity.get_neighbour_table(
+            UnitTreeQueryType.AllEnemy
+        )
+        snapshot: UnitSnapshot = neighbour_table.snapshot
+        army: np.ndarray = (
+            ~snapshot.is_memory
+            & ~snapshot.is_structure
+            & ~snapshot.type_mask(WORKER_TYPES)
+        )
+        return bool(army[neighbour_table.neighbours].any())
@@ -0,0 +1,175 @@
+from time import perf_counter
+from typing import TYPE_CHECKING, Optional
+
+from ares import ManagerMediator
+from ares.managers.manager import Manager
+from loguru import logger
+
+from bot.consts import DegradationTier, ManagerPriority
+from bot.step_watchdog import StepWatchdog
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+
+class ManagerTiming:
+    """How often a scheduled manager ran and how long it took."""
+
+    __slots__ = ("runs", "deferrals", "over_budget", "total_ms", "max_ms", "last_ms")
+
+    def __init__(self):
+        self.runs: int = 0
+        self.deferrals: int = 0
+        # runs that took longer than the manager's `UPDATE_BUDGET_MS`
+        self.over_budget: int = 0
+        self.total_ms: float = 0.0
+        self.max_ms: float = 0.0
+        self.last_ms: float = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.runs if self.runs else 0.0
+
+    def record(self, duration_ms: float, budget_ms: float) -> None:
+        self.runs += 1
+        self.total_ms += duration_ms
+        self.last_ms = duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        if duration_ms > budget_ms:
+            self.over_budget += 1
+
+
+class ScheduledManager:
+    """A manager along with its cadence, read from the manager class.
+
+    Managers declare `UPDATE_PERIOD` (run every n steps), `UPDATE_PRIORITY`
+    and `UPDATE_BUDGET_MS` (expected update time), anything not declared
+    falls back to running every step at normal priority.
+    """
+
+    __slots__ = ("manager", "name", "period", "offset", "priority", "budget_ms")
+
+    def __init__(self, manager: Manager, offset: int):
+        self.manager: Manager = manager
+        self.name: str = type(manager).__name__
+        self.period: int = max(1, getattr(manager, "UPDATE_PERIOD", 1))
+        # spread managers sharing a period over different steps
+        self.offset: int = offset % self.period
+        self.priority: ManagerPriority = getattr(
+            manager, "UPDATE_PRIORITY", ManagerPriority.NORMAL
+        )
+        self.budget_ms: float = getattr(manager, "UPDATE_BUDGET_MS", 1.0)
+
+    def is_due(self, iteration: int) -> bool:
+        return (iteration + self.offset) % self.period == 0
+
+
+class ManagerScheduler(Manager):
+    # time available to the scheduled managers each step, unless configured
+    STEP_BUDGET_MS: float = 20.0
+    # a deferred manager runs regardless after waiting this many steps
+    MAX_DEFERRED_STEPS: int = 4
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+        managers: list[Manager],
+        watchdog: Optional[StepWatchdog] = None,
+    ) -> None:
+        """Run managers at their own cadence within a step time budget.
+
+        Sits in the Hub in place of `managers`. Each step the managers that
+        are due (or were deferred earlier) run in priority order. Once the
+        step is over budget, any manager that isn't `ManagerPriority.HIGH`
+        and whose `UPDATE_BUDGET_MS` doesn't fit in the remaining time is
+        deferred to the next step, up to `MAX_DEFERRED_STEPS` in a row.
+        In `DegradationTier.CRITICAL_MANAGERS_ONLY` all of those are deferred.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        managers :
+            Managers to schedule, managers of equal priority keep this order.
+        watchdog :
+            If provided, the step budget also counts time spent earlier in the
+            step (ares managers etc.) and the degradation tier is respected.
+        """
+        super().__init__(ai, config, mediator)
+
+        self.step_budget_ms: float = config.get("ManagerScheduler", {}).get(
+            "StepBudgetMs", self.STEP_BUDGET_MS
+        )
+        scheduled: list[ScheduledManager] = [
+            ScheduledManager(manager, i) for i, manager in enumerate(managers)
+        ]
+        # `sorted` is stable, so registration order is kept within a priority
+        self._scheduled: list[ScheduledManager] = sorted(
+            scheduled, key=lambda s: -s.priority
+        )
+        self._deferred_for: dict[str, int] = dict()
+        self._watchdog: Optional[StepWatchdog] = watchdog
+        self.timings: dict[str, ManagerTiming] = {
+            s.name: ManagerTiming() for s in scheduled
+        }
+
+    @property
+    def managers(self) -> list[Manager]:
+        """The scheduled managers, in the order they're considered."""
+        return [scheduled.manager for scheduled in self._scheduled]
+
+    async def initialise(self) -> None:
+        for scheduled in self._scheduled:
+            await scheduled.manager.initialise()
+
+    async def update(self, iteration: int) -> None:
+        watchdog: Optional[StepWatchdog] = self._watchdog
+        started: float = perf_counter()
+
+        for scheduled in self._scheduled:
+            name: str = scheduled.name
+            deferred_for: int = self._deferred_for.get(name, 0)
+            if not deferred_for and not scheduled.is_due(iteration):
+                continue
+
+            elapsed_ms: float = (
+                watchdog.elapsed_ms if watchdog else (perf_counter() - started) * 1000.0
+            )
+            if (
+                scheduled.priority < ManagerPriority.HIGH
+                and deferred_for < self.MAX_DEFERRED_STEPS
+                and (
+                    elapsed_ms + scheduled.budget_ms > self.step_budget_ms
+                    or (
+                        watchdog
+                        and watchdog.is_degraded(DegradationTier.CRITICAL_MANAGERS_ONLY)
+                    )
+                )
+            ):
+                self._deferred_for[name] = deferred_for + 1
+                self.timings[name].deferrals += 1
+                continue
+
+            self._deferred_for.pop(name, None)
+            start: float = perf_counter()
+            await scheduled.manager.update(iteration)
+            self.timings[name].record(
+                (perf_counter() - start) * 1000.0, scheduled.budget_ms
+            )
+
+    def log_timings(self) -> None:
+        for scheduled in self._scheduled:
+            timing: ManagerTiming = self.timings[scheduled.name]
+            logger.info(
+                f"{scheduled.name} (every {scheduled.period} steps): "
+                f"{timing.runs} runs, mean {timing.mean_ms:.2f}ms, "
+                f"max {timing.max_ms:.2f}ms, {timing.over_budget} over "
+                f"{scheduled.budget_ms}ms budget, {timing.deferrals} deferrals"
+            )
@@ -7,16 +7,25 @@ from sc2.ids.unit_typeid import UnitTypeId as UnitID
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bot.consts import ManagerPriority
+from bot.managers.unit_snapshot_manager import UnitSnapshot, UnitSnapshotManager
+
 if TYPE_CHECKING:
     from ares import AresBot
 
 
 class OrbitalManager(Manager):
+    # cadence for `ManagerScheduler`
+    UPDATE_PERIOD: int = 8
+    UPDATE_PRIORITY: ManagerPriority = ManagerPriority.LOW
+    UPDATE_BUDGET_MS: float = 0.5
+
     def __init__(
         self,
         ai: "AresBot",
         config: dict,
         mediator: ManagerMediator,
+        unit_snapshot: UnitSnapshotManager,
     ) -> None:
         """Set up the manager.
 
@@ -28,6 +37,8 @@ class OrbitalManager(Manager):
             Dictionary with the data from the configuration file
         mediator :
             ManagerMediator used for getting information from other managers.
+        unit_snapshot :
+            Provides the columnar unit snapshot for the current step.
 
         Returns
         -------
@@ -35,6 +46,8 @@ class OrbitalManager(Manager):
         """
         super().__init__(ai, config, mediator)
 
+        self._unit_snapshot: UnitSnapshotManager = unit_snapshot
+
     async def update(self, iteration: int) -> None:
         """
         Basic mule logic till this can be improved.
@@ -46,7 +59,8 @@ class OrbitalManager(Manager):
         if oc_id not in structures_dict:
             return
 
-        for oc in structures_dict[oc_id].filter(lambda x: x.energy >= 50):
+        snapshot: UnitSnapshot = self._unit_snapshot.snapshot
+        for oc in snapshot.select(structures_dict[oc_id], snapshot.energy >= 50):
             mfs: Units = self.ai.mineral_field.closer_than(10, oc)
             if mfs:
                 mf: Unit = max(mfs, key=lambda x: x.mineral_contents)
@@ -0,0 +1,284 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from ares import ManagerMediator
+from ares.managers.manager import Manager
+from loguru import logger
+from sc2.position import Point2
+
+from bot.consts import DegradationTier, GridKind
+from bot.step_watchdog import StepWatchdog
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+PathKey = tuple[tuple[int, int], tuple[int, int], GridKind, int]
+
+
+class CachedPath:
+    """A path stored in `PathCacheManager`, and the grid costs along it."""
+
+    __slots__ = ("path", "points", "cells", "costs", "grid_version")
+
+    def __init__(self, path: list[Point2], grid: np.ndarray, grid_version: int):
+        self.path: list[Point2] = path
+        self.points: np.ndarray = np.array(path, dtype=float)
+        self.cells: tuple[np.ndarray, np.ndarray] = (
+            self.points[:, 0].astype(int),
+            self.points[:, 1].astype(int),
+        )
+        self.costs: np.ndarray = grid[self.cells]
+        self.grid_version: int = grid_version
+
+    def index_on_path(self, position: Point2, max_distance: float) -> int:
+        """Index of the path point to continue from, -1 if we're off the path.
+
+        Distances are to the path segments rather than the points, as points
+        are `sensitivity` cells apart. On a segment the index of its start is
+        returned, so the next point is still ahead.
+        """
+        pos: np.ndarray = np.array(position[:2], dtype=float)
+        if len(self.points) == 1:
+            return 0 if np.hypot(*(self.points[0] - pos)) <= max_distance else -1
+
+        starts: np.ndarray = self.points[:-1]
+        segments: np.ndarray = self.points[1:] - starts
+        lengths_sq: np.ndarray = np.einsum("ij,ij->i", segments, segments)
+        t: np.ndarray = np.clip(
+            np.einsum("ij,ij->i", pos - starts, segments)
+            / np.maximum(lengths_sq, 1e-9),
+            0.0,
+            1.0,
+        )
+        closest: np.ndarray = starts + t[:, None] * segments
+        distances: np.ndarray = np.hypot(closest[:, 0] - pos[0], closest[:, 1] - pos[1])
+        idx: int = int(np.argmin(distances))
+        if distances[idx] > max_distance:
+            return -1
+        # at the end of a segment, continue from the point we've reached
+        return idx + 1 if t[idx] == 1.0 else idx
+
+    def route_unchanged(self, grid: np.ndarray, from_idx: int) -> bool:
+        """Check the grid costs along the rest of the route are as they were."""
+        return np.array_equal(
+            grid[self.cells[0][from_idx:], self.cells[1][from_idx:]],
+            self.costs[from_idx:],
+        )
+
+
+class PathCacheManager(Manager):
+    MAX_CACHED_PATHS: int = 256
+    # a unit within this distance of a cached path's segments is still on it
+    ON_PATH_DISTANCE: float = 1.5
+    # log the cache statistics once per game minute
+    LOG_FREQUENCY: int = 1344
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+        watchdog: Optional[StepWatchdog] = None,
+    ) -> None:
+        """Cache paths between steps.
+
+        Paths are keyed by start cell, target cell, grid kind and
+        sensitivity, and evicted least recently used first. Each grid
+        kind gets a version that increases whenever the grid differs
+        from the previous frame. A path computed on an older version is
+        still reused if the grid costs along the rest of its route are
+        unchanged, otherwise the path is recalculated. In
+        `DegradationTier.CACHED_PATHS_ONLY` cached paths are reused without
+        checking the route.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        watchdog :
+            If provided, replanning is skipped when the step is running late.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._watchdog: Optional[StepWatchdog] = watchdog
+        self._paths: OrderedDict[PathKey, CachedPath] = OrderedDict()
+        # (target cell, grid kind, sensitivity) -> keys of paths to that target
+        self._keys_by_target: dict[tuple, set[PathKey]] = dict()
+        self._grid_versions: dict[GridKind, int] = dict()
+        self._grid_snapshots: dict[GridKind, np.ndarray] = dict()
+        self._grid_checked_on: dict[GridKind, int] = dict()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.replans: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    async def update(self, iteration: int) -> None:
+        if iteration % self.LOG_FREQUENCY == 0 and self.hits + self.misses:
+            logger.info(
+                f"{self.ai.time_formatted} Path cache: {self.hits} hits, "
+                f"{self.misses} misses ({self.replans} replans), "
+                f"hit rate {self.hit_rate:.1%}"
+            )
+
+    def get_grid_version(self, grid: np.ndarray, grid_kind: GridKind) -> int:
+        """Version of `grid_kind`, bumped whenever the grid contents change.
+
+        The comparison against the previous grid runs at most once per frame.
+
+        Parameters
+        ----------
+        grid :
+            The current grid of this kind.
+        grid_kind :
+            Which grid this is.
+
+        Returns
+        -------
+        int :
+            The grid version.
+        """
+        frame: int = self.ai.state.game_loop
+        if self._grid_checked_on.get(grid_kind) == frame:
+            return self._grid_versions[grid_kind]
+
+        self._grid_checked_on[grid_kind] = frame
+        previous: Optional[np.ndarray] = self._grid_snapshots.get(grid_kind)
+        if (
+            previous is None
+            or previous.shape != grid.shape
+            or not np.array_equal(previous, grid)
+        ):
+            self._grid_versions[grid_kind] = self._grid_versions.get(grid_kind, 0) + 1
+            self._grid_snapshots[grid_kind] = grid.copy()
+        return self._grid_versions[grid_kind]
+
+    def find_raw_path(
+        self,
+        start: Point2,
+        target: Point2,
+        grid: np.ndarray,
+        grid_kind: GridKind,
+        sensitivity: int = 1,
+    ) -> list[Point2]:
+        """Cached version of `ManagerMediator.find_raw_path`.
+
+        Parameters
+        ----------
+        start :
+            Where the path starts.
+        target :
+            Where the path ends.
+        grid :
+            Pathing grid to use.
+        grid_kind :
+            Which grid `grid` is.
+        sensitivity :
+            Take every nth point of the path.
+
+        Returns
+        -------
+        list[Point2] :
+            Path from `start` to `target`, empty if there is no path.
+        """
+        grid_version: int = self.get_grid_version(grid, grid_kind)
+        start_cell: tuple[int, int] = (int(start[0]), int(start[1]))
+        target_key: tuple = ((int(target[0]), int(target[1])), grid_kind, sensitivity)
+        key: PathKey = (start_cell, *target_key)
+
+        cached_key, from_idx = self._find_cached_path(key, target_key, start)
+        if cached_key:
+            cached: CachedPath = self._paths[cached_key]
+            if (
+                cached.grid_version == grid_version
+                or (
+                    self._watchdog
+                    and self._watchdog.is_degraded(DegradationTier.CACHED_PATHS_ONLY)
+                )
+                or cached.route_unchanged(grid, from_idx)
+            ):
+                cached.grid_version = grid_version
+                self._paths.move_to_end(cached_key)
+                self.hits += 1
+                return cached.path[from_idx:]
+            # something changed along the route, drop it and replan
+            self._remove(cached_key)
+            self.replans += 1
+
+        self.misses += 1
+        path: list[Point2] = self.manager_mediator.find_raw_path(
+            start=start, target=target, grid=grid, sensitivity=sensitivity
+        )
+        if path:
+            self._add(key, target_key, CachedPath(path, grid, grid_version))
+        return path
+
+    def find_path_next_point(
+        self,
+        start: Point2,
+        target: Point2,
+        grid: np.ndarray,
+        grid_kind: GridKind,
+        sensitivity: int = 5,
+    ) -> Point2:
+        """Cached version of `ManagerMediator.find_path_next_point`.
+
+        Parameters
+        ----------
+        start :
+            Where the path starts.
+        target :
+            Where the path ends.
+        grid :
+            Pathing grid to use.
+        grid_kind :
+            Which grid `grid` is.
+        sensitivity :
+            Take every nth point of the path.
+
+        Returns
+        -------
+        Point2 :
+            Next point to move to, `target` if no path was found.
+        """
+        path: list[Point2] = self.find_raw_path(
+            start, target, grid, grid_kind, sensitivity
+        )
+        return path[1] if len(path) > 1 else target
+
+    def _find_cached_path(
+        self, key: PathKey, target_key: tuple, start: Point2
+    ) -> tuple[Optional[PathKey], int]:
+        """Find a cached path starting at, or passing by, `start`."""
+        if key in self._paths:
+            return key, 0
+        for cached_key in self._keys_by_target.get(target_key, ()):
+            idx: int = self._paths[cached_key].index_on_path(
+                start, self.ON_PATH_DISTANCE
+            )
+            if idx != -1:
+                return cached_key, idx
+        return None, 0
+
+    def _add(self, key: PathKey, target_key: tuple, cached: CachedPath) -> None:
+        self._paths[key] = cached
+        self._keys_by_target.setdefault(target_key, set()).add(key)
+        if len(self._paths) > self.MAX_CACHED_PATHS:
+            self._remove(next(iter(self._paths)))
+
+    def _remove(self, key: PathKey) -> None:
+        del self._paths[key]
+        target_key: tuple = key[1:]
+        keys: set[PathKey] = self._keys_by_target[target_key]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_target[target_key]
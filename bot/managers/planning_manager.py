@@ -0,0 +1,262 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Optional
+
+import numpy as np
+from ares import ManagerMediator
+from ares.managers.manager import Manager
+from loguru import logger
+from sc2.position import Point2
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+
+def find_closest_safe_spot(
+    grid: np.ndarray,
+    from_pos: Point2,
+    radius: float = 15.0,
+    origin: tuple[int, int] = (0, 0),
+) -> Point2:
+    """Closest of the lowest cost cells within `radius` of `from_pos`.
+
+    NumPy version of `ManagerMediator.find_closest_safe_spot` that doesn't need
+    the mediator, so it can run in a `PlanningManager` worker.
+
+    Parameters
+    ----------
+    grid :
+        Grid to search, or the part of it around `from_pos`.
+    from_pos :
+        Where to search from.
+    radius :
+        How far away from `from_pos` to look.
+    origin :
+        Map cell of `grid[0, 0]`, when `grid` is only part of the map.
+
+    Returns
+    -------
+    Point2 :
+        The safe spot, `from_pos` if there are no pathable cells in range.
+    """
+    width, height = grid.shape
+    x, y = from_pos[0] - origin[0], from_pos[1] - origin[1]
+    x_min, x_max = max(int(x - radius), 0), min(int(x + radius) + 1, width)
+    y_min, y_max = max(int(y - radius), 0), min(int(y + radius) + 1, height)
+    if x_min >= x_max or y_min >= y_max:
+        return from_pos
+
+    xs, ys = np.ogrid[x_min:x_max, y_min:y_max]
+    distances: np.ndarray = np.hypot(xs - x, ys - y)
+    costs: np.ndarray = np.where(
+        distances <= radius, grid[x_min:x_max, y_min:y_max], np.inf
+    )
+    lowest: float = costs.min()
+    if not np.isfinite(lowest):
+        return from_pos
+    idx: int = int(np.argmin(np.where(costs == lowest, distances, np.inf)))
+    cell_x, cell_y = np.unravel_index(idx, costs.shape)
+    return Point2((int(cell_x) + x_min + origin[0], int(cell_y) + y_min + origin[1]))
+
+
+def _same_args(args: tuple, other: tuple) -> bool:
+    """If two sets of job arguments would plan the same thing."""
+    return len(args) == len(other) and all(
+        np.array_equal(arg, other_arg)
+        if isinstance(arg, np.ndarray) or isinstance(other_arg, np.ndarray)
+        else arg == other_arg
+        for arg, other_arg in zip(args, other)
+    )
+
+
+class PlanResult:
+    """Result of a planning job, along with when it was asked for.
+
+    `stale` is set when the result was planned on other arguments than the
+    latest request for it.
+    """
+
+    __slots__ = ("value", "args", "submitted_on", "completed_on", "stale")
+
+    def __init__(self, value: Any, args: tuple, submitted_on: int, completed_on: int):
+        self.value: Any = value
+        self.args: tuple = args
+        self.submitted_on: int = submitted_on
+        self.completed_on: int = completed_on
+        self.stale: bool = False
+
+    def age(self, frame: int) -> int:
+        """Game loops since the state this result was planned on."""
+        return frame - self.submitted_on
+
+
+class PlanningManager(Manager):
+    # results nobody asked for in this many frames are dropped
+    EXPIRE_AFTER_FRAMES: int = 224
+    # stale safe spots are only used if planned this recently and close by
+    SAFE_SPOT_MAX_AGE: int = 8
+    SAFE_SPOT_MAX_DRIFT: float = 1.0
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+    ) -> None:
+        """Run heavy planning work off the main step.
+
+        Jobs are keyed, `request` starts a job for a key when its arguments
+        differ from the last job's and none is running, and returns the latest
+        finished result for that key, marked stale if it was planned on other
+        arguments. NumPy arguments are copied when a job starts, so jobs only
+        ever see a snapshot of the grids and unit arrays. Finished jobs are
+        collected in `update`, so results show up one or more frames after
+        they were requested.
+
+        Jobs run on a thread pool, or a process pool if `Planning.Processes`
+        is set, in which case job functions need to be importable module
+        level functions.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        """
+        super().__init__(ai, config, mediator)
+
+        planning_config: dict = config.get("Planning", {})
+        workers: int = planning_config.get("Workers", 1)
+        self._executor: Executor = (
+            ProcessPoolExecutor(max_workers=workers)
+            if planning_config.get("Processes", False)
+            else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="planning")
+        )
+        self._in_flight: dict[Hashable, tuple[Future, int, tuple]] = dict()
+        # arguments of the last job started per key
+        self._submitted: dict[Hashable, tuple] = dict()
+        self._results: dict[Hashable, PlanResult] = dict()
+        self._last_requested: dict[Hashable, int] = dict()
+
+    async def update(self, iteration: int) -> None:
+        frame: int = self.ai.state.game_loop
+        for key, (future, submitted_on, args) in list(self._in_flight.items()):
+            if not future.done():
+                continue
+            del self._in_flight[key]
+            if future.cancelled():
+                continue
+            if error := future.exception():
+                logger.warning(f"Planning job {key} failed: {error}")
+                continue
+            self._results[key] = PlanResult(future.result(), args, submitted_on, frame)
+
+        for key in [
+            k
+            for k, requested_on in self._last_requested.items()
+            if frame - requested_on > self.EXPIRE_AFTER_FRAMES
+        ]:
+            del self._last_requested[key]
+            self._submitted.pop(key, None)
+            self._results.pop(key, None)
+
+    def request(
+        self, key: Hashable, func: Callable, *args: Any
+    ) -> Optional[PlanResult]:
+        """Plan `func(*args)` for `key` and get the latest result for it.
+
+        Parameters
+        ----------
+        key :
+            Identifies the job, at most one job per key runs at a time.
+        func :
+            What to run.
+        *args :
+            Arguments for `func`, NumPy arrays are copied.
+
+        Returns
+        -------
+        Optional[PlanResult] :
+            Latest finished result for `key`, None if no job for it has
+            finished yet.
+        """
+        frame: int = self.ai.state.game_loop
+        self._last_requested[key] = frame
+        submitted: Optional[tuple] = self._submitted.get(key)
+        if key not in self._in_flight and (
+            submitted is None or not _same_args(args, submitted)
+        ):
+            snapshot: tuple = tuple(
+                arg.copy() if isinstance(arg, np.ndarray) else arg for arg in args
+            )
+            self._submitted[key] = snapshot
+            self._in_flight[key] = (
+                self._executor.submit(func, *snapshot),
+                frame,
+                snapshot,
+            )
+
+        result: Optional[PlanResult] = self._results.get(key)
+        if result:
+            result.stale = not _same_args(args, result.args)
+        return result
+
+    def request_safe_spot(
+        self, key: Hashable, grid: np.ndarray, from_pos: Point2, radius: float
+    ) -> Optional[PlanResult]:
+        """Plan `find_closest_safe_spot` on the part of `grid` it searches.
+
+        Parameters
+        ----------
+        key :
+            Identifies the search between steps.
+        grid :
+            Grid to search.
+        from_pos :
+            Where to search from.
+        radius :
+            How far away from `from_pos` to look.
+
+        Returns
+        -------
+        Optional[PlanResult] :
+            See `request`. Stale results planned more than `SAFE_SPOT_MAX_AGE`
+            game loops ago, or from further than `SAFE_SPOT_MAX_DRIFT` away
+            from `from_pos`, are not returned, so the caller searches itself.
+        """
+        x_min: int = max(int(from_pos[0] - radius), 0)
+        y_min: int = max(int(from_pos[1] - radius), 0)
+        window: np.ndarray = grid[
+            x_min : int(from_pos[0] + radius) + 1, y_min : int(from_pos[1] + radius) + 1
+        ]
+        result: Optional[PlanResult] = self.request(
+            key, find_closest_safe_spot, window, from_pos, radius, (x_min, y_min)
+        )
+        if result and result.stale:
+            planned_from: Point2 = result.args[1]
+            if (
+                result.age(self.ai.state.game_loop) > self.SAFE_SPOT_MAX_AGE
+                or planned_from.distance_to(from_pos) > self.SAFE_SPOT_MAX_DRIFT
+            ):
+                return None
+        return result
+
+    def get_result(self, key: Hashable) -> Optional[PlanResult]:
+        """Latest finished result for `key` without starting a new job.
+
+        Parameters
+        ----------
+        key :
+            Identifies the job.
+
+        Returns
+        -------
+        Optional[PlanResult] :
+            The result, None if no job for it has finished yet.
+        """
+        return self._results.get(key)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,5 @@
 """Handle Reaper Harass."""
-from typing import TYPE_CHECKING, Dict, Set
+from typing import TYPE_CHECKING, Dict, Optional, Set
 
 from sc2.data import Race
 from sc2.unit import Unit
@@ -13,17 +13,40 @@ from sc2.position import Point2
 
 from bot.combat.base_unit import BaseUnit
 from bot.combat.reaper_harass import ReaperHarass
+from bot.consts import ManagerPriority
+from bot.managers.enemy_motion_manager import EnemyMotionManager
+from bot.managers.flow_field_manager import FlowFieldManager
+from bot.managers.path_cache_manager import PathCacheManager
+from bot.managers.planning_manager import PlanningManager
+from bot.managers.unit_proximity_manager import UnitProximityManager
+from bot.managers.unit_snapshot_manager import UnitSnapshotManager
+from bot.step_watchdog import StepWatchdog
 
 if TYPE_CHECKING:
     from ares import AresBot
 
 
 class ReaperHarassManager(Manager):
+    # cadence for `ManagerScheduler`
+    UPDATE_PERIOD: int = 1
+    UPDATE_PRIORITY: ManagerPriority = ManagerPriority.HIGH
+    UPDATE_BUDGET_MS: float = 3.0
+    # health percentages a healing reaper returns at / a reaper leaves to heal at
+    ATTACK_THRESHOLD: float = 0.9
+    RETREAT_THRESHOLD: float = 0.45
+
     def __init__(
         self,
         ai: "AresBot",
         config: dict,
         mediator: ManagerMediator,
+        unit_snapshot: UnitSnapshotManager,
+        unit_proximity: UnitProximityManager,
+        enemy_motion: Optional[EnemyMotionManager] = None,
+        path_cache: Optional[PathCacheManager] = None,
+        flow_field: Optional[FlowFieldManager] = None,
+        watchdog: Optional[StepWatchdog] = None,
+        planner: Optional[PlanningManager] = None,
     ) -> None:
         """Handle all Reaper harass.
 
@@ -38,16 +61,41 @@ class ReaperHarassManager(Manager):
             Dictionary with the data from the configuration file
         mediator :
             ManagerMediator used for getting information from other managers.
+        unit_snapshot :
+            Provides the columnar unit snapshot for the current step.
+        unit_proximity :
+            Provides the enemies near each of our units for the current step.
+        enemy_motion :
+            Shared enemy movement tracker, used to lead Reaper grenades.
+        path_cache :
+            Shared path cache for Reaper pathing.
+        flow_field :
+            Shared flow fields, used to send healing Reapers home.
+        watchdog :
+            Step watchdog, used to skip predictive grenades when running late.
+        planner :
+            Runs Reaper safe spot searches off the main step.
         """
         super().__init__(ai, config, mediator)
 
+        self._unit_snapshot: UnitSnapshotManager = unit_snapshot
+        self._unit_proximity: UnitProximityManager = unit_proximity
         self._assigned_reaper_harass: bool = False
         self._reaper_to_target_tracker: dict[int, Point2] = dict()
 
-        self._reaper_harass: BaseUnit = ReaperHarass(ai, config, mediator)
+        self._reaper_harass: BaseUnit = ReaperHarass(
+            ai,
+            config,
+            mediator,
+            enemy_motion=enemy_motion,
+            path_cache=path_cache,
+            flow_field=flow_field,
+            watchdog=watchdog,
+            planner=planner,
+        )
         self.healing_reaper_tags: Set[int] = set()
-        self.reaper_attack_threshold: float = 0.9
-        self.reaper_retreat_threshold: float = 0.45
+        self.reaper_attack_threshold: float = self.ATTACK_THRESHOLD
+        self.reaper_retreat_threshold: float = self.RETREAT_THRESHOLD
 
         # TODO: make the target more sophisticated
         self.reaper_harass_target: Point2 = ai.enemy_start_locations[0]
@@ -98,4 +146,8 @@ class ReaperHarassManager(Manager):
                 reapers,
                 reaper_to_target_tracker=self._reaper_to_target_tracker,
                 heal_threshold=self.reaper_retreat_threshold,
+                unit_snapshot=self._unit_snapshot.snapshot,
+                neighbour_table=self._unit_proximity.get_neighbour_table(
+                    UnitTreeQueryType.AllEnemy
+                ),
             )
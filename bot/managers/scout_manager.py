@@ -1,5 +1,7 @@
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 from sc2.data import Race
 from sc2.position import Point2
 from sc2.unit import Unit
@@ -14,17 +16,25 @@ from sc2.ids.unit_typeid import UnitTypeId as UnitID
 
 from bot.combat.base_unit import BaseUnit
 from bot.combat.worker_scouts import WorkerScouts
+from bot.consts import ManagerPriority
+from bot.managers.unit_proximity_manager import NeighbourTable, UnitProximityManager
 
 if TYPE_CHECKING:
     from ares import AresBot
 
 
 class ScoutManager(Manager):
+    # cadence for `ManagerScheduler`
+    UPDATE_PERIOD: int = 2
+    UPDATE_PRIORITY: ManagerPriority = ManagerPriority.LOW
+    UPDATE_BUDGET_MS: float = 1.0
+
     def __init__(
         self,
         ai: "AresBot",
         config: dict,
         mediator: ManagerMediator,
+        unit_proximity: UnitProximityManager,
     ) -> None:
         """Handle scouting related tasks.
 
@@ -40,6 +50,8 @@ class ScoutManager(Manager):
             Dictionary with the data from the configuration file
         mediator :
             ManagerMediator used for getting information from other managers.
+        unit_proximity :
+            Provides the enemies near each of our units for the current step.
 
         Returns
         -------
@@ -47,6 +59,7 @@ class ScoutManager(Manager):
         """
         super().__init__(ai, config, mediator)
 
+        self._unit_proximity: UnitProximityManager = unit_proximity
         self.worker_scouts: BaseUnit = WorkerScouts(ai, config, mediator)
         self._assigned_worker_scout: bool = False
         self._scout_points_behind_natural: list[Point2] = []
@@ -133,6 +146,9 @@ class ScoutManager(Manager):
                 role=UnitRole.SCOUTING, unit_type=UnitID.SCV
             ),
             points_to_check=self._scv_points_to_check[self.ai.enemy_race],
+            ground_neighbour_table=self._unit_proximity.get_neighbour_table(
+                UnitTreeQueryType.EnemyGround
+            ),
         )
 
     def _unassign_worker_scout(self) -> None:
@@ -148,17 +164,13 @@ class ScoutManager(Manager):
         if not scouting_scvs:
             return
 
-        ground_near_workers: dict[
-            int, Units
-        ] = self.manager_mediator.get_units_in_range(
-            start_points=scouting_scvs,
-            distances=15,
-            query_tree=UnitTreeQueryType.EnemyGround,
-            return_as_dict=True,
+        neighbour_table: NeighbourTable = self._unit_proximity.get_neighbour_table(
+            UnitTreeQueryType.EnemyGround
         )
+        enemy_workers: np.ndarray = neighbour_table.snapshot.type_mask(WORKER_TYPES)
 
         for scv in scouting_scvs:
-            if ground_near_workers[scv.tag](WORKER_TYPES):
+            if enemy_workers[neighbour_table.rows_near(scv)].any():
                 continue
 
             if (
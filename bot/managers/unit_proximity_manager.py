@@ -0,0 +1,167 @@
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+from ares import ManagerMediator
+from ares.consts import UnitTreeQueryType
+from ares.managers.manager import Manager
+from sc2.unit import Unit
+from sc2.units import Units
+from scipy.spatial import cKDTree
+
+from bot.managers.unit_snapshot_manager import UnitSnapshot, UnitSnapshotManager
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+
+class NeighbourTable:
+    """Enemy snapshot rows near each of our units, stored CSR style.
+
+    The neighbours of the own unit in slot `i` are
+    `neighbours[offsets[i]:offsets[i + 1]]`, rows into the `UnitSnapshot`
+    the table was built from.
+    """
+
+    __slots__ = ("snapshot", "offsets", "neighbours", "_row_to_slot")
+
+    def __init__(
+        self,
+        snapshot: UnitSnapshot,
+        own_rows: np.ndarray,
+        enemy_rows: np.ndarray,
+        distance: float,
+    ):
+        self.snapshot: UnitSnapshot = snapshot
+        counts: np.ndarray = np.zeros(own_rows.size, dtype=np.int64)
+        self.neighbours: np.ndarray = np.empty(0, dtype=np.int64)
+        if own_rows.size and enemy_rows.size:
+            positions: np.ndarray = snapshot.positions
+            pairs: np.ndarray = cKDTree(positions[own_rows]).sparse_distance_matrix(
+                cKDTree(positions[enemy_rows]), distance, output_type="ndarray"
+            )
+            order: np.ndarray = np.lexsort((pairs["j"], pairs["i"]))
+            self.neighbours = enemy_rows[pairs["j"][order]]
+            counts = np.bincount(pairs["i"], minlength=own_rows.size)
+        self.offsets: np.ndarray = np.concatenate(([0], np.cumsum(counts)))
+        self._row_to_slot: np.ndarray = np.full(len(snapshot), -1, dtype=np.int64)
+        self._row_to_slot[own_rows] = np.arange(own_rows.size)
+
+    def rows_near(self, unit: Unit) -> np.ndarray:
+        """Snapshot rows of the enemies near `unit`, a view into `neighbours`.
+
+        Parameters
+        ----------
+        unit :
+            One of our units.
+
+        Returns
+        -------
+        np.ndarray :
+            Enemy snapshot rows, empty if `unit` is not in the snapshot.
+        """
+        row: int = self.snapshot.row_for(unit.tag)
+        if row == -1:
+            return self.neighbours[:0]
+        slot: int = self._row_to_slot[row]
+        return self.neighbours[self.offsets[slot] : self.offsets[slot + 1]]
+
+    def units_near(self, units: Iterable[Unit]) -> dict[int, Units]:
+        """Same output as `get_units_in_range(..., return_as_dict=True)`.
+
+        Parameters
+        ----------
+        units :
+            Our units to get the nearby enemies for.
+
+        Returns
+        -------
+        dict[int, Units] :
+            Unit tag to the enemy units near it.
+        """
+        to_units = self.snapshot.to_units
+        return {unit.tag: to_units(self.rows_near(unit)) for unit in units}
+
+
+class UnitProximityManager(Manager):
+    PROXIMITY_DISTANCE: float = 15.0
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+        unit_snapshot: UnitSnapshotManager,
+    ) -> None:
+        """Find the enemies near all of our units with one query per frame.
+
+        Replaces the separate `get_units_in_range(distances=15)` calls made by
+        each manager. The first request for a query tree in a frame runs a
+        single KD-tree query for every own unit in the `UnitSnapshot`, later
+        requests read from the resulting `NeighbourTable`. Only our
+        non-structure units are queried, none of the callers look up buildings.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        unit_snapshot :
+            Provides the columnar unit snapshot for the current step.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._unit_snapshot: UnitSnapshotManager = unit_snapshot
+        self._tables: dict[UnitTreeQueryType, NeighbourTable] = dict()
+
+    async def update(self, iteration: int) -> None:
+        # tables are built lazily from this frame's snapshot
+        self._tables.clear()
+
+    def get_neighbour_table(self, query_tree: UnitTreeQueryType) -> NeighbourTable:
+        """Get the enemies within `PROXIMITY_DISTANCE` of own non-structure units.
+
+        Parameters
+        ----------
+        query_tree :
+            `UnitTreeQueryType.EnemyGround` (enemy ground units, no structures)
+            or `UnitTreeQueryType.AllEnemy`.
+
+        Returns
+        -------
+        NeighbourTable :
+            Enemies near each own unit this frame.
+        """
+        if query_tree not in self._tables:
+            snapshot: UnitSnapshot = self._unit_snapshot.snapshot
+            enemy_mask: np.ndarray = snapshot.is_enemy
+            if query_tree == UnitTreeQueryType.EnemyGround:
+                enemy_mask = enemy_mask & ~snapshot.is_flying & ~snapshot.is_structure
+            self._tables[query_tree] = NeighbourTable(
+                snapshot,
+                np.flatnonzero(snapshot.is_own & ~snapshot.is_structure),
+                np.flatnonzero(enemy_mask),
+                self.PROXIMITY_DISTANCE,
+            )
+        return self._tables[query_tree]
+
+    def get_enemy_near(
+        self, units: Iterable[Unit], query_tree: UnitTreeQueryType
+    ) -> dict[int, Units]:
+        """Enemy units near each of `units`, see `NeighbourTable.units_near`.
+
+        Parameters
+        ----------
+        units :
+            Our units to get the nearby enemies for.
+        query_tree :
+            Which enemies to look for.
+
+        Returns
+        -------
+        dict[int, Units] :
+            Unit tag to the enemy units near it.
+        """
+        return self.get_neighbour_table(query_tree).units_near(units)
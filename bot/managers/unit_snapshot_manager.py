@@ -0,0 +1,210 @@
+from typing import TYPE_CHECKING, Iterable, Union
+
+import numpy as np
+from ares import ManagerMediator
+from ares.managers.manager import Manager
+from sc2.ids.unit_typeid import UnitTypeId as UnitID
+from sc2.unit import Unit
+from sc2.units import Units
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+
+class UnitSnapshot:
+    """Every own and enemy unit this frame, packed into NumPy columns.
+
+    Row `i` of every column describes `self.units[i]`. Own units come first,
+    followed by enemy units, including the ones ares remembers after they left
+    vision (see `is_memory`). Masks built from the columns can be turned back
+    into `Units` with `select` or `to_units`.
+    """
+
+    __slots__ = (
+        "ai",
+        "units",
+        "tags",
+        "type_ids",
+        "positions",
+        "health_percentage",
+        "energy",
+        "ground_range",
+        "air_range",
+        "weapon_cooldown",
+        "is_own",
+        "is_enemy",
+        "is_memory",
+        "is_structure",
+        "is_flying",
+        "is_light",
+        "is_burrowed",
+        "can_attack_ground",
+        "can_attack_air",
+        "_tag_to_row",
+    )
+
+    def __init__(self, ai: "AresBot", own_units: Units, enemy_units: Units):
+        self.ai: "AresBot" = ai
+        self.units: list[Unit] = [*own_units, *enemy_units]
+        num_units: int = len(self.units)
+        units: list[Unit] = self.units
+
+        def column(values: Iterable, dtype: type) -> np.ndarray:
+            return np.fromiter(values, dtype=dtype, count=num_units)
+
+        self.tags: np.ndarray = column((u.tag for u in units), np.int64)
+        self.type_ids: np.ndarray = column((u.type_id.value for u in units), np.int32)
+        self.positions: np.ndarray = np.array(
+            [u.position for u in units], dtype=float
+        ).reshape(num_units, 2)
+        self.health_percentage: np.ndarray = column(
+            (u.health_percentage for u in units), float
+        )
+        self.energy: np.ndarray = column((u.energy for u in units), float)
+        self.ground_range: np.ndarray = column((u.ground_range for u in units), float)
+        self.air_range: np.ndarray = column((u.air_range for u in units), float)
+        self.weapon_cooldown: np.ndarray = column(
+            (u.weapon_cooldown for u in units), float
+        )
+        self.is_own: np.ndarray = np.arange(num_units) < len(own_units)
+        self.is_enemy: np.ndarray = ~self.is_own
+        self.is_memory: np.ndarray = column((u.is_memory for u in units), bool)
+        self.is_structure: np.ndarray = column((u.is_structure for u in units), bool)
+        self.is_flying: np.ndarray = column((u.is_flying for u in units), bool)
+        self.is_light: np.ndarray = column((u.is_light for u in units), bool)
+        self.is_burrowed: np.ndarray = column((u.is_burrowed for u in units), bool)
+        self.can_attack_ground: np.ndarray = column(
+            (u.can_attack_ground for u in units), bool
+        )
+        self.can_attack_air: np.ndarray = column(
+            (u.can_attack_air for u in units), bool
+        )
+        self._tag_to_row: dict[int, int] = dict(
+            zip(self.tags.tolist(), range(num_units))
+        )
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def row_for(self, tag: int) -> int:
+        """Row of the unit with `tag`, -1 if it's not in this snapshot."""
+        return self._tag_to_row.get(tag, -1)
+
+    def rows_for(self, units: Union[Iterable[Unit], Iterable[int]]) -> np.ndarray:
+        """Row of each unit or tag, -1 for anything not in this snapshot.
+
+        Parameters
+        ----------
+        units :
+            Units or unit tags to look up.
+
+        Returns
+        -------
+        np.ndarray :
+            Row index per unit.
+        """
+        get = self._tag_to_row.get
+        return np.fromiter(
+            (get(u if isinstance(u, int) else u.tag, -1) for u in units),
+            dtype=np.int64,
+        )
+
+    def type_mask(self, type_ids: Union[UnitID, Iterable[UnitID]]) -> np.ndarray:
+        """Rows matching any of `type_ids`.
+
+        Parameters
+        ----------
+        type_ids :
+            Unit type or types to look for.
+
+        Returns
+        -------
+        np.ndarray :
+            Boolean mask over the snapshot rows.
+        """
+        if isinstance(type_ids, UnitID):
+            return self.type_ids == type_ids.value
+        return np.isin(self.type_ids, [t.value for t in type_ids])
+
+    def indices(self, mask: np.ndarray) -> np.ndarray:
+        """Rows where `mask` is set."""
+        return np.flatnonzero(mask)
+
+    def to_units(self, indices: Iterable[int]) -> Units:
+        """Get the `Units` at the given rows.
+
+        Parameters
+        ----------
+        indices :
+            Snapshot rows.
+
+        Returns
+        -------
+        Units :
+            The units at those rows.
+        """
+        units: list[Unit] = self.units
+        return Units([units[i] for i in indices], self.ai)
+
+    def select(self, units: Iterable[Unit], mask: np.ndarray) -> Units:
+        """Keep the units whose snapshot row is set in `mask`.
+
+        Vectorized replacement for `Units.filter`, units missing from the
+        snapshot are dropped.
+
+        Parameters
+        ----------
+        units :
+            Units to filter, order is kept.
+        mask :
+            Boolean mask over the snapshot rows.
+
+        Returns
+        -------
+        Units :
+            Units matching `mask`.
+        """
+        rows: np.ndarray = self.rows_for(units)
+        rows = rows[rows >= 0]
+        return self.to_units(rows[mask[rows]])
+
+
+class UnitSnapshotManager(Manager):
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+    ) -> None:
+        """Build a columnar snapshot of every unit once per step.
+
+        Should be updated before any manager reading `snapshot`.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._snapshot: UnitSnapshot = UnitSnapshot(ai, Units([], ai), Units([], ai))
+
+    @property
+    def snapshot(self) -> UnitSnapshot:
+        """The snapshot for the current step."""
+        return self._snapshot
+
+    async def update(self, iteration: int) -> None:
+        # enemies ares remembers after they left vision, see `is_memory`
+        enemy_units: Units = self.ai.all_enemy_units
+        visible: set[int] = enemy_units.tags
+        remembered: list[Unit] = [
+            u for u in self.manager_mediator.get_all_enemy if u.tag not in visible
+        ]
+        self._snapshot = UnitSnapshot(
+            self.ai, self.ai.all_own_units, Units([*enemy_units, *remembered], self.ai)
+        )
@@ -0,0 +1,160 @@
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+from ares import ManagerMediator
+from ares.consts import WORKER_TYPES
+from ares.managers.manager import Manager
+from sc2.position import Point2
+from scipy.ndimage import convolve
+
+from bot.managers.unit_snapshot_manager import UnitSnapshot, UnitSnapshotManager
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+
+class WorkerClusterManager(Manager):
+    # widow mine splash radius plus a worker's radius
+    SPLASH_RADIUS: float = 2.125
+    # how far from a medivac a drop point can be
+    SEARCH_RADIUS: int = 8
+    # workers a drop point has to hit to be worth going to
+    MIN_WORKERS_HIT: float = 3.0
+
+    def __init__(
+        self,
+        ai: "AresBot",
+        config: dict,
+        mediator: ManagerMediator,
+        unit_snapshot: UnitSnapshotManager,
+    ) -> None:
+        """Find where a widow mine would hit the most enemy workers.
+
+        Once per frame, when first asked, enemy workers are binned onto the
+        map grid and convolved with the mine splash footprint. Each cell then
+        holds the workers a mine there would hit, with cells ground units
+        can't stand on cleared. Finding the best drop point near any number
+        of medivacs is then a single lookup into that density.
+
+        Parameters
+        ----------
+        ai :
+            Bot object that will be running the game
+        config :
+            Dictionary with the data from the configuration file
+        mediator :
+            ManagerMediator used for getting information from other managers.
+        unit_snapshot :
+            Provides the columnar unit snapshot for the current step.
+        """
+        super().__init__(ai, config, mediator)
+
+        self._unit_snapshot: UnitSnapshotManager = unit_snapshot
+        radius: int = int(np.ceil(self.SPLASH_RADIUS))
+        offsets: np.ndarray = np.arange(-radius, radius + 1)
+        self._kernel: np.ndarray = (
+            offsets[:, None] ** 2 + offsets[None, :] ** 2 <= self.SPLASH_RADIUS**2
+        ).astype(float)
+        # cells within the search radius, as offsets from the centre
+        search: np.ndarray = np.arange(-self.SEARCH_RADIUS, self.SEARCH_RADIUS + 1)
+        dx, dy = np.meshgrid(search, search, indexing="ij")
+        in_disk: np.ndarray = dx**2 + dy**2 <= self.SEARCH_RADIUS**2
+        self._search_dx: np.ndarray = dx[in_disk]
+        self._search_dy: np.ndarray = dy[in_disk]
+        # workers hit per cell, for the area around the workers only, padded
+        # by twice the search radius
+        self._density: np.ndarray = np.zeros((0, 0))
+        self._origin: np.ndarray = np.zeros(2, dtype=int)
+        self._built_on: int = -1
+
+    async def update(self, iteration: int) -> None:
+        # the density is only built when asked for, see `drop_points`
+        pass
+
+    def drop_points(self, positions: Iterable[Point2]) -> list[Optional[Point2]]:
+        """The cell hitting the most workers near each position.
+
+        Parameters
+        ----------
+        positions :
+            Where to search around, usually medivacs.
+
+        Returns
+        -------
+        list[Optional[Point2]] :
+            Per position, the centre of the best cell within `SEARCH_RADIUS`,
+            or None if no cell hits `MIN_WORKERS_HIT` workers.
+        """
+        points: np.ndarray = np.array(
+            [tuple(p) for p in positions], dtype=float
+        ).reshape(-1, 2)
+        density: np.ndarray = self._get_density()
+        if not len(points) or not density.size:
+            return [None] * len(points)
+
+        # the density is padded by twice the search radius, so the window of
+        # any position in reach of the workers is inside it
+        radius: int = self.SEARCH_RADIUS
+        cells: np.ndarray = points.astype(int) - self._origin + 2 * radius
+        near: np.ndarray = np.all(
+            (cells >= radius) & (cells < np.array(density.shape) - radius), axis=1
+        )
+        drop_points: list[Optional[Point2]] = [None] * len(points)
+        if not near.any():
+            return drop_points
+
+        rows: np.ndarray = np.flatnonzero(near)
+        xs: np.ndarray = cells[rows, 0, None] + self._search_dx[None, :]
+        ys: np.ndarray = cells[rows, 1, None] + self._search_dy[None, :]
+        hits: np.ndarray = density[xs, ys]
+        best: np.ndarray = np.argmax(hits, axis=1)
+        picked: np.ndarray = np.arange(len(rows))
+        best_hits: np.ndarray = hits[picked, best]
+        best_x: np.ndarray = xs[picked, best] - 2 * radius
+        best_y: np.ndarray = ys[picked, best] - 2 * radius
+
+        origin_x, origin_y = self._origin.tolist()
+        for row, x, y, hit in zip(
+            rows.tolist(), best_x.tolist(), best_y.tolist(), best_hits.tolist()
+        ):
+            if hit >= self.MIN_WORKERS_HIT:
+                drop_points[row] = Point2((x + origin_x + 0.5, y + origin_y + 0.5))
+        return drop_points
+
+    def _get_density(self) -> np.ndarray:
+        frame: int = self.ai.state.game_loop
+        if frame != self._built_on:
+            self._built_on = frame
+            self._build_density()
+        return self._density
+
+    def _build_density(self) -> None:
+        """Bin the enemy workers and spread them over the splash footprint.
+
+        Only the bounding box of the workers, grown by the footprint, is
+        covered. `_origin` is the map cell of the first unpadded cell.
+        """
+        snapshot: UnitSnapshot = self._unit_snapshot.snapshot
+        workers: np.ndarray = snapshot.positions[
+            snapshot.is_enemy & ~snapshot.is_memory & snapshot.type_mask(WORKER_TYPES)
+        ]
+        if not len(workers):
+            self._density = np.zeros((0, 0))
+            return
+
+        grid: np.ndarray = self.manager_mediator.get_ground_grid
+        pad: int = self._kernel.shape[0] // 2
+        cells: np.ndarray = workers.astype(int)
+        low: np.ndarray = np.maximum(cells.min(axis=0) - pad, 0)
+        high: np.ndarray = np.minimum(cells.max(axis=0) + pad + 1, grid.shape)
+        cells = cells[np.all((cells >= low) & (cells < high), axis=1)] - low
+
+        counts: np.ndarray = np.zeros(high - low)
+        np.add.at(counts, (cells[:, 0], cells[:, 1]), 1.0)
+        density: np.ndarray = convolve(counts, self._kernel, mode="constant")
+        area: np.ndarray = grid[low[0] : high[0], low[1] : high[1]]
+        # mines are dropped on the ground
+        density[~(np.isfinite(area) & (area > 0))] = 0.0
+
+        self._density = np.pad(density, 2 * self.SEARCH_RADIUS)
+        self._origin = low
@@ -1,29 +1,47 @@
 from typing import TYPE_CHECKING
 
-from sc2.unit import Unit
+import numpy as np
+
 from sc2.units import Units
 
 from ares import ManagerMediator
-from ares.consts import UnitRole
+from ares.consts import UnitRole, UnitTreeQueryType
 from ares.managers.manager import Manager
 from sc2.ids.unit_typeid import UnitTypeId as UnitID
 
 
 from bot.combat.base_unit import BaseUnit
 from bot.combat.worker_defenders import WorkerDefenders
+from bot.consts import ManagerPriority
+from bot.managers.unit_proximity_manager import UnitProximityManager
+from bot.managers.unit_snapshot_manager import UnitSnapshot, UnitSnapshotManager
 
 if TYPE_CHECKING:
     from ares import AresBot
 
 
 class WorkerDefenceManager(Manager):
+    # cadence for `ManagerScheduler`
+    UPDATE_PERIOD: int = 1
+    UPDATE_PRIORITY: ManagerPriority = ManagerPriority.HIGH
+    UPDATE_BUDGET_MS: float = 2.0
     MIN_HEALTH_PERC: float = 0.24
+    # workers pulled per enemy unit of each type near our bases
+    WORKERS_REQUIRED_PER_ENEMY: dict[UnitID, int] = {
+        UnitID.DRONE: 1,
+        UnitID.PROBE: 1,
+        UnitID.SCV: 1,
+        UnitID.ZEALOT: 4,
+        UnitID.ZERGLING: 2,
+    }
 
     def __init__(
         self,
         ai: "AresBot",
         config: dict,
         mediator: ManagerMediator,
+        unit_snapshot: UnitSnapshotManager,
+        unit_proximity: UnitProximityManager,
     ) -> None:
         """Handle scouting related tasks.
 
@@ -39,6 +57,10 @@ class WorkerDefenceManager(Manager):
             Dictionary with the data from the configuration file
         mediator :
             ManagerMediator used for getting information from other managers.
+        unit_snapshot :
+            Provides the columnar unit snapshot for the current step.
+        unit_proximity :
+            Provides the enemies near each of our units for the current step.
 
         Returns
         -------
@@ -46,15 +68,13 @@ class WorkerDefenceManager(Manager):
         """
         super().__init__(ai, config, mediator)
 
+        self._unit_snapshot: UnitSnapshotManager = unit_snapshot
+        self._unit_proximity: UnitProximityManager = unit_proximity
         self.worker_defenders_behavior: BaseUnit = WorkerDefenders(ai, config, mediator)
 
-        self._enemy_to_workers_required: dict[UnitID, int] = {
-            UnitID.DRONE: 1,
-            UnitID.PROBE: 1,
-            UnitID.SCV: 1,
-            UnitID.ZEALOT: 4,
-            UnitID.ZERGLING: 2,
-        }
+        self._enemy_to_workers_required: dict[UnitID, int] = dict(
+            self.WORKERS_REQUIRED_PER_ENEMY
+        )
 
     @property
     def enabled(self) -> bool:
@@ -80,24 +100,31 @@ class WorkerDefenceManager(Manager):
         if not enemy_near_bases:
             return
 
-        scvs: Units = self.manager_mediator.get_units_from_role(
-            role=UnitRole.GATHERING, unit_type=UnitID.SCV
-        ).filter(lambda worker: worker.health_percentage > self.MIN_HEALTH_PERC)
+        snapshot: UnitSnapshot = self._unit_snapshot.snapshot
+        scvs: Units = snapshot.select(
+            self.manager_mediator.get_units_from_role(
+                role=UnitRole.GATHERING, unit_type=UnitID.SCV
+            ),
+            snapshot.health_percentage > self.MIN_HEALTH_PERC,
+        )
         if not scvs:
             return
 
         num_scvs_required: int = 0
         num_enemy: int = 0
         for base_tag, enemy_tags in enemy_near_bases.items():
-            # look for enemy units we are interested in
-            enemy_interested_in: list[Unit] = [
-                u
-                for u in self.ai.enemy_units
-                if u.tag in enemy_tags and u.type_id in self._enemy_to_workers_required
+            # look for visible enemy units we are interested in
+            rows: np.ndarray = snapshot.rows_for(enemy_tags)
+            rows = rows[rows >= 0]
+            enemy_type_ids: np.ndarray = snapshot.type_ids[
+                rows[~snapshot.is_memory[rows]]
             ]
-            num_enemy += len(enemy_interested_in)
-            for enemy in enemy_interested_in:
-                num_scvs_required += self._enemy_to_workers_required[enemy.type_id]
+            for enemy_type, required in self._enemy_to_workers_required.items():
+                num_of_type: int = int(
+                    np.count_nonzero(enemy_type_ids == enemy_type.value)
+                )
+                num_enemy += num_of_type
+                num_scvs_required += num_of_type * required
 
         num_scvs_required = min(num_scvs_required, 16)
         num_scvs_required -= len(defender_scvs)
@@ -120,4 +147,9 @@ class WorkerDefenceManager(Manager):
                 self.manager_mediator.assign_role(tag=scv.tag, role=UnitRole.GATHERING)
 
     def _execute_worker_defenders(self, defender_scvs: Units) -> None:
-        self.worker_defenders_behavior.execute(defender_scvs)
+        self.worker_defenders_behavior.execute(
+            defender_scvs,
+            ground_neighbour_table=self._unit_proximity.get_neighbour_table(
+                UnitTreeQueryType.EnemyGround
+            ),
+        )
@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Optional
+
+from loguru import logger
+
+
+class SamplingProfiler:
+    """Sample the main thread's stack on a background thread during steps.
+
+    Unlike `StepProfiler` this sees inside ares and python-sc2 calls, at the
+    cost of only being statistically accurate. Samples are only taken while
+    `active` is set, so time spent waiting on the game isn't counted. The
+    result is written in the collapsed stack format that flamegraph.pl,
+    speedscope and inferno read.
+
+    Parameters
+    ----------
+    interval_ms : float
+        Time between samples.
+    """
+
+    def __init__(self, interval_ms: float):
+        self.interval_s: float = interval_ms / 1000.0
+        self.active: bool = False
+        self.num_samples: int = 0
+        self._stacks: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = dict()
+        self._main_thread_id: int = threading.main_thread().ident
+        self._stop: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="phobos-sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def write(self, path: Path) -> Optional[Path]:
+        """Stop sampling and write the collapsed stacks.
+
+        Parameters
+        ----------
+        path :
+            Where to write the stacks, one `frame;frame;frame count` per line.
+
+        Returns
+        -------
+        Optional[Path] :
+            The stacks, None if there weren't any or they couldn't be written.
+        """
+        self.stop()
+        if not self._stacks:
+            return None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            logger.warning(f"Couldn't write sampled stacks to {path}: {e}")
+            return None
+        logger.info(f"{self.num_samples} stack samples written to {path}")
+        return path
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            if not self.active:
+                continue
+            frame: Optional[FrameType] = sys._current_frames().get(self._main_thread_id)
+            if frame:
+                self._stacks[self._collapse(frame)] += 1
+                self.num_samples += 1
+
+    def _collapse(self, frame: FrameType) -> str:
+        labels: list[str] = []
+        while frame:
+            code: CodeType = frame.f_code
+            if not (label := self._labels.get(code)):
+                # `;` separates frames, so keep it out of the labels
+                file: str = "/".join(code.co_filename.split(os.sep)[-2:])
+                label = self._labels[code] = f"{code.co_qualname} ({file})".replace(
+                    ";", ":"
+                )
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
@@ -0,0 +1,217 @@
+import json
+import math
+from functools import wraps
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Callable, Iterable, Optional
+
+from ares.managers.manager import Manager
+from loguru import logger
+
+from bot.combat.base_unit import BaseUnit
+from bot.profiling.step_tracer import StepTracer
+
+# histogram bins are log spaced, from 2^MIN_LOG2_NS ns to 2^MAX_LOG2_NS ns
+MIN_LOG2_NS: int = 7
+MAX_LOG2_NS: int = 37
+BINS_PER_OCTAVE: int = 8
+NUM_BINS: int = (MAX_LOG2_NS - MIN_LOG2_NS) * BINS_PER_OCTAVE
+REPORT_PERCENTILES: tuple[int, ...] = (50, 95, 99)
+
+
+def _subclasses(cls: type) -> list[type]:
+    """Every class deriving from `cls`, directly or not."""
+    subclasses: list[type] = []
+    for subclass in cls.__subclasses__():
+        subclasses.append(subclass)
+        subclasses.extend(_subclasses(subclass))
+    return subclasses
+
+
+class TimingHistogram:
+    """Log binned timings of one component, about 9% resolution per bin."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts: list[int] = [0] * NUM_BINS
+        self.count: int = 0
+        self.total_ns: int = 0
+        self.max_ns: int = 0
+
+    def record(self, duration_ns: int) -> None:
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        idx: int = (
+            int((math.log2(duration_ns) - MIN_LOG2_NS) * BINS_PER_OCTAVE)
+            if duration_ns > 0
+            else 0
+        )
+        self.counts[min(max(idx, 0), NUM_BINS - 1)] += 1
+
+    def percentile(self, percentile: float) -> float:
+        """Approximate `percentile` of the recorded timings, in ms."""
+        if not self.count:
+            return 0.0
+        threshold: float = self.count * percentile / 100.0
+        cumulative: int = 0
+        for idx, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= threshold:
+                # geometric centre of the bin, never above the real max
+                centre_ns: float = 2 ** (MIN_LOG2_NS + (idx + 0.5) / BINS_PER_OCTAVE)
+                return min(centre_ns, self.max_ns) / 1e6
+        return self.max_ns / 1e6
+
+    def summary(self) -> dict[str, float]:
+        summary: dict[str, float] = {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / 1e6 if self.count else 0.0,
+            "total_ms": self.total_ns / 1e6,
+        }
+        for percentile in REPORT_PERCENTILES:
+            summary[f"p{percentile}_ms"] = self.percentile(percentile)
+        summary["max_ms"] = self.max_ns / 1e6
+        return summary
+
+
+class StepProfiler:
+    """Time manager updates, combat classes and behaviors throughout a game.
+
+    Timings are inclusive, so a `BaseUnit` also counts the behaviors it
+    registers. With a `tracer` every timing is kept as a span as well, for a
+    per-step timeline. Components are named `Manager/<class>`, `BaseUnit/<class>`
+    and `Behavior/<class>`, combat classes inheriting `execute` are timed as
+    the class they inherit it from.
+
+    Parameters
+    ----------
+    report_dir : Path
+        Where to write the report at the end of the game.
+    tracer : Optional[StepTracer]
+        Also record every timing as a span in this tracer.
+    """
+
+    def __init__(self, report_dir: Path, tracer: Optional[StepTracer] = None):
+        self.report_dir: Path = report_dir
+        self.tracer: Optional[StepTracer] = tracer
+        self.histograms: dict[str, TimingHistogram] = dict()
+        self._instrumented: set[int] = set()
+        # combat classes timed by this profiler, with their own `execute`
+        self._combat_executes: dict[type, Callable] = dict()
+
+    def record(self, name: str, start_ns: int, end_ns: int) -> None:
+        """Record a timing for `name` taken outside the instrumented methods."""
+        if not (histogram := self.histograms.get(name)):
+            histogram = self.histograms[name] = TimingHistogram()
+        histogram.record(end_ns - start_ns)
+        if self.tracer is not None:
+            self.tracer.add_span(self.tracer.intern(name), start_ns, end_ns)
+
+    def instrument_managers(self, managers: Iterable[Manager]) -> None:
+        """Time `update` on each of `managers`.
+
+        Parameters
+        ----------
+        managers :
+            Manager instances, anything already instrumented is skipped.
+        """
+        for manager in managers:
+            if id(manager) in self._instrumented:
+                continue
+            self._instrumented.add(id(manager))
+            manager.update = self._time_async(
+                f"Manager/{type(manager).__name__}", manager.update
+            )
+
+    def instrument_combat_classes(self) -> None:
+        """Time `execute` on every `BaseUnit` class imported so far.
+
+        The classes themselves are changed, until `restore_combat_classes`.
+        """
+        for cls in _subclasses(BaseUnit):
+            if cls in self._combat_executes or "execute" not in vars(cls):
+                continue
+            self._combat_executes[cls] = vars(cls)["execute"]
+            cls.execute = self._time_method(f"BaseUnit/{cls.__name__}", cls.execute)
+
+    def restore_combat_classes(self) -> None:
+        """Put back the `execute` methods replaced by `instrument_combat_classes`."""
+        for cls, execute in self._combat_executes.items():
+            cls.execute = execute
+        self._combat_executes.clear()
+
+    def write_report(self, game_info: dict[str, Any]) -> Optional[Path]:
+        """Write the timing summary of this game as json, and the trace if any.
+
+        Parameters
+        ----------
+        game_info :
+            Extra information to store with the timings (result, map etc.)
+
+        Returns
+        -------
+        Optional[Path] :
+            The report, None if it couldn't be written.
+        """
+        report: dict[str, Any] = {
+            **game_info,
+            "components": {
+                name: histogram.summary()
+                for name, histogram in sorted(self.histograms.items())
+            },
+        }
+        # the game is over, stop timing combat classes
+        self.restore_combat_classes()
+        name: str = game_info.get("name", "game")
+        if self.tracer is not None:
+            self.tracer.write(self.report_dir / f"{name}.trace.json")
+
+        path: Path = self.report_dir / f"{name}.json"
+        try:
+            self.report_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+        except OSError as e:
+            logger.warning(f"Couldn't write timing report to {path}: {e}")
+            return None
+        logger.info(f"Timing report written to {path}")
+        return path
+
+    def _time_async(self, name: str, func: Callable) -> Callable:
+        histogram: TimingHistogram = self.histograms.setdefault(name, TimingHistogram())
+        tracer: Optional[StepTracer] = self.tracer
+        name_id: int = tracer.intern(name) if tracer is not None else -1
+
+        @wraps(func)
+        async def timed(*args, **kwargs):
+            start: int = perf_counter_ns()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                end: int = perf_counter_ns()
+                histogram.record(end - start)
+                if tracer is not None:
+                    tracer.add_span(name_id, start, end)
+
+        return timed
+
+    def _time_method(self, name: str, func: Callable) -> Callable:
+        histogram: TimingHistogram = self.histograms.setdefault(name, TimingHistogram())
+        tracer: Optional[StepTracer] = self.tracer
+        name_id: int = tracer.intern(name) if tracer is not None else -1
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start: int = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end: int = perf_counter_ns()
+                histogram.record(end - start)
+                if tracer is not None:
+                    tracer.add_span(name_id, start, end)
+
+        return timed
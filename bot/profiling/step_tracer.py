@@ -0,0 +1,88 @@
+import json
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+
+class StepTracer:
+    """Record nested timing spans for a Chrome trace / Perfetto timeline.
+
+    Spans are stored as interned name ids plus start and end times in flat
+    arrays, so recording one is a few appends. Nesting is recovered by the
+    trace viewer from the timestamps, since all spans happen on the main
+    thread.
+
+    Parameters
+    ----------
+    max_spans : int
+        Spans recorded after this many are dropped, to cap memory use.
+    """
+
+    def __init__(self, max_spans: int):
+        self.max_spans: int = max_spans
+        self.dropped: int = 0
+        self._names: list[str] = []
+        self._name_ids: dict[str, int] = dict()
+        self._span_names: array = array("i")
+        self._starts: array = array("q")
+        self._ends: array = array("q")
+
+    def __len__(self) -> int:
+        return len(self._span_names)
+
+    def intern(self, name: str) -> int:
+        """Id to record spans called `name` with."""
+        if (name_id := self._name_ids.get(name)) is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    def add_span(self, name_id: int, start_ns: int, end_ns: int) -> None:
+        if len(self._span_names) >= self.max_spans:
+            self.dropped += 1
+            return
+        self._span_names.append(name_id)
+        self._starts.append(start_ns)
+        self._ends.append(end_ns)
+
+    def write(self, path: Path) -> Optional[Path]:
+        """Write all spans in the Chrome trace event format.
+
+        Parameters
+        ----------
+        path :
+            Where to write the trace, open it in Perfetto or chrome://tracing.
+
+        Returns
+        -------
+        Optional[Path] :
+            The trace, None if it couldn't be written.
+        """
+        if not self._starts:
+            return None
+        origin: int = min(self._starts)
+        names: list[str] = [json.dumps(name) for name in self._names]
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                f.write('{"displayTimeUnit":"ms","traceEvents":[\n')
+                for i, (name_id, start, end) in enumerate(
+                    zip(self._span_names, self._starts, self._ends)
+                ):
+                    # timestamps are in microseconds
+                    f.write(
+                        f'{"," if i else ""}{{"name":{names[name_id]},"ph":"X",'
+                        f'"ts":{(start - origin) / 1e3:.3f},'
+                        f'"dur":{(end - start) / 1e3:.3f},"pid":0,"tid":0}}\n'
+                    )
+                f.write("]}\n")
+        except OSError as e:
+            logger.warning(f"Couldn't write trace to {path}: {e}")
+            return None
+        logger.info(
+            f"Trace with {len(self)} spans written to {path}"
+            + (f", {self.dropped} spans dropped" if self.dropped else "")
+        )
+        return path
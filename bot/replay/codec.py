@@ -0,0 +1,249 @@
+"""Turn mediator arguments and results into json and back.
+
+Units are stored by tag and looked up in the replayed frame, arrays are stored
+in the chunk (or referenced in an earlier chunk when unchanged) and anything
+that can't be represented is kept as its repr and replayed as None.
+"""
+import importlib
+import json
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Optional
+
+import numpy as np
+from sc2.position import Point2, Point3
+from sc2.unit import Unit
+from sc2.units import Units
+
+if TYPE_CHECKING:
+    from sc2.bot_ai import BotAI
+
+    from bot.replay.frame_file import FrameReader
+
+# json keys marking encoded values
+ARRAY: str = "a"
+CHUNK: str = "c"
+DICT: str = "d"
+ENUM: str = "e"
+POINT: str = "p"
+REPR: str = "r"
+SET: str = "s"
+SOURCE: str = "g"
+TUPLE: str = "t"
+UNIT: str = "u"
+UNITS: str = "us"
+
+
+def _enum_path(value: Enum) -> str:
+    return f"{type(value).__module__}:{type(value).__qualname__}"
+
+
+def encode_key(args: tuple, kwargs: dict[str, Any], sources: dict[int, str]) -> str:
+    """Identify a query by its arguments.
+
+    Arrays passed in are named after the query that returned them this frame
+    (`sources`, by array id), so the same grid is recognised when replaying.
+    """
+
+    def encode(value: Any) -> Any:
+        if isinstance(value, Enum):
+            return {ENUM: _enum_path(value), "v": encode(value.value)}
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, Unit):
+            return {UNIT: value.tag}
+        if isinstance(value, Units):
+            return {UNITS: [u.tag for u in value]}
+        if isinstance(value, (Point2, Point3)):
+            return {POINT: [float(v) for v in value]}
+        if isinstance(value, np.ndarray):
+            if source := sources.get(id(value)):
+                return {SOURCE: source}
+            return {SOURCE: None, "shape": list(value.shape)}
+        if isinstance(value, dict):
+            return {
+                DICT: sorted(
+                    ([encode(k), encode(v)] for k, v in value.items()), key=repr
+                )
+            }
+        if isinstance(value, (set, frozenset)):
+            return {SET: sorted((encode(v) for v in value), key=repr)}
+        if isinstance(value, (list, tuple)):
+            return [encode(v) for v in value]
+        return {REPR: type(value).__name__}
+
+    return json.dumps(
+        [encode(list(args)), {k: encode(v) for k, v in sorted(kwargs.items())}],
+        separators=(",", ":"),
+    )
+
+
+class ValueEncoder:
+    """Encode query results for one chunk at a time.
+
+    Arrays are collected in `arrays` under a name made from the query that
+    returned them, and only stored again when they differ from the array the
+    same query returned in the previous chunk.
+    """
+
+    def __init__(self):
+        self.chunk_index: int = -1
+        self.arrays: dict[str, np.ndarray] = dict()
+        # query that returned each array this chunk, by array id
+        self.sources: dict[int, str] = dict()
+        # encoded refs by array id, so arrays returned repeatedly are stored once
+        self._refs: dict[int, dict[str, Any]] = dict()
+        self._kept: list[np.ndarray] = []
+        self._counts: dict[str, int] = dict()
+        # last stored version of each array name: (chunk, array)
+        self._previous: dict[str, tuple[int, np.ndarray]] = dict()
+
+    def start_chunk(self, chunk_index: int) -> None:
+        self.chunk_index = chunk_index
+        self.arrays = dict()
+        self.sources.clear()
+        self._refs.clear()
+        self._kept.clear()
+        self._counts.clear()
+
+    def encode(self, source: str, value: Any) -> Any:
+        """Encode `value`, returned by the query `source`."""
+        if isinstance(value, Enum):
+            return {ENUM: _enum_path(value), "v": self.encode(source, value.value)}
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, Unit):
+            return {UNIT: value.tag}
+        if isinstance(value, Units):
+            return {UNITS: [u.tag for u in value]}
+        if isinstance(value, (Point2, Point3)):
+            return {POINT: [float(v) for v in value]}
+        if isinstance(value, np.ndarray):
+            return self._encode_array(source, value)
+        if isinstance(value, dict):
+            return {
+                DICT: [
+                    [self.encode(source, k), self.encode(source, v)]
+                    for k, v in value.items()
+                ]
+            }
+        if isinstance(value, (set, frozenset)):
+            return {SET: [self.encode(source, v) for v in value]}
+        if isinstance(value, tuple):
+            return {TUPLE: [self.encode(source, v) for v in value]}
+        if isinstance(value, list):
+            return [self.encode(source, v) for v in value]
+        return {REPR: repr(value)}
+
+    def _encode_array(self, source: str, array: np.ndarray) -> dict[str, Any]:
+        if ref := self._refs.get(id(array)):
+            return ref
+
+        count: int = self._counts.get(source, 0)
+        self._counts[source] = count + 1
+        name: str = f"{source}/{count}"
+        previous: Optional[tuple[int, np.ndarray]] = self._previous.get(name)
+        if (
+            previous
+            and previous[1].shape == array.shape
+            and previous[1].dtype == array.dtype
+            and np.array_equal(previous[1], array, equal_nan=array.dtype.kind == "f")
+        ):
+            ref: dict[str, Any] = {ARRAY: name, CHUNK: previous[0]}
+        else:
+            self.arrays[name] = array
+            self._previous[name] = (self.chunk_index, array.copy())
+            ref = {ARRAY: name, CHUNK: self.chunk_index}
+
+        self.sources[id(array)] = source
+        self._refs[id(array)] = ref
+        # hold on to the array so its id isn't reused within the chunk
+        self._kept.append(array)
+        return ref
+
+
+class ValueDecoder:
+    """Decode recorded values against the frame being replayed.
+
+    Parameters
+    ----------
+    reader : FrameReader
+        The recording, arrays are read from it.
+    bot : BotAI
+        The bot replaying the frames, for building `Units`.
+    """
+
+    def __init__(self, reader: "FrameReader", bot: "BotAI"):
+        self._reader: "FrameReader" = reader
+        self.bot: "BotAI" = bot
+        self._units: dict[int, Unit] = dict()
+        self._arrays: dict[tuple[int, str], np.ndarray] = dict()
+        self._enums: dict[str, type] = dict()
+        # query that returned each decoded array, by array id
+        self.sources: dict[int, str] = dict()
+
+    def start_chunk(self, units: dict[int, Unit]) -> None:
+        """Decode against a new frame.
+
+        Parameters
+        ----------
+        units :
+            Units in the frame by tag, recorded units that aren't in here
+            (ares memory units) are left out.
+        """
+        self._units = units
+        self.sources.clear()
+        self._arrays.clear()
+
+    def decode(self, source: str, value: Any) -> Any:
+        """Decode `value`, returned by the query `source`."""
+        if isinstance(value, list):
+            return [self.decode(source, v) for v in value]
+        if not isinstance(value, dict):
+            return value
+        if UNIT in value:
+            return self._units.get(value[UNIT])
+        if UNITS in value:
+            return Units(
+                [u for tag in value[UNITS] if (u := self._units.get(tag))], self.bot
+            )
+        if POINT in value:
+            return (Point2 if len(value[POINT]) == 2 else Point3)(value[POINT])
+        if ARRAY in value:
+            return self._decode_array(source, value[ARRAY], value[CHUNK])
+        if ENUM in value:
+            return self._enum(value[ENUM])(self.decode(source, value["v"]))
+        if DICT in value:
+            return {
+                self._hashable(self.decode(source, k)): self.decode(source, v)
+                for k, v in value[DICT]
+            }
+        if SET in value:
+            return {self._hashable(self.decode(source, v)) for v in value[SET]}
+        if TUPLE in value:
+            return tuple(self.decode(source, v) for v in value[TUPLE])
+        return None
+
+    def _decode_array(self, source: str, name: str, chunk: int) -> np.ndarray:
+        key: tuple[int, str] = (chunk, name)
+        if (array := self._arrays.get(key)) is None:
+            # managers may write to the grids they get, so hand out copies
+            array = self._arrays[key] = self._reader.array(chunk, name).copy()
+            self.sources[id(array)] = source
+        return array
+
+    def _enum(self, path: str) -> type:
+        if not (enum := self._enums.get(path)):
+            module, qualname = path.split(":")
+            enum = importlib.import_module(module)
+            for part in qualname.split("."):
+                enum = getattr(enum, part)
+            self._enums[path] = enum
+        return enum
+
+    @staticmethod
+    def _hashable(value: Any) -> Any:
+        return tuple(value) if isinstance(value, list) else value
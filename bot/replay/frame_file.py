@@ -0,0 +1,281 @@
+"""Chunked binary file of recorded frames that can be read memory mapped.
+
+Layout, all little endian::
+
+    MAGIC
+    chunk*      header (frame, meta length, array count), json meta, arrays
+    index       int64 offset of every chunk, chunk count, INDEX_MAGIC
+
+Each array has a small header (name, dtype, shape, compressed flag, size) and
+its data starts on an `ALIGNMENT` byte boundary, so uncompressed arrays are
+read as views into the mapped file without copying. The index is written when
+the file is closed, files from a game that crashed are read by walking the
+chunks instead.
+"""
+import json
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional
+
+import numpy as np
+
+MAGIC: bytes = b"PHOBREC1"
+INDEX_MAGIC: bytes = b"PHOBIDX1"
+ALIGNMENT: int = 64
+
+# frame, meta length, number of arrays
+CHUNK_HEADER: struct.Struct = struct.Struct("<qII")
+# name length, dtype length, ndim, compressed, data size
+ARRAY_HEADER: struct.Struct = struct.Struct("<HHBBq")
+# number of chunks in the index
+INDEX_FOOTER: struct.Struct = struct.Struct("<q")
+
+
+class FrameWriter:
+    """Append frames to a recording.
+
+    Parameters
+    ----------
+    path : Path
+        File to write, replaced if it exists.
+    """
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(MAGIC)
+        self._offset: int = len(MAGIC)
+        self._chunk_offsets: list[int] = []
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._chunk_offsets)
+
+    def write_chunk(
+        self,
+        frame: int,
+        meta: dict[str, Any],
+        arrays: Optional[dict[str, np.ndarray]] = None,
+        compress: frozenset[str] = frozenset(),
+    ) -> int:
+        """Write one chunk.
+
+        Parameters
+        ----------
+        frame :
+            Game loop the chunk belongs to.
+        meta :
+            Anything json serialisable.
+        arrays :
+            Arrays stored with the chunk, by name.
+        compress :
+            Names of the arrays to zlib compress, these can't be mapped
+            without copying so are best kept to byte blobs.
+
+        Returns
+        -------
+        int :
+            Index of the chunk in the file.
+        """
+        arrays = arrays or dict()
+        meta_bytes: bytes = json.dumps(meta, separators=(",", ":")).encode()
+        self._chunk_offsets.append(self._offset)
+        self._write(CHUNK_HEADER.pack(frame, len(meta_bytes), len(arrays)))
+        self._write(meta_bytes)
+
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            data: bytes | memoryview = memoryview(array).cast("B")
+            compressed: bool = name in compress
+            if compressed:
+                data = zlib.compress(data, 1)
+            name_bytes: bytes = name.encode()
+            dtype_bytes: bytes = array.dtype.str.encode()
+            self._write(
+                ARRAY_HEADER.pack(
+                    len(name_bytes),
+                    len(dtype_bytes),
+                    array.ndim,
+                    compressed,
+                    len(data),
+                )
+            )
+            self._write(name_bytes + dtype_bytes)
+            self._write(struct.pack(f"<{array.ndim}q", *array.shape))
+            self._write(b"\0" * (-self._offset % ALIGNMENT))
+            self._write(data)
+
+        return len(self._chunk_offsets) - 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        index: np.ndarray = np.array(self._chunk_offsets, dtype="<i8")
+        self._file.write(index.tobytes())
+        self._file.write(INDEX_FOOTER.pack(len(index)))
+        self._file.write(INDEX_MAGIC)
+        self._file.close()
+
+    def _write(self, data: bytes | memoryview) -> None:
+        self._file.write(data)
+        self._offset += len(data)
+
+
+class ArrayEntry:
+    """Where an array sits in the mapped file."""
+
+    __slots__ = ("dtype", "shape", "offset", "size", "compressed")
+
+    def __init__(
+        self, dtype: str, shape: tuple, offset: int, size: int, compressed: bool
+    ):
+        self.dtype: str = dtype
+        self.shape: tuple = shape
+        self.offset: int = offset
+        self.size: int = size
+        self.compressed: bool = compressed
+
+
+class Chunk:
+    """One chunk of a recording, arrays are read on access."""
+
+    __slots__ = ("index", "frame", "meta", "_entries", "_data")
+
+    def __init__(
+        self,
+        index: int,
+        frame: int,
+        meta: dict[str, Any],
+        entries: dict[str, ArrayEntry],
+        data: np.memmap,
+    ):
+        self.index: int = index
+        self.frame: int = frame
+        self.meta: dict[str, Any] = meta
+        self._entries: dict[str, ArrayEntry] = entries
+        self._data: np.memmap = data
+
+    @property
+    def array_names(self) -> list[str]:
+        return list(self._entries)
+
+    def array(self, name: str) -> np.ndarray:
+        """A stored array, a read only view into the file unless compressed."""
+        return _read_array(self._data, self._entries[name])
+
+
+def _read_array(data: np.memmap, entry: ArrayEntry) -> np.ndarray:
+    dtype: np.dtype = np.dtype(entry.dtype)
+    if entry.compressed:
+        raw: bytes = zlib.decompress(data[entry.offset : entry.offset + entry.size])
+        return np.frombuffer(raw, dtype=dtype).reshape(entry.shape)
+    return np.frombuffer(
+        data, dtype=dtype, count=entry.size // dtype.itemsize, offset=entry.offset
+    ).reshape(entry.shape)
+
+
+class FrameReader:
+    """Read a recording written by `FrameWriter`.
+
+    Parameters
+    ----------
+    path : Path
+        The recording.
+    """
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self._data: np.memmap = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._data[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a phobos recording")
+        self._chunk_offsets: list[int] = self._read_index()
+        self._array_entries: dict[int, dict[str, ArrayEntry]] = dict()
+
+    def __len__(self) -> int:
+        return len(self._chunk_offsets)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        for index in range(len(self)):
+            yield self.chunk(index)
+
+    def chunk(self, index: int) -> Chunk:
+        offset: int = self._chunk_offsets[index]
+        frame, meta_length, _ = CHUNK_HEADER.unpack_from(self._data, offset)
+        offset += CHUNK_HEADER.size
+        meta: dict[str, Any] = json.loads(
+            bytes(self._data[offset : offset + meta_length])
+        )
+        return Chunk(index, frame, meta, self._entries(index), self._data)
+
+    def array(self, index: int, name: str) -> np.ndarray:
+        """An array stored in chunk `index`, without reading the chunk's meta."""
+        return _read_array(self._data, self._entries(index)[name])
+
+    def _entries(self, index: int) -> dict[str, ArrayEntry]:
+        if (entries := self._array_entries.get(index)) is not None:
+            return entries
+        offset: int = self._chunk_offsets[index]
+        _, meta_length, num_arrays = CHUNK_HEADER.unpack_from(self._data, offset)
+        offset += CHUNK_HEADER.size + meta_length
+        entries = self._array_entries[index] = dict()
+        for _ in range(num_arrays):
+            name, entry, offset = self._read_array_entry(offset)
+            entries[name] = entry
+        return entries
+
+    def _read_array_entry(self, offset: int) -> tuple[str, ArrayEntry, int]:
+        name_length, dtype_length, ndim, compressed, size = ARRAY_HEADER.unpack_from(
+            self._data, offset
+        )
+        offset += ARRAY_HEADER.size
+        name: str = bytes(self._data[offset : offset + name_length]).decode()
+        offset += name_length
+        dtype: str = bytes(self._data[offset : offset + dtype_length]).decode()
+        offset += dtype_length
+        shape: tuple = struct.unpack_from(f"<{ndim}q", self._data, offset)
+        offset += 8 * ndim
+        offset += -offset % ALIGNMENT
+        return (
+            name,
+            ArrayEntry(dtype, shape, offset, size, bool(compressed)),
+            offset + size,
+        )
+
+    def _read_index(self) -> list[int]:
+        footer_size: int = INDEX_FOOTER.size + len(INDEX_MAGIC)
+        if (
+            len(self._data) >= len(MAGIC) + footer_size
+            and bytes(self._data[-len(INDEX_MAGIC) :]) == INDEX_MAGIC
+        ):
+            (num_chunks,) = INDEX_FOOTER.unpack_from(
+                self._data, len(self._data) - footer_size
+            )
+            start: int = len(self._data) - footer_size - 8 * num_chunks
+            return np.frombuffer(
+                self._data, dtype="<i8", count=num_chunks, offset=start
+            ).tolist()
+        return self._scan_chunks()
+
+    def _scan_chunks(self) -> list[int]:
+        """Find the chunks of a file that was never closed."""
+        offsets: list[int] = []
+        offset: int = len(MAGIC)
+        end: int = len(self._data)
+        while offset + CHUNK_HEADER.size <= end:
+            try:
+                _, meta_length, num_arrays = CHUNK_HEADER.unpack_from(
+                    self._data, offset
+                )
+                next_offset: int = offset + CHUNK_HEADER.size + meta_length
+                for _ in range(num_arrays):
+                    _, _, next_offset = self._read_array_entry(next_offset)
+            except (struct.error, UnicodeDecodeError):
+                break
+            # the last chunk may have been cut off mid write
+            if next_offset > end:
+                break
+            offsets.append(offset)
+            offset = next_offset
+        return offsets
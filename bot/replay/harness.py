@@ -0,0 +1,334 @@
+"""Replay a recording through the phobos managers without StarCraft II.
+
+Usage::
+
+    poetry run python -m bot.replay.harness data/recordings/<game>.rec [--frames N]
+
+Each recorded observation is fed to a python-sc2 `BotAI` as if it came from
+the game, and the phobos managers run against a `ReplayMediator` answering
+their queries with the recorded results. The commands the managers issue are
+compared with the ones the bot issued in the game, and a timing report is
+written next to the regular profiling reports.
+
+Mediator results are replayed as recorded, not recomputed, so changes to how
+the managers query the mediator show up as misses rather than new answers, and
+unit roles reflect the decisions made in the recorded game.
+"""
+import argparse
+import asyncio
+import json
+from collections import Counter, defaultdict, deque
+from functools import partial
+from pathlib import Path
+from time import perf_counter_ns
+from types import SimpleNamespace
+from typing import Any, Optional
+
+import yaml
+from ares.behaviors.behavior import Behavior
+from loguru import logger
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.bot_ai import BotAI
+from sc2.game_data import GameData
+from sc2.game_info import GameInfo
+from sc2.game_state import GameState
+from sc2.position import Point2
+from sc2.unit import Unit
+from sc2.units import Units
+
+from ares.cython_extensions.geometry import cy_distance_to
+from bot.command_filter import CommandFilter
+from bot.drop_tracker import DropTracker
+from bot.manager_setup import PhobosManagers, create_managers
+from bot.profiling.step_profiler import StepProfiler
+from bot.replay.codec import ValueDecoder, encode_key
+from bot.replay.frame_file import Chunk, FrameReader
+from bot.replay.recorder import PROPERTY, encode_command
+from bot.step_watchdog import StepWatchdog
+
+ROOT: Path = Path(__file__).parent.parent.parent
+CONFIG_FILE: Path = ROOT / "config.yml"
+ARES_CONFIG_FILE: Path = ROOT / "ares-sc2" / "src" / "ares" / "config.yml"
+REPORT_DIR: Path = ROOT / "data" / "profiles"
+# key of a lookup without arguments
+NO_ARGS: str = encode_key((), {}, {})
+
+
+def load_config() -> dict:
+    """The ares defaults overridden by the phobos config, as `AresBot` does."""
+    config: dict = dict()
+    for path in (ARES_CONFIG_FILE, CONFIG_FILE):
+        if not path.is_file():
+            continue
+        with open(path) as f:
+            for key, value in (yaml.safe_load(f) or {}).items():
+                if isinstance(value, dict) and isinstance(config.get(key), dict):
+                    config[key] = {**config[key], **value}
+                else:
+                    config[key] = value
+    return config
+
+
+class ReplayMediator:
+    """Stand in `ManagerMediator` answering from the recorded queries.
+
+    Repeated lookups with the same arguments get the recorded results in
+    order, then the last one again. Lookups that weren't recorded this frame
+    count as misses and get an empty value of the type the query returned
+    before, or None.
+
+    Parameters
+    ----------
+    decoder : ValueDecoder
+        Decodes the recorded results against the current frame.
+    """
+
+    def __init__(self, decoder: ValueDecoder):
+        self._decoder: ValueDecoder = decoder
+        self._kinds: dict[str, str] = dict()
+        self._recorded: defaultdict[tuple[str, str], deque] = defaultdict(deque)
+        self._last: dict[tuple[str, str], Any] = dict()
+        # a result of each query, for the type of empty value to miss with
+        self._examples: dict[str, Any] = dict()
+        self.lookups: int = 0
+        self.misses: Counter[str] = Counter()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._kinds.get(name) == PROPERTY:
+            return self._answer(name, NO_ARGS)
+        return partial(self._call, name)
+
+    def start_frame(self, chunk: Chunk, units: dict[int, Unit]) -> None:
+        self._decoder.start_chunk(units)
+        self._kinds.update(chunk.meta["kinds"])
+        self._recorded.clear()
+        self._last.clear()
+        for name, key, result in chunk.meta["queries"]:
+            self._recorded[(name, key)].append(result)
+
+    def _call(self, name: str, *args, **kwargs) -> Any:
+        return self._answer(name, encode_key(args, kwargs, self._decoder.sources))
+
+    def _answer(self, name: str, key: str) -> Any:
+        self.lookups += 1
+        query: tuple[str, str] = (name, key)
+        if recorded := self._recorded.get(query):
+            value: Any = self._decoder.decode(name, recorded.popleft())
+            self._last[query] = self._examples[name] = value
+            return value
+        if query in self._last:
+            return self._last[query]
+
+        self.misses[name] += 1
+        example: Any = self._examples.get(name)
+        if isinstance(example, Units):
+            return Units([], self._decoder.bot)
+        if isinstance(example, (dict, list, set)):
+            return type(example)()
+        return None
+
+
+class ReplayClient:
+    """The parts of `sc2.client.Client` the managers touch."""
+
+    def __init__(self):
+        self.game_step: int = 1
+
+
+class ReplayBot(BotAI):
+    """python-sc2 bot fed with recorded observations.
+
+    Adds the few `AresBot` members the phobos managers and combat classes use.
+
+    Parameters
+    ----------
+    config : dict
+        Dictionary with the data from the configuration file
+    mediator : ReplayMediator
+        Passed to behaviors as the mediator.
+    """
+
+    def __init__(self, config: dict, mediator: Optional[ReplayMediator] = None):
+        super().__init__()
+        self._initialize_variables()
+        self.config: dict = config
+        self.mediator: Optional[ReplayMediator] = mediator
+        self.build_order_runner: SimpleNamespace = SimpleNamespace(chosen_opening="")
+        self.drop_tracker: Optional[DropTracker] = None
+
+    def register_behavior(self, behavior: Behavior) -> None:
+        behavior.execute(self, self.config, self.mediator)
+
+    async def on_unit_created(self, unit: Unit) -> None:
+        if self.drop_tracker:
+            self.drop_tracker.on_unit_created(unit)
+
+    async def on_unit_destroyed(self, unit_tag: int) -> None:
+        if self.drop_tracker:
+            self.drop_tracker.on_unit_destroyed(unit_tag)
+
+    def get_total_supply(self, units: Units) -> float:
+        return sum(self.calculate_supply_cost(u.type_id) for u in units)
+
+    def get_enemy_proxies(self, distance: float, from_position: Point2) -> list[Unit]:
+        return [
+            s
+            for s in self.enemy_structures
+            if cy_distance_to(s.position, from_position) < distance
+        ]
+
+
+class ReplayHarness:
+    """Run the phobos managers over a recording.
+
+    Parameters
+    ----------
+    path : Path
+        Recording written by `FrameRecorder`.
+    config : dict
+        Dictionary with the data from the configuration file
+    """
+
+    def __init__(self, path: Path, config: dict):
+        self.path: Path = path
+        self.config: dict = config
+        self.reader: FrameReader = FrameReader(path)
+        self.bot: ReplayBot = ReplayBot(config)
+        self.decoder: ValueDecoder = ValueDecoder(self.reader, self.bot)
+        self.mediator: ReplayMediator = ReplayMediator(self.decoder)
+        self.bot.mediator = self.mediator
+        self.watchdog: StepWatchdog = StepWatchdog(config)
+        self.profiler: StepProfiler = StepProfiler(REPORT_DIR)
+        # the recorded commands went through the filter as well
+        self.command_filter: CommandFilter = CommandFilter(self.bot, config)
+        # commands issued by the managers, per replayed frame
+        self.commands: list[list[list]] = []
+        self.matched_commands: int = 0
+        self.recorded_commands: int = 0
+
+    async def run(self, max_frames: Optional[int] = None) -> None:
+        header: Chunk = self.reader.chunk(0)
+        game_info: sc_pb.ResponseGameInfo = sc_pb.ResponseGameInfo.FromString(
+            bytes(header.array("game_info"))
+        )
+        game_data: sc_pb.ResponseData = sc_pb.ResponseData.FromString(
+            bytes(header.array("game_data"))
+        )
+        # python-sc2 takes the pathing grid from a game info response each step
+        game_info_response: sc_pb.Response = sc_pb.Response(game_info=game_info)
+        self.bot._prepare_start(
+            ReplayClient(),
+            header.meta["player_id"],
+            GameInfo(game_info),
+            GameData(game_data),
+        )
+
+        managers: PhobosManagers = create_managers(
+            self.bot, self.config, self.mediator, self.watchdog
+        )
+        self.bot.drop_tracker = managers.drop_tracker
+        self.profiler.instrument_managers(managers.all_managers)
+        self.profiler.instrument_combat_classes()
+
+        num_frames: int = len(self.reader) - 1
+        if max_frames is not None:
+            num_frames = min(num_frames, max_frames)
+        for iteration in range(num_frames):
+            chunk: Chunk = self.reader.chunk(iteration + 1)
+            self.bot.client.game_step = chunk.meta["game_step"]
+            self.bot.build_order_runner.chosen_opening = chunk.meta["info"].get(
+                "opening", self.bot.build_order_runner.chosen_opening
+            )
+            self.bot._prepare_step(
+                GameState(
+                    sc_pb.ResponseObservation.FromString(
+                        bytes(chunk.array("observation"))
+                    )
+                ),
+                game_info_response,
+            )
+            self.mediator.start_frame(chunk, {u.tag: u for u in self.bot.all_units})
+            if iteration == 0:
+                self.bot._prepare_first_step()
+                for manager in managers.update_order:
+                    await manager.initialise()
+            await self.bot.issue_events()
+
+            self.watchdog.start_step()
+            start: int = perf_counter_ns()
+            for manager in managers.update_order:
+                await manager.update(iteration)
+            self.profiler.record("Replay/step", start, perf_counter_ns())
+            self.watchdog.end_step()
+            self._collect_commands(chunk)
+
+        managers.planning.shutdown()
+
+    def write_report(self) -> Optional[Path]:
+        name: str = f"{self.path.stem}.replay"
+        commands_path: Path = REPORT_DIR / f"{name}.commands.jsonl"
+        try:
+            REPORT_DIR.mkdir(parents=True, exist_ok=True)
+            with open(commands_path, "w") as f:
+                for frame_commands in self.commands:
+                    f.write(json.dumps(frame_commands) + "\n")
+        except OSError as e:
+            logger.warning(f"Couldn't write replayed commands to {commands_path}: {e}")
+
+        issued: int = sum(len(c) for c in self.commands)
+        return self.profiler.write_report(
+            {
+                "name": name,
+                "recording": str(self.path),
+                "frames": len(self.commands),
+                "commands": {
+                    "issued": issued,
+                    "recorded": self.recorded_commands,
+                    # issued commands the bot also issued in the recorded game
+                    "matched": self.matched_commands,
+                },
+                "command_filter": self.command_filter.summary(),
+                "mediator": {
+                    "lookups": self.mediator.lookups,
+                    "misses": dict(self.mediator.misses.most_common()),
+                },
+            }
+        )
+
+    def _collect_commands(self, chunk: Chunk) -> None:
+        self.command_filter.filter(self.bot.actions)
+        issued: list[list] = [encode_command(c) for c in self.bot.actions]
+        self.bot.actions.clear()
+        self.bot.unit_tags_received_action.clear()
+        self.commands.append(issued)
+
+        recorded: Counter[str] = Counter(json.dumps(c) for c in chunk.meta["commands"])
+        self.recorded_commands += len(chunk.meta["commands"])
+        for command in issued:
+            key: str = json.dumps(command)
+            if recorded[key] > 0:
+                recorded[key] -= 1
+                self.matched_commands += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", type=Path)
+    parser.add_argument("--frames", type=int, default=None, help="Frames to replay")
+    args = parser.parse_args()
+
+    harness: ReplayHarness = ReplayHarness(args.recording, load_config())
+    asyncio.run(harness.run(args.frames))
+    harness.write_report()
+    for name, histogram in sorted(harness.profiler.histograms.items()):
+        summary: dict[str, float] = histogram.summary()
+        print(
+            f"{name:<40} {summary['mean_ms']:8.3f}ms mean "
+            f"{summary['p99_ms']:8.3f}ms p99 {summary['max_ms']:8.3f}ms max"
+        )
+
+
+if __name__ == "__main__":
+    main()
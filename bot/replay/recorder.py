@@ -0,0 +1,131 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from loguru import logger
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bot.replay.codec import ValueEncoder, encode_key
+from bot.replay.frame_file import FrameWriter
+
+if TYPE_CHECKING:
+    from ares import AresBot
+
+# kinds of recorded mediator lookups
+CALL: str = "call"
+PROPERTY: str = "property"
+
+
+def encode_command(command: Any) -> list:
+    """A `UnitCommand` as [ability, unit tag, target, queue]."""
+    target: Any = command.target
+    if isinstance(target, Unit):
+        target = target.tag
+    elif isinstance(target, Point2):
+        target = [float(target.x), float(target.y)]
+    return [command.ability.value, command.unit.tag, target, command.queue]
+
+
+class FrameRecorder:
+    """Record what the phobos managers see each frame, for `ReplayHarness`.
+
+    The first chunk holds the game info and data protos. Every frame after
+    that stores the raw observation, the game step, every query the managers
+    made through the `FrameCachedMediator` with its result, and the commands
+    the bot issued. Grids and other arrays returned by queries are stored
+    alongside, and only again once they change.
+
+    Parameters
+    ----------
+    path : Path
+        Where to write the recording.
+    ai : AresBot
+        Bot object that will be running the game
+    """
+
+    def __init__(self, path: Path, ai: "AresBot"):
+        self.path: Path = path
+        self.ai: "AresBot" = ai
+        self._writer: FrameWriter = FrameWriter(path)
+        self._encoder: ValueEncoder = ValueEncoder()
+        self._queries: list[list] = []
+        # lookup kinds are stored the first frame they show up in
+        self._kinds: dict[str, str] = dict()
+        self._new_kinds: dict[str, str] = dict()
+        self._info: dict[str, Any] = dict()
+
+    def start(self, game_info: bytes, game_data: bytes, header: dict[str, Any]) -> None:
+        """Write the chunk everything else is replayed against.
+
+        Parameters
+        ----------
+        game_info :
+            Serialised `ResponseGameInfo`.
+        game_data :
+            Serialised `ResponseData`.
+        header :
+            Anything else needed to replay the game (opening, player id etc.)
+        """
+        self._writer.write_chunk(
+            self.ai.state.game_loop,
+            header,
+            {
+                "game_info": np.frombuffer(game_info, dtype=np.uint8),
+                "game_data": np.frombuffer(game_data, dtype=np.uint8),
+            },
+            compress=frozenset({"game_info", "game_data"}),
+        )
+        self._encoder.start_chunk(self._writer.num_chunks)
+
+    def add_info(self, **info: Any) -> None:
+        """Store information that's only known once the game started."""
+        self._info.update(info)
+
+    def record_query(
+        self, kind: str, name: str, args: tuple, kwargs: dict, result: Any
+    ) -> None:
+        """Store a mediator lookup made this frame."""
+        if name not in self._kinds:
+            self._kinds[name] = self._new_kinds[name] = kind
+        self._queries.append(
+            [
+                name,
+                encode_key(args, kwargs, self._encoder.sources),
+                self._encoder.encode(name, result),
+            ]
+        )
+
+    def end_frame(self, commands: list) -> None:
+        """Write everything recorded this frame.
+
+        Parameters
+        ----------
+        commands :
+            `UnitCommand`s issued so far this step.
+        """
+        observation: bytes = self.ai.state.response_observation.SerializeToString()
+        meta: dict[str, Any] = {
+            "info": self._info,
+            "game_step": self.ai.client.game_step,
+            "kinds": self._new_kinds,
+            "queries": self._queries,
+            "commands": [encode_command(c) for c in commands],
+        }
+        self._writer.write_chunk(
+            self.ai.state.game_loop,
+            meta,
+            {
+                "observation": np.frombuffer(observation, dtype=np.uint8),
+                **self._encoder.arrays,
+            },
+            compress=frozenset({"observation"}),
+        )
+        self._queries = []
+        self._new_kinds = dict()
+        self._info = dict()
+        self._encoder.start_chunk(self._writer.num_chunks)
+
+    def close(self) -> None:
+        self._writer.close()
+        logger.info(f"{self._writer.num_chunks - 1} frames recorded to {self.path}")
@@ -0,0 +1,89 @@
+"""Track time spent in `on_step` and degrade features near the step limit."""
+from time import perf_counter
+from typing import Optional
+
+from loguru import logger
+
+from bot.consts import DegradationTier
+
+# fraction of the step time limit used before each tier is entered
+TIER_THRESHOLDS: dict[DegradationTier, float] = {
+    DegradationTier.SKIP_PREDICTIVE_AOE: 0.5,
+    DegradationTier.CACHED_PATHS_ONLY: 0.7,
+    DegradationTier.CRITICAL_MANAGERS_ONLY: 0.85,
+}
+
+
+class StepWatchdog:
+    """Expose the remaining step budget and the current `DegradationTier`.
+
+    The tier is taken from how much of `StepTimeLimitMs` this step has used
+    so far, and never drops below the tier matching the total time of the
+    previous step, so a slow step is followed by a cheaper one.
+
+    Parameters
+    ----------
+    config : dict
+        Dictionary with the data from the configuration file
+    """
+
+    def __init__(self, config: dict):
+        self.step_time_limit_ms: float = config.get("StepWatchdog", {}).get(
+            "StepTimeLimitMs", 40.0
+        )
+        # number of steps by the highest tier they were in
+        self.tier_counts: dict[DegradationTier, int] = {
+            tier: 0 for tier in DegradationTier
+        }
+        self._step_started: Optional[float] = None
+        self._carried_tier: DegradationTier = DegradationTier.NONE
+        self._step_tier: DegradationTier = DegradationTier.NONE
+
+    @property
+    def elapsed_ms(self) -> float:
+        """Time spent in the current step so far."""
+        if self._step_started is None:
+            return 0.0
+        return (perf_counter() - self._step_started) * 1000.0
+
+    @property
+    def remaining_ms(self) -> float:
+        """Time left before this step hits the limit, can be negative."""
+        return self.step_time_limit_ms - self.elapsed_ms
+
+    @property
+    def tier(self) -> DegradationTier:
+        """The degradation tier the step is in right now."""
+        tier: DegradationTier = max(self._carried_tier, self._tier_for(self.elapsed_ms))
+        if tier > self._step_tier:
+            self._step_tier = tier
+        return tier
+
+    def is_degraded(self, tier: DegradationTier) -> bool:
+        """Check if features switched off at `tier` should be skipped now."""
+        return self.tier >= tier
+
+    def start_step(self) -> None:
+        self._step_started = perf_counter()
+        self._step_tier = self._carried_tier
+
+    def end_step(self) -> None:
+        step_ms: float = self.elapsed_ms
+        # the highest tier this step was in
+        self.tier_counts[max(self._step_tier, self._tier_for(step_ms))] += 1
+        self._carried_tier = self._tier_for(step_ms)
+        self._step_started = None
+
+    def _tier_for(self, step_ms: float) -> DegradationTier:
+        used: float = step_ms / self.step_time_limit_ms
+        tier: DegradationTier = DegradationTier.NONE
+        for threshold_tier, threshold in TIER_THRESHOLDS.items():
+            if used >= threshold:
+                tier = threshold_tier
+        return tier
+
+    def log_tier_counts(self) -> None:
+        logger.info(
+            "Steps per degradation tier: "
+            + ", ".join(f"{tier.name} {n}" for tier, n in self.tier_counts.items())
+        )
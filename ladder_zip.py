@@ -20,6 +20,7 @@ MY_BOT_NAME: str = "MyBotName"
 ZIPFILE_NAME: str = "Bot.zip"
 
 CONFIG_FILE: str = "config.yml"
+PERFORMANCE_BASELINE: str = "benchmarks/baseline.json"
 if platform.system() == "Windows":
     FILETYPES_TO_IGNORE: Tuple = (".c", ".so", "pyx")
     ROOT_DIRECTORY = "./"
@@ -125,6 +126,24 @@ def check_config_values():
     assert not config["Debug"], "Debug is not False"
 
 
+def check_performance() -> None:
+    """
+    Make sure no hot path regressed against the stored benchmark baseline.
+    A missing baseline fails the build too, record one with
+    `python -m benchmarks.regression_gate --update` on the build machine.
+    """
+    assert path.isfile(path.join(ROOT_DIRECTORY, PERFORMANCE_BASELINE)), (
+        f"No {PERFORMANCE_BASELINE}, record one with "
+        f"`poetry run python -m benchmarks.regression_gate --update`"
+    )
+    p = Popen(
+        ["poetry", "run", "python", "-m", "benchmarks.regression_gate"],
+        cwd=f"{ROOT_DIRECTORY}",
+    )
+    p.communicate()
+    assert p.wait() == 0, "Performance regressed, see the report above"
+
+
 def get_zipfile_name() -> str:
     """Attempt to get bot name from config."""
     __user_config_location__: str = path.abspath(".")
@@ -188,6 +207,9 @@ if __name__ == "__main__":
     print("Checking config values...")
     check_config_values()
 
+    print("Checking for performance regressions...")
+    check_performance()
+
     print("Copying sc2 folder from site packages...")
 
     print(f"Zipping files and directories to {zipfile_name}...")